@@ -6,6 +6,7 @@ import { isDev } from './util.js';
 import { getPreloadPath } from './pathResolver.js';
 import { getStaticData, sendDataToBackend } from './backendData.js';
 import { spawn } from 'child_process';
+import readline from 'node:readline';
 
 const PYTHON_PATHS = {
   win32: path.join('src', 'scripts', 'venv', 'Scripts', 'python.exe'),
@@ -29,45 +30,150 @@ const getMainScriptPath = () => {
   return path.join(base, 'src', 'scripts', 'main.py');
 };
 
-const createPythonProcess = (pythonExe, scriptPath, args, env = {}) => {
-  return new Promise((resolve, reject) => {
-    const processEnv = { ...process.env, ...env };
+// Long-lived Python worker: main.py is started once in --worker mode and keeps the
+// scientific stack imported, so each analysis only pays for the audio processing.
+let pythonWorker = null;
 
-    if (app.isPackaged) {
-      processEnv.NEURALLY_NO_LOG = '1';
+const getPythonWorker = () => {
+  if (pythonWorker) {
+    return pythonWorker;
+  }
+
+  const processEnv = { ...process.env };
+  if (app.isPackaged) {
+    processEnv.NEURALLY_NO_LOG = '1';
+  }
+
+  const child = spawn(
+    getPythonExecutable(),
+    [getMainScriptPath(), '--worker'],
+    { env: processEnv }
+  );
+  // stderr keeps the last 10000 characters; stderrLength counts every character
+  // received, so each job can tell which part of stderr it produced.
+  const worker = {
+    child,
+    nextId: 1,
+    pending: new Map(),
+    stderr: '',
+    stderrLength: 0,
+  };
+  const lines = readline.createInterface({ input: child.stdout });
+
+  lines.on('line', (line) => {
+    let message;
+    try {
+      // The worker writes strict JSON (missing features are null):
+      message = JSON.parse(line);
+    } catch {
+      // The protocol is out of sync - fail the pending jobs instead of leaving them waiting, and restart the worker:
+      failPythonWorker(worker, `Invalid response from Python worker: ${line.slice(0, 200)}`);
+      return;
+    }
+
+    const job = worker.pending.get(message.id);
+    if (!job) {
+      return;
     }
 
-    const child = spawn(pythonExe, [scriptPath, ...args], { env: processEnv });
-    let output = '';
-    let error = '';
+    // Streaming jobs report each file as soon as it is processed, then the final result:
+    if (message.event === 'file') {
+      job.onProgress?.(message);
+      return;
+    }
 
-    child.stdout.on('data', (data) => {
-      output += data.toString();
-    });
+    worker.pending.delete(message.id);
+    job.resolve(JSON.stringify(message.result));
 
-    child.stderr.on('data', (data) => {
-      error += data.toString();
-    });
+    // Jobs run one at a time in the order they were sent - the next one starts now:
+    const next = worker.pending.values().next().value;
+    if (next) {
+      next.stderrStart = worker.stderrLength;
+    }
+  });
 
-    child.on('close', (code) => {
-      if (code === 0) {
-        resolve(output.trim());
-      } else {
-        reject(error || output);
-      }
-    });
+  // Always drain stderr so a chatty job can never block on a full pipe:
+  child.stderr.on('data', (data) => {
+    const text = data.toString();
+    worker.stderr = (worker.stderr + text).slice(-10000);
+    worker.stderrLength += text.length;
+  });
+
+  // The worker could not be started (e.g. no Python executable) or its stdin
+  // broke - fail the pending jobs instead of leaving them waiting:
+  child.on('error', (error) => {
+    failPythonWorker(worker, `Python worker failed: ${error.message}`);
   });
+  child.stdin.on('error', (error) => {
+    failPythonWorker(
+      worker,
+      `Could not send the job to the Python worker: ${error.message}`
+    );
+  });
+
+  child.on('close', () => {
+    for (const job of worker.pending.values()) {
+      job.reject(
+        getJobStderr(worker, job) || 'Python worker exited unexpectedly'
+      );
+    }
+    worker.pending.clear();
+    if (pythonWorker === worker) {
+      pythonWorker = null;
+    }
+  });
+
+  pythonWorker = worker;
+  return worker;
+};
+
+// The stderr written since the job started (as much of it as is still kept):
+const getJobStderr = (worker, job) => {
+  const length = Math.min(
+    worker.stderrLength - job.stderrStart,
+    worker.stderr.length
+  );
+  return length > 0 ? worker.stderr.slice(-length) : '';
 };
 
-const executeHD = async (testType, filePaths, isMultiple = false) => {
-  const pythonExe = getPythonExecutable();
-  const scriptPath = getMainScriptPath();
+const failPythonWorker = (worker, reason) => {
+  for (const job of worker.pending.values()) {
+    job.reject(reason);
+  }
+  worker.pending.clear();
+  if (pythonWorker === worker) {
+    pythonWorker = null;
+  }
+  worker.child.kill();
+};
+
+const stopPythonWorker = () => {
+  if (pythonWorker) {
+    pythonWorker.child.stdin.end();
+    pythonWorker = null;
+  }
+};
 
-  const args = isMultiple
-    ? [testType, '--multiple', filePaths.join('|')]
-    : [testType, filePaths];
+const executeHD = async (testType, filePaths, onProgress) => {
+  const worker = getPythonWorker();
+  const id = worker.nextId++;
 
-  return createPythonProcess(pythonExe, scriptPath, args);
+  return new Promise((resolve, reject) => {
+    worker.pending.set(id, {
+      resolve,
+      reject,
+      onProgress,
+      stderrStart: worker.stderrLength,
+    });
+    worker.child.stdin.write(
+      JSON.stringify({
+        id,
+        test_type: testType,
+        file_paths: filePaths,
+        stream: Boolean(onProgress),
+      }) + '\n'
+    );
+  });
 };
 
 const createMainWindow = () => {
@@ -164,8 +270,12 @@ const createMainWindow = () => {
 
   ipcMain.handle('processHD', async (event, testType, filePaths) => {
     try {
-      const isMultiple = Array.isArray(filePaths);
-      const result = await executeHD(testType, filePaths, isMultiple);
+      // Forward per-file results to the renderer while the batch is still running:
+      const result = await executeHD(testType, filePaths, (progress) => {
+        if (!event.sender.isDestroyed()) {
+          event.sender.send('hd-progress', progress);
+        }
+      });
       return result;
     } catch (error) {
       console.log('Python error: ', error);
@@ -216,10 +326,13 @@ const cleanupOutputDirectory = () => {
 
 app.whenReady().then(() => {
   createMainWindow();
+  // Warm up the analysis worker while the user is still choosing files:
+  getPythonWorker();
 });
 
 // Cleanup on app exit
 app.on('before-quit', () => {
+  stopPythonWorker();
   cleanupOutputDirectory();
 });
 
@@ -22,6 +22,11 @@ electron.contextBridge.exposeInMainWorld('electron', {
   fileUpload: () => electron.ipcRenderer.invoke('openFileDialog'),
   processHD: (testType, filePaths) =>
     electron.ipcRenderer.invoke('processHD', testType, filePaths),
+  onHDProgress: (callback) => {
+    const listener = (_, progress) => callback(progress);
+    electron.ipcRenderer.on('hd-progress', listener);
+    return () => electron.ipcRenderer.removeListener('hd-progress', listener);
+  },
   invokeSomething: () => electron.ipcRenderer.invoke('invokeSomething'),
   cleanupOutputDirectory: () =>
     electron.ipcRenderer.invoke('cleanupOutputDirectory'),
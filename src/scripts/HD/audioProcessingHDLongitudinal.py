@@ -14,7 +14,14 @@
 import pandas as pd
 import preProcessingAudioLongitudinal  
 import speechFeaturesAcousticLongitudinal
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import wait, FIRST_COMPLETED
+from collections import deque
+import contextlib, sys, time
+import hashlib, json, sqlite3
+import numpy as np
+from importlib import metadata
+from functools import lru_cache
+from pathlib import Path
 import logging
 from multiprocessing import Queue
 from logging.handlers import QueueHandler, QueueListener
@@ -87,17 +94,205 @@ def stop(self):
             pass
     listener = DummyListener()
 
+    # Nothing drains the queue without a listener - once its pipe is full the process would block at exit:
+    logger.removeHandler(queue_handler)
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Constants %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 # Define Subtest Names:
 nameSV = ['SV']                                         # Sustained Vowel Task
 nameSR = ['SR1', 'SR2', 'SR3', 'SR4', 'SR5']            # Syllable Repetition Task
 namePR = ['PR']                                         # Passage Reading Task            
 
+# Analysis Parameters (shared by every stage and part of the result store fingerprint):
+DETECTION_PARAMS = {'sizeEpoch': 0.25, 'overlap': 0.75, 'thresh_multiplier': 1, 'n_devices': 1}
+FEATURE_PARAMS = {'fmin': [75, 75], 'fmax': [600, 5000], 'nPeriods': [3, 6]}
+
+# Result Store location (NEURALLY_RESULT_STORE): a .sqlite file, or '' / 'off' to disable; unset: the caller's default
+# (the longitudinal cohort run keeps one next to its outputs, main.py / the desktop app use none).
+RESULT_STORE = os.environ.get("NEURALLY_RESULT_STORE")
+ANALYSIS_VERSION = 3                                    # Bump to invalidate every stored result
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Result Store %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Per-file results of earlier runs - voiced detection rows (onsets/offsets, SR RMS values), feature rows and detection
+# plots - kept in one SQLite file. Entries are keyed on the .wav content hash, the speech test and the analysis
+# fingerprint (parameters above, pre-processing and feature code, library versions), so re-running a cohort only
+# analyses new or changed recordings. Rows are stored as JSON that records every column dtype and the numpy types of the
+# cells (onset/offset arrays, meanRMS lists), so tables rebuilt from the store are saved exactly as a fresh run saves
+# them - and loading a shared store never executes code (no pickles). Plots are stored as the PNG bytes.
+@lru_cache(maxsize=None)
+def analysis_fingerprint():
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((ANALYSIS_VERSION, DETECTION_PARAMS, FEATURE_PARAMS, preProcessingAudioLongitudinal.RESAMPLE_TYPE,
+                   preProcessingAudioLongitudinal.WAV_CHANNEL, speechFeaturesAcousticLongitudinal.SEGMENT_MODE,
+                   speechFeaturesAcousticLongitudinal.MIN_SEGMENT_SEC)).encode())
+    for package in ['numpy', 'scipy', 'pandas', 'librosa', 'praat-parselmouth']:
+        try:
+            h.update(f"{package}={metadata.version(package)}".encode())
+        except metadata.PackageNotFoundError:
+            pass
+    for module in [preProcessingAudioLongitudinal, speechFeaturesAcousticLongitudinal]:
+        with open(module.__file__, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+# Content hash of a recording (the result store key and the processed-outputs markers) - read once per process for each
+# version of the file (path, size and modification time), as the markers and the store key both ask for it:
+def content_hash(filePath):
+    stat = os.stat(filePath)
+    return file_hash(os.path.abspath(filePath), stat.st_size, stat.st_mtime_ns)
+
+@lru_cache(maxsize=None)
+def file_hash(filePath, size, mtime_ns):
+    h = hashlib.blake2b(digest_size=20)
+    with open(filePath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+class resultStore:
+
+    # INITIALISE: open (or create) the store - one connection per process, WAL so pool workers can write concurrently.
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT, stage TEXT, value BLOB, PRIMARY KEY (key, stage))")
+        self.db.commit()
+        self.fingerprint = analysis_fingerprint()
+
+    # KEY: content hash of the .wav file, speech test and analysis fingerprint.
+    def key(self, filePath, speechTest):
+        return f"{content_hash(filePath)}:{speechTest}:{self.fingerprint}"
+
+    # GET / PUT BLOB: stored bytes of one stage - None when not stored.
+    def getBlob(self, key, stage):
+        row = self.db.execute("SELECT value FROM results WHERE key = ? AND stage = ?", (key, stage)).fetchone()
+        return None if row is None else row[0]
+
+    def putBlob(self, key, stage, blob):
+        self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (key, stage, blob))
+        self.db.commit()
+
+    # GET / PUT: stored rows of one stage ('detection': (df_voiced, df_rms or None), 'features': DataFrame) - None when
+    # not stored or unreadable.
+    def get(self, key, stage):
+        blob = self.getBlob(key, stage)
+        try:
+            return None if blob is None else decode_stored(json.loads(blob))
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def put(self, key, stage, value):
+        self.putBlob(key, stage, json.dumps(encode_stored(value)).encode())
+
+    # PLOTS: store the detection plot written to figPath / write the stored plot there (False when none is stored).
+    def storePlot(self, key, stage, figPath, filename):
+        plot_file = os.path.join(figPath, filename + '.png')
+        if os.path.exists(plot_file):
+            with open(plot_file, 'rb') as f:
+                self.putBlob(key, stage, f.read())
+
+    def restorePlot(self, key, stage, figPath, filename):
+        png = self.getBlob(key, stage)
+        if png is None:
+            return False
+        os.makedirs(figPath, exist_ok=True)
+        with open(os.path.join(figPath, filename + '.png'), 'wb') as f:
+            f.write(png)
+        return True
+
+# Processed-outputs marker: written next to a subtest's outputs once its feature table is saved, recording the analysis
+# fingerprint and the content hash of every recording it was computed from (see check_processed_files).
+def processed_marker(outputPath, group, speechTest):
+    return os.path.join(outputPath, f'processed_{group}_{speechTest}.json')
+
+def processed_state(filePaths, filenames):
+    return {'fingerprint': analysis_fingerprint(),
+            'recordings': {name: content_hash(filePath) for filePath, name in zip(filePaths, filenames)}}
+
+def write_processed_marker(outputPath, group, speechTest, filePaths, filenames):
+    marker = processed_marker(outputPath, group, speechTest)
+    with open(marker + '.tmp', 'w') as f:
+        json.dump(processed_state(filePaths, filenames), f, indent=1)
+    os.replace(marker + '.tmp', marker)
+
+# Stored values as JSON: DataFrames with their column dtypes, tuples, and cells with their numpy types.
+def encode_stored(value):
+    if value is None:
+        return None
+    if isinstance(value, tuple):
+        return {'tuple': [encode_stored(item) for item in value]}
+    return {'frame': {'columns': list(value.columns), 'dtypes': [str(dtype) for dtype in value.dtypes],
+                      'values': [[encode_cell(cell) for cell in value[column].tolist()] for column in value.columns]}}
+
+def encode_cell(cell):
+    if isinstance(cell, np.ndarray):
+        return {'ndarray': cell.dtype.str, 'values': cell.tolist()}
+    if isinstance(cell, (list, tuple)):
+        return {'list': [encode_cell(item) for item in cell]}
+    if isinstance(cell, np.generic):
+        return {'scalar': cell.dtype.str, 'value': cell.item()}
+    return cell
+
+def decode_stored(value):
+    if value is None:
+        return None
+    if 'tuple' in value:
+        return tuple(decode_stored(item) for item in value['tuple'])
+    frame = value['frame']
+    columns = {}
+    for column, dtype, cells in zip(frame['columns'], frame['dtypes'], frame['values']):
+        values = np.empty(len(cells), dtype=object)
+        for i, cell in enumerate(cells):
+            values[i] = decode_cell(cell)
+        values = pd.Series(values, dtype=object)
+        columns[column] = values if dtype == 'object' else values.astype(dtype)
+    return pd.DataFrame(columns)
+
+def decode_cell(cell):
+    if isinstance(cell, dict):
+        if 'ndarray' in cell:
+            return np.array(cell['values'], dtype=cell['ndarray'])
+        if 'list' in cell:
+            return [decode_cell(item) for item in cell['list']]
+        return np.dtype(cell['scalar']).type(cell['value'])
+    return cell
+
+# Store location for a caller's default path (None: no store), and one open store per path in each process:
+def result_store_path(default=None):
+    if RESULT_STORE is None:
+        return default
+    if RESULT_STORE.strip().lower() in ('', 'off'):
+        return None
+    return RESULT_STORE
+
+result_stores = {}
+
+def get_result_store(path):
+    if path not in result_stores:
+        result_stores[path] = resultStore(path)
+    return result_stores[path]
+
+# Store stage of a detection plot - plots of different modes and resolutions are stored separately:
+def plot_stage(plotMode, dpi):
+    return f'plot:{plotMode}:{dpi}'
+
+# Stored rows carry the file name of the run that stored them - relabel a copy for the current name:
+def relabel(row, column, name):
+    row = row.copy()
+    row[column] = name
+    return row
+
+# Subtest recordings in dataPath - the same files, names and order as the open_wav directory scan:
+def subtest_files(dataPath, speechTest):
+    files = [f for f in os.listdir(dataPath) if f.endswith(".wav") and speechTest in f]
+    return [os.path.join(dataPath, f) for f in files], [Path(f).stem for f in files]
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Functions %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-def load_audio_files(dataPath, speechTest):
-    # Helper function to load audio files for a given task:
+def load_audio_files(dataPath, speechTest, filePaths=None, filenames=None):
+    # Helper function to load audio files for a given task - either scan dataPath or read an explicit list of paths:
     try:
-        filenames, files = preProcessingAudioLongitudinal.open_wav(dataPath, speechTest).openFiles()
+        filenames, files = preProcessingAudioLongitudinal.open_wav(dataPath, speechTest, filePaths, filenames).openFiles()
 
         # Log the structure of the returned data:
         logger.info(f"Loaded {len(files)} audio files for {speechTest}.")
@@ -113,8 +308,55 @@ def load_audio_files(dataPath, speechTest):
         logger.error(f"Error loading audio files for {speechTest}: {str(e)}")
         raise
 
+# Save Voiced Detection: .npz hand-off for feature estimation in another process, plus an optional export in the table
+# format (CSV, or Parquet with list<int64> onset/offset columns).
+def save_voiced_detection(df_voiced, outputPath, group, speechTest, export_csv=False):
+    result_file = os.path.join(outputPath, f'onsetOffset_{group}_{speechTest}.npz')
+    preProcessingAudioLongitudinal.save_onset_offset(result_file, df_voiced)
+    logger.info(f"Saved {speechTest} voiced detection to {result_file}")
+
+    if export_csv:
+        df_export = df_voiced.copy()
+        df_export['onset'] = [list(map(int, x)) for x in df_voiced['onset']]
+        df_export['offset'] = [list(map(int, x)) for x in df_voiced['offset']]
+        export_file = preProcessingAudioLongitudinal.write_table(df_export, outputPath,
+                                                                 f'onsetOffset_{group}_{speechTest}')
+        logger.info(f"Exported {speechTest} voiced detection to {export_file}")
+
+# Save RMS data (SR only): per-syllable meanRMS lists and the rms_slope of each file.
+def save_rms(df_rms, outputPath, group, speechTest):
+    rms_file = preProcessingAudioLongitudinal.write_table(df_rms, outputPath, f'rms_{group}_{speechTest}')
+    logger.info(f"Saved RMS data to {rms_file}")
+
+# Save Features: the subtest's feature table.
+def save_features(df, outputPath, group, speechTest):
+    features_file = preProcessingAudioLongitudinal.write_table(df, outputPath, f'features_{group}_{speechTest}')
+    logger.info(f"Processed features for {speechTest}, saved to {features_file}.")
+
+# DETECT VOICED: run the task's voiced detection on loaded files; returns df_voiced and df_rms (None except for SR).
+def detect_voiced(files, filenames, speechTest, figPath, plotMode='full', dpi=300):
+    # Initialise DataFrame to store pID, onset, and offset as lists:
+    df_voiced = pd.concat([pd.DataFrame(filenames, columns=['pID']), pd.DataFrame(columns=['onset', 'offset'])],
+                          ignore_index=True).astype(object)
+
+    detector = preProcessingAudioLongitudinal.exeDetectionFunctions(
+        files, filenames, df_voiced, figPath, **DETECTION_PARAMS, plotMode=plotMode, dpi=dpi)
+    return detector.voiceDetector(speechTest)
+
+# SAVE DETECTION: the .npz hand-off (and optional export) plus, for SR, the RMS table.
+def save_detection(df_voiced, df_rms, outputPath, group, speechTest, export_csv=False):
+    save_voiced_detection(df_voiced, outputPath, group, speechTest, export_csv)
+
+    # Save RMS data if available:
+    if df_rms is not None:
+        save_rms(df_rms, outputPath, group, speechTest)
+
 # VOICED DETECTION METHOD - Updated to accept SR, PR & SV Tasks:
-def process_voiced_detection(files, filenames, speechTest, outputPath, group, figPath):
+# Detection results are returned in memory and saved as a compact .npz hand-off; export_csv also exports the
+# onset/offset table (see save_voiced_detection).
+# figPath=None skips the diagnostic plots; plotMode='fast' renders them in the background (see wait_for_plots).
+def process_voiced_detection(files, filenames, speechTest, outputPath, group, figPath, export_csv=False,
+                             plotMode='full', dpi=300, wait_plots=True):
 
     try:
         if not os.path.exists(outputPath):
@@ -122,37 +364,17 @@ def process_voiced_detection(files, filenames, speechTest, outputPath, group, fi
             logger.info(f"Created directory: {outputPath}")
 
         logger.info(f"Processing voiced detection for {speechTest}")
+        df_voiced, df_rms = detect_voiced(files, filenames, speechTest, figPath, plotMode, dpi)
+        save_detection(df_voiced, df_rms, outputPath, group, speechTest, export_csv)
+        if wait_plots:
+            wait_for_plots()
 
-        # Initialise DataFrame to store pID, onset, and offset as lists:
-        df_voiced = pd.concat([pd.DataFrame(filenames, columns=['pID']), pd.DataFrame(columns=['onset', 'offset'])],
-                              ignore_index=True).astype(object)
-
-        detector = preProcessingAudioLongitudinal.exeDetectionFunctions(
-            files, filenames, df_voiced, figPath, sizeEpoch=0.25, overlap=0.75, thresh_multiplier=1, n_devices=1)
-        
-        # Adjust detection method based on task type:
+        # Adjust the result based on task type:
         if speechTest.startswith('SR'):
-            # For Syllable Repetition, get both df_voiced and df_rms
-            df_voiced, df_rms = detector.voiceDetector(speechTest)
-            result_file = os.path.join(outputPath, f'onsetOffset_{group}_{speechTest}.csv')
-            df_voiced.to_csv(result_file)
-            logger.info(f"Saved SR voiced detection to {result_file}")
-
-            # Save RMS data if available:
-            if df_rms is not None:
-                rms_file = os.path.join(outputPath, f'rms_{group}_{speechTest}.csv')
-                df_rms.to_csv(rms_file)
-                logger.info(f"Saved RMS data to {rms_file}")
-
+            # For Syllable Repetition, return both df_voiced and df_rms
             return df_voiced, df_rms
-        
         elif speechTest.startswith('PR') or speechTest.startswith('SV'):
-            # For PR and SV, only need df_voiced (df_rms will be None):
-            df_voiced, _ = detector.voiceDetector(speechTest)  
-            result_file = os.path.join(outputPath, f'onsetOffset_{group}_{speechTest}.csv')
-            df_voiced.to_csv(result_file)
-            logger.info(f"Saved {speechTest} voiced detection to {result_file}")
-
+            # For PR and SV, only need df_voiced (df_rms is None):
             return df_voiced
 
     except Exception as e:
@@ -160,75 +382,292 @@ def process_voiced_detection(files, filenames, speechTest, outputPath, group, fi
         logger.error("Traceback:", exc_info=True)
         raise
 
+# DETECT SUBTEST: load one subtest's audio by path in the worker and run its voiced detection (avoids pickling the
+# audio from the parent process). With a result store only the recordings without stored rows (or plot) are loaded and
+# detected; the subtest's outputs are then saved from the stored and new rows together.
+def detect_subtest(dataPath, outputPath, figPath, group, speechTest, export_csv=False, store=None, plotMode='full',
+                   dpi=300):
+    if store is None:
+        filenames, files = load_audio_files(dataPath, speechTest)
+        return process_voiced_detection(files, filenames, speechTest, outputPath, group, figPath, export_csv, plotMode,
+                                        dpi)
+
+    results = get_result_store(store)
+    filePaths, filenames = subtest_files(dataPath, speechTest)
+    keys = [results.key(filePath, speechTest) for filePath in filePaths]
+    plot = plot_stage(plotMode, dpi)
+    rows = [results.get(key, 'detection') for key in keys]
+    missing = [i for i, (key, row) in enumerate(zip(keys, rows))
+               if row is None or (figPath is not None and not results.restorePlot(key, plot, figPath, filenames[i]))]
+
+    if missing:
+        logger.info(f"Processing voiced detection for {speechTest}")
+        names = [filenames[i] for i in missing]
+        _, files = load_audio_files(None, speechTest, [filePaths[i] for i in missing], names)
+        df_voiced, df_rms = detect_voiced(files, names, speechTest, figPath, plotMode, dpi)
+        wait_for_plots()
+        for k, i in enumerate(missing):
+            rows[i] = (df_voiced.iloc[[k]], None if df_rms is None else df_rms.iloc[[k]])
+            results.put(keys[i], 'detection', rows[i])
+            if figPath is not None:
+                results.storePlot(keys[i], plot, figPath, filenames[i])
+    logger.info(f"Result store for {speechTest} detection: {len(keys) - len(missing)} hits, {len(missing)} misses.")
+
+    os.makedirs(outputPath, exist_ok=True)
+    df_voiced = pd.concat([relabel(row[0], 'pID', name) for row, name in zip(rows, filenames)], ignore_index=True)
+    df_rms = None
+    if speechTest.startswith('SR'):
+        df_rms = pd.concat([relabel(row[1], 'pID', name) for row, name in zip(rows, filenames)], ignore_index=True)
+    save_detection(df_voiced, df_rms, outputPath, group, speechTest, export_csv)
+    return (df_voiced, df_rms) if speechTest.startswith('SR') else df_voiced
+
+# Wait for background (fast-mode) detection plots; rendering errors are logged, they never fail the job:
+def wait_for_plots():
+    for error in preProcessingAudioLongitudinal.wait_for_plots():
+        logger.error(f"Error rendering detection plot: {error}")
+
+# ESTIMATE FEATURES: feature table of a subtest's files (dataPath scan, explicit paths or loaded audio). The table is
+# returned, not saved - process_feature_estimation writes the complete table once.
+def estimate_features(dataPath, outputPath, group, speechTest, filenames=None, files=None, filePaths=None,
+                      dfVoiced=None):
+    if dfVoiced is None:
+        dfVoiced = preProcessingAudioLongitudinal.load_onset_offset(
+            os.path.join(outputPath, f'onsetOffset_{group}_{speechTest}.npz'))
+    table = speechFeaturesAcousticLongitudinal.featuresTable(
+        dataPath, None, group, speechTest, **FEATURE_PARAMS, filenames=filenames, files=files,
+        filePaths=filePaths, dfVoiced=dfVoiced)
+
+    # Adjust feature extraction based on task type:
+    if speechTest.startswith('SR'):
+        return table.getFeaturesSR()
+    elif speechTest.startswith('PR'):
+        return table.getFeaturesPR()
+    elif speechTest.startswith('SV'):
+        return table.getFeaturesSV()
+
 # UPDATED METHOD - to accept SV Task - 05/04/25
-def process_feature_estimation(dataPath, outputPath, group, speechTest):
+# With a result store (dataPath scan only) features are only estimated for the recordings without stored rows.
+def process_feature_estimation(dataPath, outputPath, group, speechTest, filenames=None, files=None, filePaths=None,
+                               dfVoiced=None, store=None):
 
     try:
-        # Adjust feature extraction based on task type:
-        if speechTest.startswith('SR'):
-            df = speechFeaturesAcousticLongitudinal.featuresTable(
-                dataPath, outputPath, group, speechTest, 
-                fmin=[75, 75], fmax=[600, 5000], nPeriods=[3, 6]
-            ).getFeaturesSR()
-        elif speechTest.startswith('PR'):
-            df = speechFeaturesAcousticLongitudinal.featuresTable(
-                dataPath, outputPath, group, speechTest, 
-                fmin=[75, 75], fmax=[600, 5000], nPeriods=[3, 6]
-            ).getFeaturesPR()
-        elif speechTest.startswith('SV'):
-            df = speechFeaturesAcousticLongitudinal.featuresTable(
-                dataPath, outputPath, group, speechTest, 
-                fmin=[75, 75], fmax=[600, 5000], nPeriods=[3, 6]
-            ).getFeaturesSV()
+        if store is None or files is not None or filePaths is not None:
+            df = estimate_features(dataPath, outputPath, group, speechTest, filenames, files, filePaths, dfVoiced)
+        else:
+            results = get_result_store(store)
+            filePaths, filenames = subtest_files(dataPath, speechTest)
+            keys = [results.key(filePath, speechTest) for filePath in filePaths]
+            rows = [results.get(key, 'features') for key in keys]
+            missing = [i for i, row in enumerate(rows) if row is None]
+
+            if missing:
+                names = [filenames[i] for i in missing]
+                if dfVoiced is None:
+                    dfVoiced = preProcessingAudioLongitudinal.load_onset_offset(
+                        os.path.join(outputPath, f'onsetOffset_{group}_{speechTest}.npz'))
+                dfVoiced = dfVoiced.set_index('pID').loc[names].reset_index()
+                df = estimate_features(dataPath, outputPath, group, speechTest, names, None,
+                                       [filePaths[i] for i in missing], dfVoiced)
+                for k, i in enumerate(missing):
+                    rows[i] = df.iloc[[k]]
+                    results.put(keys[i], 'features', rows[i])
+            logger.info(f"Result store for {speechTest} features: {len(keys) - len(missing)} hits, "
+                        f"{len(missing)} misses.")
+
+            df = pd.concat([relabel(row, 'filename', name) for row, name in zip(rows, filenames)], ignore_index=True)
         
-        features_file = os.path.join(outputPath, f'features_{group}_{speechTest}.csv')
-        df.to_csv(features_file)
-        logger.info(f"Processed features for {speechTest}, saved to {features_file}.")
+        save_features(df, outputPath, group, speechTest)
+        if files is None:
+            if filePaths is None:
+                filePaths, filenames = subtest_files(dataPath, speechTest)
+            write_processed_marker(outputPath, group, speechTest, filePaths, filenames)
+
+        cache = preProcessingAudioLongitudinal.preprocess_cache
+        logger.info(f"Pre-processing cache for {speechTest}: {cache.hits} hits, {cache.misses} misses.")
         return df
     
     except Exception as e:
         logger.error(f"Error processing features for {speechTest}: {str(e)}")
         raise
 
+# PER-FILE PIPELINE: pre-process -> voiced detection -> features for a single file (the unit of work for file-level
+# parallelism). Only the diagnostic plot is written; returns the file's voiced detection, features and RMS rows, the
+# time spent in each stage (seconds) and whether the results came from the result store (store: its path or None).
+def process_file(filePath, filename, speechTest, figPath=None, plotMode='fast', dpi=300, store=None):
+    timings = {}
+    start = stage = time.perf_counter()
+
+    def lap(name):
+        nonlocal stage
+        now = time.perf_counter()
+        timings[name] = now - stage
+        stage = now
+
+    # Stored results of an unchanged recording (the plot too, when one is asked for):
+    plot = plot_stage(plotMode, dpi)
+    if store is not None:
+        results = get_result_store(store)
+        key = results.key(filePath, speechTest)
+        detection, df = results.get(key, 'detection'), results.get(key, 'features')
+        if detection is not None and df is not None and (
+                figPath is None or results.restorePlot(key, plot, figPath, filename)):
+            df_voiced, df_rms = detection
+            lap('store')
+            timings['total'] = time.perf_counter() - start
+            return (relabel(df_voiced, 'pID', filename), relabel(df, 'filename', filename),
+                    None if df_rms is None else relabel(df_rms, 'pID', filename), timings, True)
+        lap('store')
+
+    # Progress prints go to stderr - in a pool worker stdout is shared with the parent (the --worker protocol channel):
+    with contextlib.redirect_stdout(sys.stderr):
+        filenames, files = preProcessingAudioLongitudinal.open_wav(None, speechTest, [filePath], [filename]).openFiles()
+        if files[0] is None:
+            raise ValueError(f"Could not read {os.path.basename(filePath)} as a WAV file.")
+        lap('load')
+
+        df_voiced = pd.concat([pd.DataFrame(filenames, columns=['pID']), pd.DataFrame(columns=['onset', 'offset'])],
+                              ignore_index=True).astype(object)
+        detector = preProcessingAudioLongitudinal.exeDetectionFunctions(
+            files, filenames, df_voiced, figPath, **DETECTION_PARAMS, plotMode=plotMode, dpi=dpi)
+        lap('preprocess')
+        df_voiced, df_rms = detector.voiceDetector(speechTest)
+        lap('detection')
+
+        df = estimate_features(None, None, None, speechTest, filenames=filenames, files=files, dfVoiced=df_voiced)
+        lap('features')
+
+        # The plot rendered in the background while features were estimated:
+        wait_for_plots()
+        lap('plot_wait')
+
+    if store is not None:
+        results.put(key, 'detection', (df_voiced, df_rms))
+        results.put(key, 'features', df)
+        if figPath is not None:
+            results.storePlot(key, plot, figPath, filename)
+
+    timings['total'] = time.perf_counter() - start
+    return df_voiced, df, df_rms, timings, False
+
+# Worker count for file-level parallelism: NEURALLY_WORKERS, otherwise one per CPU core, limited by the memory needed for
+# the largest of filePaths.
+def default_workers(filePaths=None):
+    return preProcessingAudioLongitudinal.worker_count(filePaths)
+
+# File pool: the process's shared worker pool (see preProcessingAudioLongitudinal.get_worker_pool), kept for later jobs -
+# the --worker process and later groups and test types reuse the warm workers. n_workers only sizes it on first use;
+# batches limit their own concurrency (preProcessingAudioLongitudinal.in_flight_limit).
+def get_file_pool(n_workers=None):
+    return preProcessingAudioLongitudinal.get_worker_pool(n_workers)
+
+# PROCESS FILES: run process_file for every file (in parallel with n_workers > 1), gather the results in input order and
+# save them like process_voiced_detection / process_feature_estimation do.
+# on_result(index, df, timings, error, cached) is called as each file finishes (completion order). With keep_going a failing
+# file is reported through on_result and left out of the outputs instead of failing the whole batch. store: result store
+# path - unchanged files are answered from it.
+def process_files(filePaths, filenames, speechTest, outputPath, group, figPath=None, n_workers=None, plotMode='fast',
+                  dpi=300, export_csv=False, on_result=None, keep_going=False, store=None):
+    try:
+        if not os.path.exists(outputPath):
+            os.makedirs(outputPath)
+            logger.info(f"Created directory: {outputPath}")
+
+        n_workers = n_workers or default_workers(filePaths)
+        n = len(filePaths)
+        results = [None] * n
+
+        def collect(i, run):
+            try:
+                results[i] = run()
+            except Exception as e:
+                logger.error(f"Error processing {filePaths[i]}: {str(e)}")
+                if on_result is not None:
+                    on_result(i, None, None, str(e), False)
+                if not keep_going:
+                    raise
+                return
+            if on_result is not None:
+                on_result(i, results[i][1], results[i][3], None, results[i][4])
+
+        if min(n_workers, n) > 1:
+            # At most `limit` files of this batch in flight on the shared pool (memory bound for its largest file):
+            limit = preProcessingAudioLongitudinal.in_flight_limit(n_workers)
+            logger.info(f"Processing {n} {speechTest} files with {min(limit, n)} workers.")
+            pool = get_file_pool()
+            queue = deque(range(n))
+            pending = {}
+            try:
+                while queue or pending:
+                    while queue and len(pending) < limit:
+                        i = queue.popleft()
+                        pending[pool.submit(process_file, filePaths[i], filenames[i], speechTest, figPath, plotMode,
+                                            dpi, store)] = i
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(pending.pop(future), future.result)
+            finally:
+                for future in pending:
+                    future.cancel()
+        else:
+            for i, (filePath, filename) in enumerate(zip(filePaths, filenames)):
+                collect(i, lambda: process_file(filePath, filename, speechTest, figPath, plotMode, dpi, store))
+
+        results = [r for r in results if r is not None]
+        if not results:
+            raise RuntimeError(f"None of the {speechTest} files could be processed.")
+        if store is not None:
+            hits = sum(r[4] for r in results)
+            logger.info(f"Result store for {speechTest}: {hits} hits, {len(results) - hits} misses.")
+
+        # Combine the per-file rows in input order:
+        df_voiced = pd.concat([r[0] for r in results], ignore_index=True)
+        df = pd.concat([r[1] for r in results], ignore_index=True)
+        save_voiced_detection(df_voiced, outputPath, group, speechTest, export_csv)
+
+        df_rms = None
+        if speechTest.startswith('SR'):
+            df_rms = pd.concat([r[2] for r in results], ignore_index=True)
+            save_rms(df_rms, outputPath, group, speechTest)
+
+        save_features(df, outputPath, group, speechTest)
+
+        return df_voiced, df, df_rms
+
+    except Exception as e:
+        logger.error(f"Error processing files for {speechTest}: {str(e)}")
+        raise
+
 # Combine and Save Features - updated to accept SV Task - 05/04/25:
-def combine_and_save_features(outputPath, group, task_type='SR'):
+# The SR1-SR5 feature and RMS tables produced in this run (features/rms: {speechTest: DataFrame}) are combined in memory;
+# saved tables of earlier runs are never mixed in - a subtest missing from this run fails the combination.
+def combine_and_save_features(outputPath, group, task_type='SR', features=None, rms=None):
 
     try:
         # Adjust based on task type:
         if task_type == 'SR':
-            # Step 1: Combine temporal features from all SR1 to SR5 files
-            frames = []
-            for i in range(1, 6):  # SR1 to SR5
-                df = pd.read_csv(os.path.join(outputPath, f'features_{group}_SR{i}.csv'))
-                frames.append(df)
+            names = [f'SR{i}' for i in range(1, 6)]     # SR1 to SR5
+            features, rms = features or {}, rms or {}
+            missing = [speechTest for speechTest in names if speechTest not in features or speechTest not in rms]
+            if missing:
+                raise RuntimeError(f"{', '.join(missing)} not produced in this run - refusing to combine SR features "
+                                   f"with older tables.")
 
-            # Concatenate all the frames:
-            df_combined = pd.concat(frames, ignore_index=True)
+            # Step 1: Combine temporal features from all SR1 to SR5 subtests
+            df_combined = pd.concat([features[speechTest] for speechTest in names], ignore_index=True)
 
-            # Clean up any 'Unnamed' columns:
-            df_combined = df_combined.loc[:, ~df_combined.columns.str.contains('^Unnamed')]
-            
-            # Step 2: Combine RMS slope values for all SR1 to SR5 files:
-            rms_frames = []
-            for i in range(1, 6):   # SR1 to SR5
-                rms_df = pd.read_csv(os.path.join(outputPath, f'rms_{group}_SR{i}.csv'))
-                rms_frames.append(rms_df)
-            
-            # Concatenate all the RMS frames:
-            rms_combined = pd.concat(rms_frames, ignore_index=True)
+            # Step 2: Combine RMS slope values for all SR1 to SR5 subtests:
+            rms_combined = pd.concat([rms[speechTest] for speechTest in names], ignore_index=True)
 
-            # Clean up any 'Unnamed' columns in the RMS data:
-            rms_combined = rms_combined.loc[:, ~rms_combined.columns.str.contains('^Unnamed')]
-            
             # Ensure the RMS dataframe has the correct column names: - 'filename' to match with the combined DataFrame.
             rms_combined = rms_combined.rename(columns={'pID': 'filename'})
             
             # Step 3: Merge the RMS data into the combined temporal features dataframe
             df_combined = pd.merge(df_combined, rms_combined[['filename', 'rms_slope']], on='filename', how='left')
+            df_combined['rms_slope'] = pd.to_numeric(df_combined['rms_slope'])
             
-             # Step 4: Save the combined DataFrame to a CSV file
-            combined_file = os.path.join(outputPath, f'features_{group}_SR.csv')
-            df_combined.to_csv(combined_file, index=False)
+            # Step 4: Save the combined DataFrame
+            combined_file = preProcessingAudioLongitudinal.write_table(df_combined, outputPath, f'features_{group}_SR',
+                                                                       index=False)
             
             logger.info(f"Combined and saved SR features with RMS slope for {group} into {combined_file}.")
         
@@ -241,11 +680,14 @@ def combine_and_save_features(outputPath, group, task_type='SR'):
         raise
 
 # Check Processed Files: Check if all necessary output files are present before running the next step.
-def check_processed_files(outputPath, group, names):
+# Outputs only count as processed when their marker matches the current analysis fingerprint (parameters, code, library
+# versions) and - with dataPath - the recordings now in dataPath, so stale outputs of an earlier run never pass.
+def check_processed_files(outputPath, group, names, dataPath=None):
 
     for speechTest in names:
-        voiced_file = os.path.join(outputPath, f'onsetOffset_{group}_{speechTest}.csv')
-        feature_file = os.path.join(outputPath, f'features_{group}_{speechTest}.csv')
+        voiced_file = os.path.join(outputPath, f'onsetOffset_{group}_{speechTest}.npz')
+        feature_file = preProcessingAudioLongitudinal.table_file(outputPath, f'features_{group}_{speechTest}')
+        marker = processed_marker(outputPath, group, speechTest)
         
         if not os.path.exists(voiced_file):
             logger.error(f"Voiced detection file not found for {speechTest}. Expected file: {voiced_file}")
@@ -255,65 +697,82 @@ def check_processed_files(outputPath, group, names):
             logger.error(f"Feature file not found for {speechTest}. Expected file: {feature_file}")
             return False
 
-    logger.info("All required files are present.")
+        try:
+            with open(marker) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            logger.error(f"No processed marker for {speechTest}. Expected file: {marker}")
+            return False
+
+        if state.get('fingerprint') != analysis_fingerprint():
+            logger.error(f"Outputs of {speechTest} were produced with other analysis parameters or code: {marker}")
+            return False
+
+        if dataPath is not None:
+            filePaths, filenames = subtest_files(dataPath, speechTest)
+            if state.get('recordings') != processed_state(filePaths, filenames)['recordings']:
+                logger.error(f"Outputs of {speechTest} do not match the recordings in {dataPath}: {marker}")
+                return False
+
+    logger.info("All required files are present and up to date.")
     return True
 
 # Process Speech Features: main function to process speech features for subtests (SR, PR or SV) updated to accept SV Task - 05/04/25.
-def process_speech_features(dataPath, outputPath, figPath, group, names):
+# n_workers: size of the shared worker pool (default: from the cores and the group's files) - pass the same value from
+# concurrent callers so they share one pool. store: result store path - only new or changed recordings are analysed.
+# Returns True when every subtest's outputs were written.
+def process_speech_features(dataPath, outputPath, figPath, group, names, export_csv=False, n_workers=None, store=None):
 
     try:
-        # Parallel Processing with ProcessPoolExecutor
-        with ProcessPoolExecutor(max_workers=5) as executor:
-            # Log before submitting tasks
-            logger.info(f"Submitting tasks for voiced detection and feature estimation for group {group}.")
-
-            # Submit voiced detection tasks
-            future_voiced = {
-                executor.submit(process_voiced_detection, files, filenames, speechTest, outputPath, group, figPath): speechTest
-                for speechTest, (filenames, files) in zip(names, [load_audio_files(dataPath, speechTest) for speechTest in names])
-            }
-
-            # Log task submission
-            logger.info(f"Tasks submitted for {len(future_voiced)} voiced detection tasks.")
-
-            # Wait for all voiced detection tasks to complete
-            for future in as_completed(future_voiced):
-                speechTest = future_voiced[future]
+        # Dependency-aware scheduling: each subtest's feature estimation is submitted as soon as its own voiced detection
+        # finishes, so no subtest waits behind the slowest detection of the group. Workers read their own audio by path.
+        # Tasks run on the shared worker pool, at most n_workers of this group at a time (default: from the cores and the
+        # memory estimate of the group's files); a finished detection's feature estimation goes ahead of the waiting
+        # detections.
+        if n_workers is None:
+            filePaths = [os.path.join(dataPath, f) for f in os.listdir(dataPath)
+                         if f.endswith('.wav') and any(speechTest in f for speechTest in names)]
+            n_workers = default_workers(filePaths)
+        executor = get_file_pool(n_workers)
+        limit = preProcessingAudioLongitudinal.in_flight_limit(n_workers)
+
+        def submit(stage, speechTest):
+            if stage == 'detection':
+                return executor.submit(detect_subtest, dataPath, outputPath, figPath, group, speechTest, export_csv,
+                                       store)
+            return executor.submit(process_feature_estimation, dataPath, outputPath, group, speechTest, store=store)
+
+        logger.info(f"Submitting voiced detection tasks for group {group}.")
+        queue = deque(('detection', speechTest) for speechTest in names)
+        pending = {}
+
+        # Tables of this run, combined in memory once every subtest is done:
+        features, rms = {}, {}
+
+        while queue or pending:
+            while queue and len(pending) < limit:
+                task = queue.popleft()
+                pending[submit(*task)] = task
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, speechTest = pending.pop(future)
                 try:
-                    result = future.result()  # Block until task completes
-                    
-                    # Handle different return types based on task type
-                    if speechTest.startswith('SR'):
-                        df_voiced, df_rms = result
-                        logger.info(f"Completed voiced detection for {speechTest}.")
-                        logger.info(f"  Voiced DataFrame: {df_voiced.shape if df_voiced is not None else 'No result'}")
-                        logger.info(f"  RMS DataFrame: {df_rms.shape if df_rms is not None else 'No RMS data'}")
-                    elif speechTest.startswith('PR'):
-                        df_voiced = result
-                        logger.info(f"Completed voiced detection for {speechTest}. Result: {df_voiced.shape if df_voiced is not None else 'No result'}")
-                    elif speechTest.startswith('SV'):
-                        df_voiced = result
-                        logger.info(f"Completed voiced detection for {speechTest}. Result: {df_voiced.shape if df_voiced is not None else 'No result'}")
+                    result = future.result()
                 except Exception as e:
-                    logger.error(f"Error during voiced detection for {speechTest}: {str(e)}")
+                    logger.error(f"Error during {stage} for {speechTest}: {str(e)}")
+                    continue
 
-            # After all voiced detection is complete, submit feature estimation tasks:
-            future_features = {
-                executor.submit(process_feature_estimation, dataPath, outputPath, group, speechTest): speechTest
-                for speechTest in names
-            }
-
-            # Log task submission for feature estimation:
-            logger.info(f"Tasks submitted for {len(future_features)} feature estimation tasks.")
-
-            # Wait for all feature estimation tasks to complete:
-            for future in as_completed(future_features):
-                speechTest = future_features[future]
-                try:
-                    result_features = future.result()  # Block until task completes:
-                    logger.info(f"Completed feature estimation for {speechTest}. Result: {result_features}")
-                except Exception as e:
-                    logger.error(f"Error during feature estimation for {speechTest}: {str(e)}")
+                if stage == 'detection':
+                    df_voiced = result[0] if speechTest.startswith('SR') else result
+                    if speechTest.startswith('SR'):
+                        rms[speechTest] = result[1]
+                    logger.info(f"Completed voiced detection for {speechTest}. Result: {df_voiced.shape}")
+
+                    # The subtest's chain continues with feature estimation (reads the .npz hand-off):
+                    queue.appendleft(('feature estimation', speechTest))
+                else:
+                    logger.info(f"Completed feature estimation for {speechTest}. Result: {result.shape}")
+                    features[speechTest] = result
         
         # Determine task type based on the input names (SR, PR, or SV):
         if names[0].startswith('SR'):
@@ -326,15 +785,21 @@ def process_speech_features(dataPath, outputPath, figPath, group, names):
             task_type = 'Unknown'
             logger.error(f"Unknown task type for {group}. Task names: {names}")
         
-        # Check if all files were processed and exist:
-        if check_processed_files(outputPath, group, names):
+        # Check that every subtest was processed in this run and that its outputs exist and are up to date:
+        failed = [speechTest for speechTest in names if speechTest not in features]
+        if failed:
+            logger.error(f"No features were produced in this run for {group}: {', '.join(failed)}.")
+        complete = not failed and check_processed_files(outputPath, group, names, dataPath)
+        if complete:
             # Combine and Save Features:
             logging.info(f"All files processed successfully for {group}. Combining and saving features.")
-            combine_and_save_features(outputPath, group, task_type)
+            combine_and_save_features(outputPath, group, task_type, features, rms)
             logging.info(f"Processing of {group} completed successfully!")
         else:
             logging.error(f"One or more required files were missing for {group}. Please check the logs for details.")
 
+        return complete
+
     except Exception as e:
         logger.error(f"Error in process_speech_features: {str(e)}", exc_info=True)
         raise
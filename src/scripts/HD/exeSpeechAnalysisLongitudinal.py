@@ -11,10 +11,32 @@
 # - Passage Reading (PR) Task
 # - Sustained Vowel (SV) Task
 # it processes the speech features for the HD Baseline and HD Follow-Up groups.
+#
+# Command line:
+#   python exeSpeechAnalysisLongitudinal.py                                  (built-in group_paths below - only where
+#                                                                              working_dir exists, otherwise an error)
+#   python exeSpeechAnalysisLongitudinal.py --manifest cohort.yaml [--workers N] [--log processing_log.txt]
+#   (tables are written as CSV; set NEURALLY_TABLE_FORMAT=parquet for typed Parquet tables - needs pyarrow)
+# Manifest (JSON, or YAML with PyYAML installed) - one group per session, relative paths are taken from the manifest's
+# folder:
+#   outputPath: Results/groupHDLongitudinal/Features       # combined Features_HDLongitudinal_<test> tables
+#   workers: 8                                              # optional global worker budget (default: cores and memory)
+#   logFile: Results/processing_log.txt                     # optional
+#   resultStore: Results/result_store.sqlite                # optional (default: <outputPath>/result_store.sqlite)
+#   groups:
+#     HDBaseline:
+#       root: Results/groupHDBaseline                       # <root>/Data/<test>, <root>/Features, <root>/Figures/<test>
+#       tests: [SV, SR, PR]
+#     HDFollowUp:
+#       SV: {dataPath: ..., outputPath: ..., figPath: ...}  # or explicit paths per test type
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Import Libraries %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 import logging
 import os
+import sys
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import matplotlib
 matplotlib.use('Agg')                                       # To make the plotting work in background
 import matplotlib.pyplot as plt
@@ -24,6 +46,7 @@
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Import Local Libraries %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 import audioProcessingHDLongitudinal
+import preProcessingAudioLongitudinal
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Logger Set-Up %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
@@ -41,11 +64,7 @@ def emit(self, record):
 for handler in logger.handlers[:]:
     logger.removeHandler(handler)
 
-# Set up logging to file and console:
-# File Handlers:
-file_handler = logging.FileHandler(r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\processing_log.txt")
-file_handler.setLevel(logging.INFO)
-
+# Set up logging to console (the log file is added by add_log_file once its location is known):
 # Console Handlers:
 console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.INFO)
@@ -53,12 +72,10 @@ def emit(self, record):
 # Define the log format:
 formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 
-# Apply formatter to both handlers:
-file_handler.setFormatter(formatter)
+# Apply formatter to the handler:
 console_handler.setFormatter(formatter)
 
-# Add handlers to the logger:
-logger.addHandler(file_handler)
+# Add handler to the logger:
 logger.addHandler(console_handler)
 
 # Set the overall logging level:
@@ -67,6 +84,17 @@ def emit(self, record):
 # Log message indicating the logging setup is complete:
 logger.info("Logging setup complete.")
 
+# Log file of the built-in group_paths run (a manifest run sets its own with --log or logFile):
+logPath = r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\processing_log.txt"
+
+# Add File Handler:
+def add_log_file(log_file):
+    os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setLevel(logging.INFO)
+    file_handler.setFormatter(formatter)
+    logger.addHandler(file_handler)
+
 # Check if running in an IPython environment and log it once:
 if get_ipython():
     logging.info("Running in IPython environment.")
@@ -77,25 +105,21 @@ def emit(self, record):
   
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Change Working Directory (with Error Handling) %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Only used by the built-in group_paths run (manifest paths are relative to the manifest instead):
 working_dir = r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis"
-try:
-    os.chdir(working_dir)
-    logger.info(f"Working directory changed successfully: {os.getcwd()}")
-except Exception as e:
-    logger.error(f"Error: {e}")
-
-# Clear previous figures
-plt.close('all')
+
+def change_working_dir():
+    try:
+        os.chdir(working_dir)
+        logger.info(f"Working directory changed successfully: {os.getcwd()}")
+    except Exception as e:
+        logger.error(f"Error: {e}")
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Define Paths & Create Output Directory %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 #outputPath = r"C:\Users\Student\OneDrive - University College Dublin\Engineering Year 5 Semester 1\!EEEN40220 - ME Biomed Project\Speech\Results\Speech Features\groupHDLongitudinal\Features"
 outputPath = r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDLongitudinal\Features"
 
-# Ensure output directory exists
-os.makedirs(outputPath, exist_ok=True)
-logger.info(f"Output directory: {outputPath}.")
-
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Define Paths %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 # Define group paths for SV, PR and SR Task:
 # group_paths = {
@@ -135,24 +159,8 @@ def emit(self, record):
 #     }
 # }
 
+# Combined files list the groups in this order (Baseline, then Follow-Up):
 group_paths = {
-    'HDFollowUp': {
-        'SV': {
-            'dataPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Data\SV",
-            'outputPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Features",
-            'figPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Figures\SV"
-        },    
-        'PR': {
-            'dataPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Data\PR",
-            'outputPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Features",
-            'figPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Figures\PR"
-        },
-        'SR': {
-            'dataPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Data\SR",
-            'outputPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Features",
-            'figPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Figures\SR"
-        }
-    },
     'HDBaseline': {
         'SV': {
             'dataPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDBaseline\Data\SV",
@@ -169,6 +177,23 @@ def emit(self, record):
             'outputPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDBaseline\Features",
             'figPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDBaseline\Figures\SR"
         }
+    },
+    'HDFollowUp': {
+        'SV': {
+            'dataPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Data\SV",
+            'outputPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Features",
+            'figPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Figures\SV"
+        },    
+        'PR': {
+            'dataPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Data\PR",
+            'outputPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Features",
+            'figPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Figures\PR"
+        },
+        'SR': {
+            'dataPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Data\SR",
+            'outputPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Features",
+            'figPath': r"C:\Users\Student\OneDrive - University College Dublin\Desktop\Speech Analysis\Results\Speech Features\groupHDFollowUp\Figures\SR"
+        }
     }
 }
 
@@ -178,9 +203,57 @@ def emit(self, record):
 nameSR = ['SR1', 'SR2', 'SR3', 'SR4', 'SR5']    # Syllable Repetition Task
 namePR = ['PR']                                 # Paragraph Reading Task
 
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Cohort Manifest %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+TEST_TYPES = ['SV', 'SR', 'PR']
+
+# Load Manifest: read a JSON or YAML cohort manifest (see Description) and expand it into the group_paths layout.
+# Returns (group_paths, combined outputPath, workers, logFile, resultStore); relative paths are resolved from the
+# manifest's folder.
+def load_manifest(manifest_file):
+    with open(manifest_file) as f:
+        if manifest_file.lower().endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("Reading a YAML manifest needs PyYAML (pip install pyyaml) - or use a JSON manifest.")
+            manifest = yaml.safe_load(f)
+        else:
+            manifest = json.load(f)
+
+    base = os.path.dirname(os.path.abspath(manifest_file))
+    def resolve(path):
+        return os.path.join(base, os.path.expanduser(path))
+
+    paths = {}
+    for group, entry in manifest['groups'].items():
+        paths[group] = {}
+        for test_type in entry.get('tests', [test for test in TEST_TYPES if test in entry]):
+            if test_type not in TEST_TYPES:
+                raise ValueError(f"Invalid test type {test_type} for {group}. Must be SV, SR, or PR.")
+
+            # Explicit paths for this test type, otherwise the standard layout under the group's root folder:
+            if test_type in entry:
+                test_paths = entry[test_type]
+            elif 'root' in entry:
+                test_paths = {
+                    'dataPath': os.path.join(entry['root'], 'Data', test_type),
+                    'outputPath': os.path.join(entry['root'], 'Features'),
+                    'figPath': os.path.join(entry['root'], 'Figures', test_type)
+                }
+            else:
+                raise ValueError(f"No paths for {group} {test_type}: give the group a root or dataPath/outputPath/figPath.")
+            paths[group][test_type] = {key: resolve(test_paths[key]) for key in ('dataPath', 'outputPath', 'figPath')}
+
+    log_file = resolve(manifest['logFile']) if manifest.get('logFile') else None
+    store = resolve(manifest['resultStore']) if manifest.get('resultStore') else None
+    return paths, resolve(manifest['outputPath']), manifest.get('workers'), log_file, store
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Process Groups %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 # Process Speech Features for each Group (HDBaseline or HDFollowUp) and Test Type (SV, PR or SR):
-def process_group(group, test_type, paths):
+# n_workers is the size of the shared worker pool - the same for every pair, so the pool is never replaced mid-run.
+# store: result store path - recordings analysed by an earlier run are not analysed again.
+# Returns True when all of the pair's outputs were written.
+def process_group(group, test_type, paths, n_workers=None, store=None):
     logger.info(f"Started processing {group} group for {test_type}...")
     try:
         # Dynamically choose the name list based on test type:
@@ -192,68 +265,109 @@ def process_group(group, test_type, paths):
             name_list = nameSV
         
         # Process the speech features using the audioProcessingHDLongitudinal module:
-        audioProcessingHDLongitudinal.process_speech_features(
-            paths['dataPath'], paths['outputPath'], paths['figPath'], group, name_list
+        os.makedirs(paths['figPath'], exist_ok=True)
+        complete = audioProcessingHDLongitudinal.process_speech_features(
+            paths['dataPath'], paths['outputPath'], paths['figPath'], group, name_list, n_workers=n_workers, store=store
         )
         logger.info(f"Completed processing {group} group for {test_type}.")
+        return complete
     except Exception as e:
         logger.error(f"Error processing {group} group for {test_type}: {e}")
     
-    return None
+    return False
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Process Features %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-def process_features(group_paths):
-    # Process each group and test type, one by one (HDBaseline and HDFollowUp for SV, PR & SR):
-    for group, test_types in group_paths.items():
-        for test_type, paths in test_types.items():
-            process_group(group, test_type, paths)
+# Returns the (group, test type) pairs that failed. The result store (NEURALLY_RESULT_STORE, otherwise store or
+# <outputPath>/result_store.sqlite) keeps every recording's results for later re-analyses.
+def process_features(group_paths, outputPath=outputPath, n_workers=None, store=None):
+    # Ensure output directory exists
+    os.makedirs(outputPath, exist_ok=True)
+    logger.info(f"Output directory: {outputPath}.")
+
+    # Process all groups and test types concurrently (HDBaseline and HDFollowUp for SV, PR & SR). The pair threads only
+    # schedule work - voiced detection and feature estimation run on the shared worker pool, so n_workers is the global
+    # budget for the whole cohort (default: CPU cores, limited by the memory needed for the largest recording):
+    pairs = [(group, test_type, paths) for group, test_types in group_paths.items() for test_type, paths in test_types.items()]
+    if n_workers is None:
+        filePaths = [os.path.join(paths['dataPath'], f) for _, _, paths in pairs if os.path.isdir(paths['dataPath'])
+                     for f in os.listdir(paths['dataPath']) if f.endswith('.wav')]
+        n_workers = audioProcessingHDLongitudinal.default_workers(filePaths)
+    audioProcessingHDLongitudinal.get_file_pool(n_workers)
+    store = audioProcessingHDLongitudinal.result_store_path(store or os.path.join(outputPath, 'result_store.sqlite'))
+    logger.info(f"Processing {len(pairs)} group/test pairs with {n_workers} workers (result store: {store}).")
+
+    with ThreadPoolExecutor(max_workers=max(1, len(pairs))) as executor:
+        futures = {executor.submit(process_group, group, test_type, paths, n_workers, store): (group, test_type)
+                   for group, test_type, paths in pairs}
+        failed = [futures[future] for future in as_completed(futures) if not future.result()]
     
-    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Load Processed Features for Analysis %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-    # Load and combine features for each test type:
-    for test_type in ['SV', 'SR', 'PR']:
-        # Load Baseline Features:
-        HDBaselinePath = group_paths['HDBaseline'][test_type]['outputPath']
-        try:
-            dfHD_Baseline = pd.read_csv(os.path.join(HDBaselinePath, f"features_HDBaseline_{test_type}.csv"))
-            dfHD_Baseline.insert(4, 'Group', 'HDBaseline')    # Add Group column to identify as Baseline
-            logger.info(f"Successfully loaded HDBaseline {test_type} features.")
-        except Exception as e:
-            logger.error(f"Error loading HDBaseline {test_type} features: {e}")
-            dfHD_Baseline = None                              # Set to None to prevent further errors
-
-        # Load Follow-Up Features:
-        HDFollowUpPath = group_paths['HDFollowUp'][test_type]['outputPath']
-        try:
-            dfHD_Followup = pd.read_csv(os.path.join(HDFollowUpPath, f"features_HDFollowUp_{test_type}.csv"))
-            dfHD_Followup.insert(4, 'Group', 'HDFollowUp')   # Add Group column to identify as FollowUp
-            logger.info(f"Successfully loaded HDFollowUp {test_type} features.")
-        except Exception as e:
-            logger.error(f"Error loading HDFollowUp {test_type} features: {e}")
-            dfHD_Followup = None                               # Set to None to prevent further errors
+    # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Load Processed Features for Analysis %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+    # Load and combine features for each test type - every group's table in one columnar read (in group order):
+    for test_type in TEST_TYPES:
+        groups = [group for group, test_types in group_paths.items() if test_type in test_types]
+        files = [preProcessingAudioLongitudinal.table_file(group_paths[group][test_type]['outputPath'],
+                                                           f"features_{group}_{test_type}") for group in groups]
+        missing = [group for group, file in zip(groups, files) if not os.path.exists(file)]
+        for group in missing:
+            logger.error(f"Error loading {group} {test_type} features: no features table in {group_paths[group][test_type]['outputPath']}.")
 
         # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Join Baseline & FollowUp %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
-        # Only attempt to concatenate if both dataframes are loaded correctly:
-        if dfHD_Baseline is not None and dfHD_Followup is not None:
+        # Only attempt to combine if every group's features are available:
+        if groups and not missing:
             try:
-                df = pd.concat([dfHD_Baseline, dfHD_Followup], ignore_index=True)
+                df = preProcessingAudioLongitudinal.read_tables(files, keys=groups, name='Group')
+                df.insert(4, 'Group', df.pop('Group'))              # Add Group column to identify the session
+                logger.info(f"Successfully loaded {test_type} features of {', '.join(groups)}.")
                 
                 # Clean up the DataFrame
                 df = df.loc[:, ~df.columns.str.contains('^Unnamed')].dropna(axis=1, how='all')
                 df = df[df.columns.drop(list(df.filter(regex='pythonVersion')))]
                 
-                # Save the DataFrame to .csv File & Update the File Path:
-                df.to_csv(os.path.join(outputPath, f'Features_HDLongitudinal_{test_type}.csv'), index=False)
+                # Save the combined table:
+                preProcessingAudioLongitudinal.write_table(df, outputPath, f'Features_HDLongitudinal_{test_type}', index=False)
                 logger.info(f"Successfully saved the combined {test_type} features.")
             except Exception as e:
                 logger.error(f"Error processing {test_type} features: {e}")
 
+    return failed
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% Main Function %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+def main():
+    parser = argparse.ArgumentParser(description="Longitudinal speech analysis (SV, SR, PR) for every group of a cohort.")
+    parser.add_argument('--manifest', help="JSON or YAML cohort manifest (default: the built-in group_paths)")
+    parser.add_argument('--workers', type=int, help="global worker budget (default: manifest workers, else cores/memory)")
+    parser.add_argument('--log', help="log file (default: manifest logFile)")
+    args = parser.parse_args()
+
+    if args.manifest:
+        paths, combinedPath, n_workers, log_file, store = load_manifest(args.manifest)
+    else:
+        # The built-in group_paths point at the original analysis machine - stop here instead of failing every group:
+        if not os.path.isdir(working_dir):
+            parser.error(f"the built-in group_paths folder does not exist ({working_dir}); "
+                         "pass --manifest with a JSON or YAML cohort manifest (see the top of this script).")
+        change_working_dir()
+        paths, combinedPath, n_workers, log_file, store = group_paths, outputPath, None, logPath, None
+
+    log_file = args.log or log_file
+    if log_file:
+        add_log_file(log_file)
+
+    # Clear previous figures
+    plt.close('all')
+
+    return process_features(paths, combinedPath, args.workers or n_workers, store)
+
 # Ensure multiprocessing is handled: 
 if __name__ == '__main__':
+    failed = None
     try:
         # Process features for all groups and test types:
-        process_features(group_paths)
-        logger.info("Processing completed successfully.")
+        failed = main()
+        if failed:
+            logger.error(f"Processing finished with errors for: {', '.join(f'{g} {t}' for g, t in failed)}.")
+        else:
+            logger.info("Processing completed successfully.")
     except Exception as e:
         logger.error(f"Error during processing: {e}", exc_info = True)
     finally:
@@ -262,4 +376,5 @@ def process_features(group_paths):
         for handler in logger.handlers[:]:
             handler.close()
             logger.removeHandler(handler)
+    sys.exit(0 if failed == [] else 1)
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
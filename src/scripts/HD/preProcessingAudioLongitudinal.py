@@ -11,14 +11,21 @@
 matplotlib.use('Agg')                                       # To make the plotting work in background
 import matplotlib.pyplot as plt                             # Plot & Visualisation
 from concurrent.futures import ProcessPoolExecutor          # Parallel Processing
+import multiprocessing                                      # Worker Pool Start Method
 from pathlib import Path                                    # Path Management
 import logging                                              # Logging
-from skimage.filters import threshold_otsu                  # Otsu Thresholding
 import pandas as pd                                         # DataFrame Management
 import atexit                                               # Logger Cleanup on Exit
 from multiprocessing import Queue                           # Queue for Logging Process
 from logging.handlers import QueueHandler, QueueListener    # Queue Handlers for Logging
 import re            
+import threading                                            # Worker Pool Creation Lock
+import hashlib                                              # Content Hashing for the Pre-Processing Cache
+from collections import OrderedDict                         # LRU Ordering for the Pre-Processing Cache
+from functools import lru_cache                              # Cached Resampling Filters
+import math                                                 # Rate Ratios for Polyphase Resampling
+from concurrent.futures import ThreadPoolExecutor          # Background Plot Rendering
+from matplotlib.figure import Figure                        # Thread-Safe Figures for Fast Plots
 
 
 
@@ -91,22 +98,77 @@ def stop(self):
             pass
     listener = DummyListener()
 
+    # Nothing drains the queue without a listener - once its pipe is full the process would block at exit:
+    logger.removeHandler(queue_handler)
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% CLASS: OPEN AUDIO FILES %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Full-scale value per integer sample format - scipy returns integer PCM (8, 16, 24, 32 and 64-bit) left-justified in the
+# smallest numpy type that holds it, so e.g. 24-bit audio arrives as int32 and is scaled like 32-bit. 8-bit is unsigned.
+PCM_FULL_SCALE = {np.dtype(np.uint8): 128.0, np.dtype(np.int16): 32768.0, np.dtype(np.int32): 2.0 ** 31,
+                  np.dtype(np.int64): 2.0 ** 63}
+
+# Multichannel files: 'mean' downmixes all channels, an integer selects one channel (NEURALLY_WAV_CHANNEL).
+WAV_CHANNEL = os.environ.get("NEURALLY_WAV_CHANNEL", "mean")
+
+# PCM TO FLOAT32: scale any integer or float sample format to float32 in [-1, 1] and reduce multichannel data to one
+# channel. Each selected channel is read straight from the (memory-mapped) samples into the output array.
+def pcmToFloat32(raw, channel):
+    if raw.ndim == 2:
+        if str(channel) == 'mean':
+            channels = [raw[:, c] for c in range(raw.shape[1])]
+        else:
+            channels = [raw[:, int(channel)]]
+    else:
+        channels = [raw]
+
+    scale = PCM_FULL_SCALE.get(raw.dtype, 1.0)                      # Float formats are already full-scale 1.
+    data = np.empty(len(channels[0]), dtype=np.float32)
+
+    if len(channels) == 1 and raw.dtype != np.uint8:
+        np.divide(channels[0], np.float32(scale), out=data, casting='unsafe')
+        return data
+
+    # Sum the channels, remove the unsigned 8-bit offset and scale by the full scale times the channel count:
+    np.copyto(data, channels[0], casting='unsafe')
+    for samples in channels[1:]:
+        np.add(data, samples, out=data, casting='unsafe')
+    if raw.dtype == np.uint8:
+        data -= np.float32(128 * len(channels))
+    data /= np.float32(scale * len(channels))
+    return data
+
 class open_wav:
 
     # INITIALISE:
-    def __init__(self, dataPath, speechTest):
+    # filePaths/filenames: optional explicit list of .wav files (and names to report them under) - when given, the files
+    # are read in place and dataPath is not scanned.
+    # channel: 'mean' (downmix) or a channel index for multichannel files.
+    def __init__(self, dataPath, speechTest, filePaths=None, filenames=None, channel=None):
         self.dataPath, self.speechTest = dataPath, speechTest
+        self.filePaths, self.filenames = filePaths, filenames
+        self.channel = WAV_CHANNEL if channel is None else channel
+
+    # TO FLOAT32: one mono float32 channel in [-1, 1] (see pcmToFloat32).
+    def toFloat32(self, raw):
+        return pcmToFloat32(raw, self.channel)
 
     # LOAD FILE: Helper function to load a single .wav file using scipy
-    def load_file(self, file_path):
-        filename = file_path.stem
+    def load_file(self, file_path, filename=None):
+        filename = filename or file_path.stem
         try:
-            # Use scipy to load the .wav file
-            fs, data = wavfile.read(file_path)
-            
-            # Convert data to float32 required for librosa:
-            data = data.astype(np.float32) / 32768.0  # Normalise to range [-1, 1]
+            # Use scipy to load the .wav file - memory-mapped, so the integer samples are never copied into memory:
+            try:
+                fs, raw = wavfile.read(file_path, mmap=True)
+            except ValueError:
+                fs, raw = wavfile.read(file_path)                        # Formats scipy cannot memory-map.
+
+            # Convert data to float32 required for librosa, normalised to range [-1, 1] (one mono channel) - recordings
+            # longer than one pre-processing block stay on disk and are converted a block at a time (wavSamples):
+            if isinstance(raw, np.memmap) and raw.filename and 0 < BLOCK_SECONDS * fs < len(raw):
+                data = wavSamples(raw, self.channel)
+            else:
+                data = self.toFloat32(raw)
+            del raw
 
         except Exception as e:
             logger.error(f"Error loading {filename} from {file_path}: {e}")
@@ -115,6 +177,14 @@ def load_file(self, file_path):
 
     # OPEN FILES: Open & load .wav files for a specific speech test (SR, SV, or PR task)
     def openFiles(self):
+        # Explicit file list - load each file where it is, in the given order:
+        if self.filePaths is not None:
+            file_paths = [Path(file) for file in self.filePaths]
+            names = self.filenames if self.filenames is not None else [None] * len(file_paths)
+            logger.info(f"Loading {len(file_paths)} files for {self.speechTest} task.")
+            filenames, files = zip(*[self.load_file(file, name) for file, name in zip(file_paths, names)])
+            return filenames, files
+
         # Get all .wav files in directory, filtered by speech test task (SR, SV, PR):
         onlyfiles = [f for f in os.listdir(self.dataPath) if f.endswith(".wav")]
         filtered_files = [file for file in onlyfiles if self.speechTest in file]
@@ -129,55 +199,299 @@ def openFiles(self):
         filenames, files = zip(*[self.load_file(Path(self.dataPath) / file) for file in filtered_files])
 
         return filenames, files
+
+# WAV SAMPLES: a long recording left on disk. Slicing reads just those samples from the file and converts them like
+# open_wav.toFloat32 (mono float32), so block-wise pre-processing never holds the whole recording in memory. Plain file
+# reads instead of the memory map: mapped pages stay resident once touched and would grow with the recording length.
+class wavSamples:
+
+    # INITIALISE: from the memory-mapped samples scipy returns (only their file, offset, type and shape are kept).
+    def __init__(self, raw, channel):
+        self.path, self.offset = raw.filename, raw.offset
+        self.rawDtype, self.shape = raw.dtype, raw.shape
+        self.channel = channel
+        self.dtype = np.dtype(np.float32)
+        self.hash = None
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return f"wavSamples({Path(self.path).name}, {len(self)} samples)"
+
+    # READ: raw samples [start, stop), frames x channels as stored in the file.
+    def read(self, start, stop):
+        frame = int(np.prod(self.shape[1:], dtype=np.int64))                   # Samples per Frame
+        raw = np.empty((max(stop - start, 0) * frame,), dtype=self.rawDtype)
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset + start * frame * self.rawDtype.itemsize)
+            f.readinto(memoryview(raw).cast('B'))
+        return raw.reshape((-1,) + self.shape[1:])
+
+    # SLICE: converted float32 samples (contiguous slices only).
+    def __getitem__(self, index):
+        start, stop, step = index.indices(len(self))
+        if step != 1:
+            raise IndexError("wavSamples only supports contiguous slices.")
+        return pcmToFloat32(self.read(start, stop), self.channel)
+
+    # ARRAY: the whole recording in memory (whole-signal pre-processing, e.g. for a resampler that cannot run in blocks).
+    def __array__(self, dtype=None, copy=None):
+        data = self[0:len(self)]
+        return data if dtype is None else data.astype(dtype, copy=False)
+
+    # DIGEST: hash of the raw samples and the channel selection, streamed from the file once.
+    def digest(self, block=2 ** 22):
+        if self.hash is None:
+            h = hashlib.blake2b(digest_size=20)
+            h.update(repr((self.rawDtype.str, self.shape, str(self.channel))).encode())
+            for start in range(0, len(self), block):
+                h.update(memoryview(self.read(start, min(start + block, len(self)))).cast('B'))
+            self.hash = h.digest()
+        return self.hash
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% CLASS: PRE-PROCESS AUDIO FROM SPEECH TEST %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# NaN-Mean without a full-length copy: np.nanmean copies its input to zero the NaNs; when the sum is finite there are
+# none, and np.mean gives the identical result without allocating.
+def nanmean_lowmem(data):
+    if np.isfinite(np.sum(data)):
+        return np.mean(data)
+    return np.nanmean(data)
+
+# NaN-Sum and count of the non-NaN samples of one block (float64 sum), to accumulate a mean a block at a time.
+def nansum_count(data):
+    if not np.isfinite(np.sum(data)):
+        data = data[~np.isnan(data)]
+    return float(np.sum(data, dtype=np.float64)), len(data)
+
+# Streaming NaN-Mean of data[start:stop], read a block at a time - for a recording that is not in memory (wavSamples).
+def nanmean_stream(data, start, stop, block=2 ** 20):
+    total, count = 0.0, 0
+    for i in range(start, stop, block):
+        blockSum, blockCount = nansum_count(data[i:min(i + block, stop)])
+        total, count = total + blockSum, count + blockCount
+    return data.dtype.type(total / count if count else np.nan)
+
+# NPY FILE: a 1-D .npy file written and read back a slice at a time with plain file I/O - like wavSamples, so the
+# block-wise output of a long recording does not become resident memory the way a memory map's pages would.
+class npyFile:
+
+    # INITIALISE: create a zero-filled file of length samples.
+    def __init__(self, path, length, dtype):
+        self.path, self.dtype, self.shape = Path(path), np.dtype(dtype), (length,)
+        self.file = open(self.path, 'w+b')
+        header = {'descr': np.lib.format.dtype_to_descr(self.dtype), 'fortran_order': False, 'shape': self.shape}
+        np.lib.format.write_array_header_1_0(self.file, header)
+        self.offset = self.file.tell()
+        self.file.truncate(self.offset + length * self.dtype.itemsize)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        start, stop, _ = index.indices(len(self))
+        data = np.empty(max(stop - start, 0), dtype=self.dtype)
+        self.file.seek(self.offset + start * self.dtype.itemsize)
+        self.file.readinto(memoryview(data).cast('B'))
+        return data
+
+    def __setitem__(self, index, values):
+        start, _, _ = index.indices(len(self))
+        self.file.seek(self.offset + start * self.dtype.itemsize)
+        self.file.write(memoryview(np.ascontiguousarray(values, dtype=self.dtype)).cast('B'))
+
+    def close(self):
+        self.file.close()
+
+# Resampling quality (NEURALLY_RESAMPLE): 'kaiser_best' (librosa, reference results), 'soxr_hq' (librosa via soxr) or
+# 'polyphase' (scipy.signal.resample_poly with the anti-aliasing filter designed once per rate pair).
+RESAMPLE_TYPE = os.environ.get("NEURALLY_RESAMPLE", "kaiser_best")
+
+# Block-wise pre-processing (NEURALLY_BLOCK_SECONDS): recordings longer than one block are DC-corrected, resampled,
+# cropped and padded one block at a time, straight into the output array (0 disables it). Only resamplers with a short,
+# fixed filter can run in blocks; each block gets BLOCK_MARGIN seconds of context either side, far longer than any of
+# those filters.
+BLOCK_SECONDS = float(os.environ.get("NEURALLY_BLOCK_SECONDS", 60))
+BLOCK_RESAMPLERS = ('polyphase', 'kaiser_best', 'kaiser_fast', 'soxr_vhq', 'soxr_hq', 'soxr_mq', 'soxr_lq', 'soxr_qq')
+BLOCK_MARGIN = 0.1
+
+# Polyphase Filter: scipy's default resample_poly design (Kaiser-windowed sinc, beta=5), cached per (up, down) pair.
+@lru_cache(maxsize=None)
+def polyphaseFilter(up, down):
+    max_rate = max(up, down)
+    h = signal.firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=('kaiser', 5.0))
+    h.flags.writeable = False
+    return h
+
+# Filter Design Cache: Butterworth filters as second-order sections, designed once per (order, band, type, fs) and shared
+# by every stage - apply with signal.sosfiltfilt and never modify the returned array (sosfilt needs it writeable).
+@lru_cache(maxsize=None)
+def butterSOS(order, band, btype, fs):
+    return signal.butter(order, band, btype=btype, fs=fs, output='sos')
+
 class preProcess_Audio:
 
     # INITIALISE:
-    def __init__(self, data_list, order=4, fc_low=10, fc_high=5000, new_fs=44100, crop_len=0.5, pad_len=2):
+    def __init__(self, data_list, order=4, fc_low=10, fc_high=5000, new_fs=44100, crop_len=0.5, pad_len=2,
+                 res_type=None):
         data = data_list[0]                                                             # Audio Data
         self.fs = int(data_list[1])                                                     # Original Sampling Frequency
-        self.data = data - np.nanmean(data[round(self.fs):round(len(data) - self.fs)])  # Remove DC Offset
+        self.input, self._data = data, None                                             # Input Data (Not Copied)
+        if isinstance(data, wavSamples):
+            self.dcOffset = nanmean_stream(data, round(self.fs), round(len(data) - self.fs))  # DC Offset (From Disk)
+        else:
+            self.dcOffset = nanmean_lowmem(data[round(self.fs):round(len(data) - self.fs)])  # DC Offset
         self.order, self.fc_low, self.fc_high = order, fc_low, fc_high                  # Filter Parameters
         self.new_fs = new_fs                                                            # Target Sample Rate
         self.crop_len, self.pad_len = crop_len, pad_len                                 # Length for Cropping & Padding
+        self.res_type = res_type or RESAMPLE_TYPE                                       # Resampling Quality
+
+    # DATA: The DC-corrected input, built on first use - the block-wise path never makes this full-length copy.
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = np.asarray(self.input) - self.dcOffset                         # Remove DC Offset
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
 
     # BAND-PASS FILTER: Apply Butterworth bandpass filter.
     def bandpassFilter(self):
-        low_lim = self.fc_low / (self.fs / 2)                                           # Normalise Low Cutoff Frequency
-        high_lim = self.fc_high / (self.fs / 2)                                         # Normalise High Cutoff Frequency
-        b, a = signal.butter(self.order, [low_lim, high_lim], btype='band')             # Filter Design
-        self.dataFiltered = signal.filtfilt(b, a, self.data)                            # Apply Filter
+        sos = butterSOS(self.order, (self.fc_low, self.fc_high), 'band', self.fs)       # Filter Design (Cached)
+        self.dataFiltered = signal.sosfiltfilt(sos, self.data)                          # Apply Filter
         return self.dataFiltered, self.fs
 
-    # RESAMPLE AUDIO: Resample audio to a new sample rate.
-    def resampleAudio(self):
-        resampData = librosa.resample(
-            self.data,
+    # RATE RATIO: (up, down) integer factors from the current to the target sample rate.
+    def rateRatio(self):
+        ratio = math.gcd(int(self.new_fs), int(self.fs))
+        return int(self.new_fs) // ratio, int(self.fs) // ratio
+
+    # RESAMPLED LENGTH: Number of samples resample() returns for n input samples.
+    def resampledLength(self, n):
+        if self.fs == self.new_fs:
+            return n
+        if self.res_type == 'polyphase':
+            up, down = self.rateRatio()
+            return -(-n * up // down)
+        return int(np.ceil(n * (float(self.new_fs) / self.fs)))                        # librosa.resample Length
+
+    # RESAMPLE: Resample a signal (or block) from the current to the target sample rate.
+    def resample(self, data):
+        if self.fs == self.new_fs:
+            return data                                                                 # Already at the Target Rate
+        if self.res_type == 'polyphase':
+            up, down = self.rateRatio()
+            resampData = signal.resample_poly(data, up, down, window=polyphaseFilter(up, down))
+            return resampData.astype(data.dtype, copy=False)
+        return librosa.resample(
+            data,
             orig_sr=self.fs,
             target_sr=self.new_fs,
-            res_type='kaiser_best'                                                      # Kaiser Resampling Method
+            res_type=self.res_type                                                      # Kaiser / soxr Resampling Method
         )
+
+    # RESAMPLE AUDIO: Resample audio to a new sample rate.
+    def resampleAudio(self):
+        resampData = self.resample(self.data)
         self.fs = self.new_fs                                                           # Update Sample Rate
-        self.dataFiltered = resampData.copy()                                           # Store Resampled Data
+        self.dataFiltered = resampData                                                  # Store Resampled Data
         return self.dataFiltered, self.fs
 
     # CROP AND PAD: Crop and pad the audio data.
+    # The DC offset is removed from the cropped samples straight into the zero-padded output, which is then normalised
+    # in place (one full-length allocation).
     def crop_and_pad(self):
-        deMeanData = self.dataFiltered - np.nanmean(self.dataFiltered[round(self.fs):round(len(self.dataFiltered) - self.fs)])      # Remove DC Offset
-        dataCrop = deMeanData[int(self.crop_len * self.fs):len(deMeanData) - int(self.crop_len * self.fs)]                          # Crop Data
-        self.dataProcessed_resamp = np.pad(dataCrop, (int(self.pad_len * self.fs), int(self.pad_len * self.fs)), mode='constant')   # Pad Data
-        self.dataProcessed_resamp = self.dataProcessed_resamp / np.max(self.dataProcessed_resamp)                                   # Normalise Data
+        dcOffset = nanmean_lowmem(self.dataFiltered[round(self.fs):round(len(self.dataFiltered) - self.fs)])                       # DC Offset
+        crop, pad = int(self.crop_len * self.fs), int(self.pad_len * self.fs)                                                        # Crop & Pad Lengths
+        dataCrop = self.dataFiltered[crop:len(self.dataFiltered) - crop]                                                             # Crop Data
+        self.dataProcessed_resamp = np.zeros(len(dataCrop) + 2 * pad, dtype=np.result_type(self.dataFiltered, dcOffset))          # Pad Data
+        np.subtract(dataCrop, dcOffset, out=self.dataProcessed_resamp[pad:pad + len(dataCrop)])                                     # Remove DC Offset
+        self.dataProcessed_resamp /= np.max(self.dataProcessed_resamp)                                                              # Normalise Data
         return self.dataProcessed_resamp, self.fs
 
     # COMBINE: Band-pass filter, resample, and crop/pad in one step.
-    def preProcess_resample(self):
-        self.bandpassFilter()                       # Apply Bandpass Filter
+    # NOTE: resampleAudio works from self.data (not the band-passed signal), so the band-pass output was never used
+    # here; it is no longer computed - a full-length float64 filtfilt that dominated peak memory on long recordings.
+    # Recordings longer than one block go through preProcess_resample_blocks, which writes into allocate(length, dtype).
+    def preProcess_resample(self, allocate=np.zeros):
+        if self.blockLength() is not None:
+            return self.preProcess_resample_blocks(allocate)
         self.resampleAudio()                        # Resample to New Sample Rate
         self.crop_and_pad()                         # Crop and Pad Data
         return self.dataProcessed_resamp, self.fs
 
+    # BLOCK LENGTH: Input samples per block, or None when the recording must be processed whole - it fits in one block,
+    # the resampler is not block-safe, or the crop reaches past the DC offset window.
+    def blockLength(self):
+        if BLOCK_SECONDS <= 0 or len(self.input) <= BLOCK_SECONDS * self.fs:
+            return None
+        if self.fs != self.new_fs and self.res_type not in BLOCK_RESAMPLERS:
+            return None
+        if int(self.crop_len * self.new_fs) > round(self.new_fs):
+            return None
+        down = self.rateRatio()[1]
+        return max(down, int(BLOCK_SECONDS * self.fs) // down * down)
+
+    # COMBINE BLOCK-WISE: preProcess_resample one block at a time. Blocks start on whole resampling periods, so the
+    # samples kept from each block line up with the whole-signal result; they are written straight into their cropped,
+    # zero-padded place in the output while the second DC offset window is summed and the maximum tracked. A second
+    # pass then removes the DC offset and normalises (the maximum after removing a constant is the maximum minus it).
+    # Working memory is one block: the input can be a wavSamples recording on disk, and allocate(length, dtype) can put
+    # the output on disk too (an npyFile, as the pre-processing cache does when it has a cache directory).
+    # NOTE: voiced detection and feature extraction still run on the whole processed signal, so their memory grows with
+    # the recording length.
+    def preProcess_resample_blocks(self, allocate=np.zeros):
+        block, (up, down) = self.blockLength(), self.rateRatio()
+        margin = -(-int(BLOCK_MARGIN * self.fs) // down) * down                        # Context, Whole Periods
+        nIn, nOut = len(self.input), self.resampledLength(len(self.input))
+        crop, pad = int(self.crop_len * self.new_fs), int(self.pad_len * self.new_fs)   # Crop & Pad Lengths
+        nCrop = max(nOut - 2 * crop, 0)
+        out = allocate(nCrop + 2 * pad, np.result_type(self.input.dtype, self.dcOffset))
+        dcStart, dcStop = round(self.new_fs) - crop, nOut - round(self.new_fs) - crop  # DC Window (Cropped Samples)
+        dcTotal, dcCount, peak = 0.0, 0, None
+
+        for start in range(0, nIn, block):
+            stop = min(start + block, nIn)
+            lo, hi = max(start - margin, 0), min(stop + margin, nIn)
+            resampData = self.resample(np.subtract(self.input[lo:hi], self.dcOffset))  # Remove DC Offset & Resample
+
+            # Resampled samples this block owns, limited to the cropped signal:
+            first = max(start * up // down, crop)
+            last = min(nOut if stop == nIn else stop * up // down, nOut - crop)
+            if first < last:
+                offset = lo * up // down
+                dataCrop = resampData[first - offset:last - offset]
+                out[pad + first - crop:pad + last - crop] = dataCrop
+
+                windowStart, windowStop = max(dcStart, first - crop), min(dcStop, last - crop)
+                if windowStart < windowStop:
+                    blockSum, blockCount = nansum_count(dataCrop[windowStart - first + crop:windowStop - first + crop])
+                    dcTotal, dcCount = dcTotal + blockSum, dcCount + blockCount
+                peak = np.max(dataCrop) if peak is None else np.maximum(peak, np.max(dataCrop))
+
+        # DC offset over the same window as crop_and_pad, then the maximum of the zero-padded, DC-corrected output:
+        dcOffset = out.dtype.type(dcTotal / dcCount if dcCount else np.nan)
+        peak = out.dtype.type(0) if peak is None else peak - dcOffset
+        if pad > 0:
+            peak = np.maximum(peak, out.dtype.type(0))
+
+        # Remove the DC offset from the signal and normalise, a block at a time:
+        for start in range(0, len(out), block):
+            stop = min(start + block, len(out))
+            data = out[start:stop]
+            bodyStart, bodyStop = max(pad, start) - start, min(pad + nCrop, stop) - start
+            if bodyStart < bodyStop:
+                np.subtract(data[bodyStart:bodyStop], dcOffset, out=data[bodyStart:bodyStop])
+            data /= peak
+            out[start:stop] = data
+
+        self.fs = self.new_fs                                                           # Update Sample Rate
+        self.dataProcessed_resamp = out
+        return self.dataProcessed_resamp, self.fs
+
     # COMBINE WITHOUT RESAMPLING: Only bandpass filter and crop/pad in one step - exclude resample.
     def preProcess_no_resample(self):
         self.bandpassFilter()                       # Apply Bandpass Filter
@@ -193,12 +507,88 @@ def process_single_file(self, data_list):
         self.resampleAudio()                                                          # Resample Audio
         self.crop_and_pad()                                                           # Crop and Pad Audio
         return self.dataProcessed_resamp, self.fs
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% CLASS: PRE-PROCESSING CACHE %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Voiced detection and feature extraction both need the same filtered, resampled and normalised signal. The cache keys
+# each result on a hash of the raw audio content plus every pre-processing parameter, keeps recent results in memory
+# (LRU, bounded by size) and can optionally persist them as .npy files so separate worker processes can share them.
+class preProcessCache:
 
-    # PROCESS ALL FILES: Apply the processing pipeline to all files in parallel
-    def process_all_files(self, data_list):
-        with ProcessPoolExecutor() as executor:                                        # Parallel Processing
-            results = list(executor.map(self.process_single_file, data_list))          # Process each file in parallel
-        return results
+    # INITIALISE:
+    def __init__(self, max_mb=512, cache_dir=None):
+        self.max_bytes = int(max_mb * 1024 * 1024)                                  # In-Memory Size Limit
+        self.cache_dir = Path(cache_dir) if cache_dir else None                     # Optional On-Disk Tier
+        self.items = OrderedDict()                                                  # Key -> (Data, fs)
+        self.n_bytes = 0
+        self.hits, self.misses = 0, 0
+
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # CACHE KEY: Hash the raw samples (without copying) together with the sample rate and pre-processing parameters.
+    def cacheKey(self, data_list, params):
+        data, fs = data_list
+        h = hashlib.blake2b(digest_size=20)
+        if isinstance(data, wavSamples):
+            h.update(data.digest())                                                 # Streamed from Disk
+        else:
+            data = np.ascontiguousarray(data)
+            h.update(memoryview(data).cast('B'))
+        h.update(repr((data.dtype.str, data.shape, int(fs), sorted(params.items()))).encode())
+        return h.hexdigest()
+
+    # STORE: Add a result to memory and evict the least recently used results beyond the size limit.
+    def store(self, key, result):
+        self.items[key] = result
+        self.n_bytes += result[0].nbytes
+        while self.n_bytes > self.max_bytes and len(self.items) > 1:
+            _, (old_data, _) = self.items.popitem(last=False)
+            self.n_bytes -= old_data.nbytes
+
+    # GET: Return the pre-processed (data, fs) for one file, computing it only on a cache miss.
+    def preProcess_resample(self, data_list, **params):
+        params.setdefault('res_type', RESAMPLE_TYPE)                                # Results differ per resampling tier
+        key = self.cacheKey(data_list, params)
+
+        # Memory Tier:
+        if key in self.items:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return self.items[key]
+
+        # Disk Tier:
+        npy_file = self.cache_dir / f"{key}.npy" if self.cache_dir is not None else None
+        if npy_file is not None and npy_file.exists():
+            data = np.load(npy_file, mmap_mode='r')
+            fs = params.get('new_fs', 44100)                                        # preProcess_resample always ends at new_fs
+            self.hits += 1
+            self.store(key, (data, fs))
+            return data, fs
+
+        # Miss - Pre-Process & Store (long recordings are written block by block straight into the .npy file):
+        self.misses += 1
+        tmp_file = npy_file.with_name(f"{key}.{os.getpid()}.tmp.npy") if npy_file is not None else None
+        allocate = np.zeros if tmp_file is None else (lambda length, dtype: npyFile(tmp_file, length, dtype))
+        data, fs = preProcess_Audio(data_list, **params).preProcess_resample(allocate)
+
+        if isinstance(data, npyFile):
+            data.close()                                                            # Close before renaming
+            os.replace(tmp_file, npy_file)                                          # Atomic for concurrent workers
+            data = np.load(npy_file, mmap_mode='r')
+        elif npy_file is not None:
+            np.save(tmp_file, data)
+            os.replace(tmp_file, npy_file)                                          # Atomic for concurrent workers
+
+        data.flags.writeable = False                                                # Shared between stages - never modify in place
+        self.store(key, (data, fs))
+        return data, fs
+
+# Shared cache used by voiced detection and feature extraction (configurable through the environment):
+preprocess_cache = preProcessCache(
+    max_mb=float(os.environ.get("NEURALLY_PREPROCESS_CACHE_MB", 512)),
+    cache_dir=os.environ.get("NEURALLY_PREPROCESS_CACHE_DIR")
+)
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% CLASS: SIGNAL DETECTION %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
@@ -243,8 +633,7 @@ def TKEO(self):
         tkeo_smoothed = np.convolve(tkeo_smoothed, np.ones(5) / 5, mode='same')  # Apply Second Rolling Window with Size 5
 
         # Envelope Detection using Low-Pass Filter:
-        b, a = signal.butter(2, 10 / (0.5 * self.fs), btype='low')
-        tkeo_envelope = signal.filtfilt(b, a, tkeo_smoothed)
+        tkeo_envelope = signal.sosfiltfilt(butterSOS(2, 10, 'low', self.fs), tkeo_smoothed)
 
         return tkeo_envelope
 
@@ -266,45 +655,90 @@ def RMS_sliding(self):
         # Zero-Padding for edge cases:
         padded_signal = np.pad(self.data, (window_size//2, window_size//2), mode='edge')
         
-        # Initialise RMS array:
-        rms_values = np.zeros(len(self.data))
-        
-        # Calculate RMS using sliding window:
-        for i in range(len(self.data)):
-            window = padded_signal[i:i+window_size]
-            rms_values[i] = np.sqrt(np.mean(window**2))
+        # Calculate RMS using sliding window - vectorised as a sum of shifted slices, added in the same order as the
+        # per-window np.mean so the envelope is numerically identical:
+        squared = padded_signal ** 2
+        n = len(self.data)
+        window_sum = squared[0:n].copy()
+        for k in range(1, window_size):
+            window_sum += squared[k:k + n]
+        rms_values = np.sqrt(window_sum / window_size)
         
         # Apply same smoothing as TKEO for consistency:
         rms_smoothed = np.convolve(rms_values, np.ones(3)/3, mode='same')
         rms_smoothed = np.convolve(rms_smoothed, np.ones(5)/5, mode='same')
         
         # Apply same low-pass filter as TKEO:
-        b, a = signal.butter(2, 10/(0.5*self.fs), btype='low')
-        rms_envelope = signal.filtfilt(b, a, rms_smoothed)
+        rms_envelope = signal.sosfiltfilt(butterSOS(2, 10, 'low', self.fs), rms_smoothed)
         
         return rms_envelope
 
     # Adaptive Thresholding with Overlap: Apply Otsu's method to each window of the envelope.
-    def adaptive_thresholding_with_overlap(self, envelope, window_length, overlap_ratio):
+    # All windows are thresholded together: the per-window 256-bin histograms are built with one bincount per block of
+    # windows and the Otsu criterion is evaluated for every window at once. Binning and arithmetic follow
+    # skimage.filters.threshold_otsu (np.histogram over the window's own min/max range), so the thresholds match it.
+    def adaptive_thresholding_with_overlap(self, envelope, window_length, overlap_ratio, nbins=256):
 
-        thresholds = []                                          # List to store thresholds for each window.
         step_size = int(window_length * (1 - overlap_ratio))     # Step size based on overlap ratio.
+        envelope = np.asarray(envelope, dtype=np.float64)
+
+        if len(envelope) < window_length:
+            return np.zeros(0)
+
+        # Overlapping windows as a strided view (no copy):
+        windows = np.lib.stride_tricks.sliding_window_view(envelope, window_length)[::step_size]
+        n_windows = len(windows)
+        thresholds = np.empty(n_windows)
+
+        # Process small blocks of windows so the temporaries stay cache-sized:
+        block = max(1, (1 << 16) // window_length)
+        for b0 in range(0, n_windows, block):
+            w = windows[b0:b0 + block]
+            rows = np.arange(len(w))[:, None]
+
+            # Histogram range and bin edges per window:
+            first_edge, last_edge = w.min(axis=1), w.max(axis=1)
+            constant = first_edge == last_edge
+            last_edge = np.where(constant, last_edge + 0.5, last_edge)
+            first_edge = np.where(constant, first_edge - 0.5, first_edge)
+            bin_edges = np.linspace(first_edge, last_edge, nbins + 1, axis=-1)
+            bin_centers = (bin_edges[:, :-1] + bin_edges[:, 1:]) / 2.0
+
+            # Approximate bin indices, then numpy's correction against the actual edges (values within 1 ULP of an
+            # edge). Indices address the flattened edge array, so each row is offset by nbins + 1:
+            flat_edges = bin_edges.ravel()
+            row_offsets = rows * (nbins + 1)
+            scaled = w - first_edge[:, None]
+            scaled *= (nbins / (last_edge - first_edge))[:, None]
+            indices = scaled.astype(np.intp)
+            np.minimum(indices, nbins - 1, out=indices)
+            indices += row_offsets
+            indices -= w < flat_edges[indices]
+            increment = w >= flat_edges[indices + 1]
+            increment &= (indices - row_offsets) != nbins - 1
+            indices += increment
+            indices -= rows                                          # Row offset of nbins for the counts.
+
+            # Histogram counts for every window in one bincount:
+            counts = np.bincount(indices.ravel(), minlength=len(w) * nbins)
+            counts = counts.reshape(len(w), nbins).astype(np.float32)
+
+            # Otsu's criterion for all thresholds of all windows:
+            # (empty bins give 0/0 here; they never win the argmax and constant windows are replaced below)
+            weight1 = np.cumsum(counts, axis=1)
+            weight2 = np.cumsum(counts[:, ::-1], axis=1)[:, ::-1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean1 = np.cumsum(counts * bin_centers, axis=1) / weight1
+                mean2 = (np.cumsum((counts * bin_centers)[:, ::-1], axis=1) / weight2[:, ::-1])[:, ::-1]
+            variance12 = weight1[:, :-1] * weight2[:, 1:] * (mean1[:, :-1] - mean2[:, 1:]) ** 2
+
+            block_thresholds = bin_centers[rows[:, 0], np.argmax(variance12, axis=1)]
+
+            # A window with a single value is its own threshold:
+            thresholds[b0:b0 + block] = np.where(constant, w[:, 0], block_thresholds)
 
-        # Sliding window loop with overlap:
-        for start in range(0, len(envelope) - window_length + 1, step_size):
-            end = start + window_length
-            window = envelope[start:end]
-            
-            # Apply Otsu's thresholding to the window:
-            threshold = threshold_otsu(window)
-            
-            # Store the threshold for this window:
-            thresholds.append(threshold)
-        
         return thresholds
 
-
-
     # Detects voiced onset-offset pairs ensuring:
     # - Each onset has a corresponding offset.
     # - No consecutive onsets/offsets without proper pairing.
@@ -317,20 +751,29 @@ def getOnsetOffsetNew(self, data, adaptive_threshold, window_length, overlap_rat
 
         step_size = int(window_length * (1 - overlap_ratio))  # Step size for overlapping windows
 
-        # Initialise arrays for final threshold values:
-        final_threshold = np.zeros_like(data)
-        sample_count = np.zeros_like(data)
-
-        # Apply adaptive thresholding with overlapping windows:
-        threshold_index = 0
-        for start in range(0, len(data) - window_length + 1, step_size):
-            end = min(start + window_length, len(data)) 
-            final_threshold[start:end] += adaptive_threshold[threshold_index]
-            sample_count[start:end] += 1
-            threshold_index += 1
-
-        # Compute the final adaptive threshold per sample:
-        final_threshold = np.divide(final_threshold, sample_count, where=sample_count > 0)
+        # Window starts/ends (same windows as adaptive_thresholding_with_overlap):
+        n_windows = len(range(0, len(data) - window_length + 1, step_size))
+        window_threshold = np.asarray(adaptive_threshold[:n_windows], dtype=np.float64)
+        starts = np.arange(n_windows) * step_size
+        ends = starts + window_length
+
+        # Split the signal at every window boundary; within a segment the covering windows are constant:
+        bounds = np.unique(np.concatenate(([0, len(data)], starts, ends)))
+        seg_start = bounds[:-1]
+        first_win = np.maximum(-(-(seg_start - window_length + 1) // step_size), 0)  # First window covering a segment.
+        last_win = np.minimum(seg_start // step_size, n_windows - 1)                   # Last window covering a segment.
+        seg_count = np.maximum(last_win - first_win + 1, 0)
+
+        # Sum the covering thresholds in window order (at most ceil(window_length / step_size) per segment):
+        seg_sum = np.zeros(len(seg_start))
+        for k in range(-(-window_length // step_size)):
+            win = first_win + k
+            covered = win <= last_win
+            seg_sum[covered] += window_threshold[win[covered]]
+
+        # Compute the final adaptive threshold per sample (0 where no window covers the sample):
+        seg_threshold = np.divide(seg_sum, seg_count, out=np.zeros_like(seg_sum), where=seg_count > 0)
+        final_threshold = np.repeat(seg_threshold, np.diff(bounds))
         final_threshold *= 0.65  # Apply threshold multiplier.
 
         # Calculate the minimum energy threshold based on the mean of TKEO data:
@@ -338,9 +781,8 @@ def getOnsetOffsetNew(self, data, adaptive_threshold, window_length, overlap_rat
 
         # Initial onset/offset detection using the adaptive threshold and minimum threshold
         above_threshold = (data > final_threshold) & (data > min_threshold)  # Apply min threshold.
-        diff = np.diff(above_threshold.astype(int))
-        onset = np.where(diff == 1)[0]
-        offset = np.where(diff == -1)[0]
+        onset = np.flatnonzero(above_threshold[1:] > above_threshold[:-1])     # False -> True transitions.
+        offset = np.flatnonzero(above_threshold[1:] < above_threshold[:-1])    # True -> False transitions.
 
         # Ensure every onset has a corresponding offset
         if len(onset) > 0 and len(offset) > 0:
@@ -352,25 +794,24 @@ def getOnsetOffsetNew(self, data, adaptive_threshold, window_length, overlap_rat
         # Define the minimum gap in samples:
         min_gap = int((min_gap_ms / 1000) * self.fs)  # Convert ms to samples.
 
-        # Ensure onset-offset pairs are properly aligned with min gap:
-        valid_onsets = []
-        valid_offsets = []
-        i, j = 0, 0 
-
-        while i < len(onset) and j < len(offset):
-            # Valid onset-offset pair:
-            if onset[i] < offset[j]:  
-                if len(valid_offsets) == 0 or (onset[i] - valid_offsets[-1] > min_gap):  
-                    # Ensure there's a minimum gap between previous offset and current onset:
-                    valid_onsets.append(onset[i])
-                    valid_offsets.append(offset[j])
-                i += 1
-                j += 1  # Move to the next pair
-            else:
-                j += 1  # Skip extra offsets
-
-        onset = np.array(valid_onsets)
-        offset = np.array(valid_offsets)
+        # Ensure onset-offset pairs are properly aligned with min gap. Crossings of a boolean mask alternate, so after
+        # the clean-up above onset[i] < offset[i] pairs up directly; a pair is kept only if its onset is more than
+        # min_gap after the offset of the last kept pair:
+        n_pairs = min(len(onset), len(offset))
+        onset, offset = onset[:n_pairs], offset[:n_pairs]
+        keep = np.ones(n_pairs, dtype=bool)
+
+        if n_pairs > 1 and not np.all(onset[1:] - offset[:-1] > min_gap):
+            # Jump from each kept pair straight to the first onset clearing its gap:
+            next_pair = np.searchsorted(onset, offset + min_gap, side='right')
+            keep[:] = False
+            i = 0
+            while i < n_pairs:
+                keep[i] = True
+                i = next_pair[i]
+
+        onset = onset[keep]
+        offset = offset[keep]
 
         return onset, offset
 
@@ -381,19 +822,19 @@ def getOnsetOffsetSV(self, data, threshold):
         if data is None or len(data) < 2:
             return [], []  
 
-        # Initialise lists for onsets and offsets:
-        onsets = []
-        offsets = []
-        BelowThresh = True                          # Assume the signal starts below the threshold.
+        # Two consecutive samples above (+1) or below (-1) the threshold confirm a crossing:
+        data = np.asarray(data)
+        above = data > threshold
+        below = data < threshold
+        confirm = (above[:-1] & above[1:]).astype(np.int8) - (below[:-1] & below[1:])
 
-        for i in range(len(data) - 1):              # Prevent index out of bounds.
-            
-            if BelowThresh and data[i] > threshold and data[i + 1] > threshold:
-                onsets.append(i)
-                BelowThresh = False
-            elif not BelowThresh and data[i] < threshold and data[i + 1] < threshold:
-                offsets.append(i)
-                BelowThresh = True
+        # Hysteresis: starting below the threshold, a state change happens at the first confirmation that differs
+        # from the previous one:
+        events = np.flatnonzero(confirm)
+        states = confirm[events]
+        changes = np.flatnonzero(states != np.concatenate(([-1], states[:-1])))
+        onsets = events[changes[states[changes] == 1]].tolist()
+        offsets = events[changes[states[changes] == -1]].tolist()
 
         # Clean up unmatched onset/offset pairs:
         if offsets and onsets and offsets[0] < onsets[0]:
@@ -409,7 +850,8 @@ def getOnsetOffsetSV(self, data, threshold):
 class detectionFunctions:
 
     # INITIALISE:
-    def __init__(self, data, fs, filename, sizeEpoch=0.25, overlap=0.75, thresh_multiplier=1.5):
+    def __init__(self, data, fs, filename, sizeEpoch=0.25, overlap=0.75, thresh_multiplier=1.5, plotMode='full',
+                 dpi=300):
         self.data = data                                                                            # Audio Signal
         self.fs = fs                                                                                # Sampling Frequency
         self.filename = filename                                                                    # File Name
@@ -417,6 +859,8 @@ def __init__(self, data, fs, filename, sizeEpoch=0.25, overlap=0.75, thresh_mult
         self.sizeEpoch = sizeEpoch                                                                  # Epoch Duration (in seconds)
         self.overlap = overlap                                                                      # Overlap Ratio between Epochs
         self.signal_detector = signalDetection(data, fs, filename, sizeEpoch, overlap)              # Reuse signalDetection object
+        self.plotMode = plotMode                                                                    # 'full' or 'fast' Diagnostic Plots
+        self.dpi = dpi                                                                              # Plot Resolution
 
     # Sustained Vowel Function:
     def voicedUnvoiced_SustainedVowel(self, figPath):
@@ -458,8 +902,8 @@ def voicedUnvoiced_SustainedVowel(self, figPath):
         startPeaks = np.round(startPeaks * self.fs).astype(int)
         endPeaks = np.round(endPeaks * self.fs).astype(int)
 
-        # Return as lists:
-        return startPeaks.tolist(), endPeaks.tolist()
+        # Return as integer sample-index arrays:
+        return startPeaks, endPeaks
 
     # Syllable Repetition Function:
     def voicedUnvoiced_SyllableRepetition(self, figPath):
@@ -511,8 +955,8 @@ def voicedUnvoiced_SyllableRepetition(self, figPath):
         startPeaks = np.round(startPeaks * self.fs).astype(int)
         endPeaks = np.round(endPeaks * self.fs).astype(int)
 
-        # Return as lists:
-        return startPeaks.tolist(), endPeaks.tolist(), meanRMS, rms_slope   
+        # Return as integer sample-index arrays:
+        return startPeaks, endPeaks, meanRMS, rms_slope   
 
     # VOICED UNVOICED - Passage Reading Task
     def voicedUnvoiced_PassageReading(self, figPath):
@@ -558,11 +1002,21 @@ def voicedUnvoiced_PassageReading(self, figPath):
         startPeaks = np.round(startPeaks * self.fs).astype(int)
         endPeaks = np.round(endPeaks * self.fs).astype(int)
 
-        # Return as lists:
-        return startPeaks.tolist(), endPeaks.tolist()
+        # Return as integer sample-index arrays:
+        return startPeaks, endPeaks
 
     # PLOT DETECTION METHOD - updated for Sentence Boundaries in Paragraph Reading Task - 18:27 01/04/25
     def plot_detection(self, figPath, dataTKEO, startPeaks, endPeaks, adaptive_threshold = None, dataRMS = None, time_axis = None, meanRMS = None, is_syllable_repetition = True, sentence_boundaries=None, static_threshold = None):
+        # No figure path - plotting is disabled for this job:
+        if figPath is None:
+            return None
+
+        # Fast mode renders in the background while detection and feature extraction carry on:
+        if self.plotMode == 'fast':
+            submit_plot(self.plot_detection_fast, figPath, dataTKEO, startPeaks, endPeaks, adaptive_threshold, dataRMS,
+                        meanRMS, is_syllable_repetition, sentence_boundaries, static_threshold)
+            return None
+
         # Calculate optimal figure size based on content
         num_plots = 3 if is_syllable_repetition and dataRMS is not None and meanRMS is not None else 2
         fig_height = 4 * num_plots  # 4 inches per plot
@@ -707,19 +1161,139 @@ def plot_detection(self, figPath, dataTKEO, startPeaks, endPeaks, adaptive_thres
             )
 
         plt.xlabel("Time (seconds)")        
-        plt.savefig(os.path.join(figPath, self.filename + '.png'), bbox_inches='tight', pad_inches=0.05, dpi=300)
+        plt.savefig(os.path.join(figPath, self.filename + '.png'), bbox_inches='tight', pad_inches=0.05, dpi=self.dpi)
         plt.close()
 
         return None
+
+    # PLOT DETECTION METHOD (FAST): same panels as plot_detection, but traces are min/max decimated, all segment markers
+    # of a panel are drawn with one vlines call, and the figure is built without pyplot so it can render in a thread.
+    def plot_detection_fast(self, figPath, dataTKEO, startPeaks, endPeaks, adaptive_threshold=None, dataRMS=None,
+                            meanRMS=None, is_syllable_repetition=True, sentence_boundaries=None, static_threshold=None):
+        show_rms = is_syllable_repetition and dataRMS is not None and meanRMS is not None
+        startPeaks, endPeaks = np.asarray(startPeaks, dtype=float), np.asarray(endPeaks, dtype=float)
+
+        fig = Figure(figsize=(16, 4 * (3 if show_rms else 2)), constrained_layout=True)
+        fig.suptitle(self.filename, fontsize=20)
+        axes = fig.subplots(3, 1, squeeze=True)
+
+        # Onset/offset markers spanning the full height of a panel:
+        def segment_markers(ax, label=True):
+            ax.vlines(startPeaks, 0, 1, transform=ax.get_xaxis_transform(), colors='g', linestyles='--',
+                      label="Onset" if label and len(startPeaks) else None)
+            ax.vlines(endPeaks, 0, 1, transform=ax.get_xaxis_transform(), colors='r', linestyles='--',
+                      label="Offset" if label and len(endPeaks) else None)
+
+        # Plot 1: Speech Signal with Detected Onsets/Offsets
+        ax = axes[0]
+        ax.plot(*minmax_decimate(self.data, self.fs), label="Waveform", color='b')
+        segment_markers(ax)
+        ax.set_xlabel("Time (seconds)")
+        ax.set_ylabel("Amplitude")
+        ax.legend()
+        ax.set_title("Speech Signal with Detected Segments")
+
+        # Plot 2: TKEO Energy with Theshold Logic:
+        ax = axes[1]
+        ax.plot(*minmax_decimate(dataTKEO[:len(self.data)], self.fs), label="TKEO Energy", color='c')
+        segment_markers(ax)
+
+        if adaptive_threshold is not None:
+            window_length = len(dataTKEO) // len(adaptive_threshold)
+            threshold_time_axis = (np.arange(len(adaptive_threshold)) * window_length + window_length / 2) / self.fs
+            ax.plot(threshold_time_axis, 0.65 * np.asarray(adaptive_threshold), label="Adaptive Threshold",
+                    color='purple', linestyle='-')
+            ax.axhline(y=0.45 * np.mean(dataTKEO), color='orange', linestyle='--', label="Min Threshold at X%")
+        elif static_threshold is not None:
+            ax.axhline(y=static_threshold, color='purple', linestyle='-', label="Threshold")
+
+        if sentence_boundaries is not None and len(sentence_boundaries) > 0:
+            ax.vlines(sentence_boundaries, 0, 1, transform=ax.get_xaxis_transform(), colors='magenta',
+                      linestyles='-', linewidth=2, label="Sentence Boundary")
+
+        ax.set_ylabel("Teager-Kaiser Energy")
+        ax.legend()
+        ax.set_title("TKEO Energy with Threshold Logic")
+        ax.set_xlabel("Time (seconds)")
+
+        # Plot 3: RMS Energy with Detected Syllable Segments (Only for Syllable Repetition, not PR)
+        if show_rms:
+            ax = axes[2]
+            ax.plot(*minmax_decimate(dataRMS[:len(self.data)], self.fs), label="RMS Energy", color='b')
+            segment_markers(ax, label=False)
+
+            midpoints = (startPeaks + endPeaks) / 2
+            ax.scatter(midpoints, meanRMS, color='purple', s=50, zorder=5, label="Mean RMS per syllable")
+            if len(meanRMS) > 1:
+                time_slope, time_intercept = np.polyfit(midpoints, meanRMS, 1)
+                x_line = np.array([midpoints.min(), midpoints.max()])
+                ax.plot(x_line, time_slope * x_line + time_intercept, color='red', linestyle='-',
+                        label=f'Fitted line (slope = {time_slope:.6f})')
+
+            ax.set_xlabel("Time (seconds)")
+            ax.set_ylabel("RMS Energy")
+            ax.legend()
+            ax.set_title("RMS Energy with Detected Syllable Segments and Mean RMS Analysis")
+        else:
+            fig.delaxes(axes[2])
+
+        # Highlight the 5-second window after the first onset (Only for Syllable Repetition, not PR):
+        if is_syllable_repetition and len(startPeaks) > 0:
+            window_start_time = startPeaks[0]
+            window_end_time = min(startPeaks[0] + 5, len(dataTKEO) / self.fs)
+            ax.add_patch(plt.Rectangle((window_start_time, np.min(dataTKEO)), window_end_time - window_start_time,
+                                       np.max(dataTKEO) - np.min(dataTKEO), linewidth=2, edgecolor='b',
+                                       facecolor='none', linestyle='--', label="5s Window"))
+
+        fig.savefig(os.path.join(figPath, self.filename + '.png'), bbox_inches='tight', pad_inches=0.05, dpi=self.dpi)
+
+        return None
     
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% DIAGNOSTIC PLOT HELPERS %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Fast-mode plots are rendered on one background thread (matplotlib is not thread-safe, so the figures never go through
+# pyplot and only one renders at a time). Call wait_for_plots() before relying on the .png files.
+plot_executor = None
+plot_futures = []
+
+def submit_plot(plot_func, *args, **kwargs):
+    global plot_executor
+    if plot_executor is None:
+        plot_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='plot')
+    plot_futures.append(plot_executor.submit(plot_func, *args, **kwargs))
+
+def wait_for_plots():
+    # Wait for all pending plots; returns the errors raised while rendering (plots never fail a job):
+    errors = []
+    while plot_futures:
+        error = plot_futures.pop(0).exception()
+        if error is not None:
+            errors.append(error)
+    return errors
+
+# Min/Max Decimation: keep the minimum and maximum of each bin so peaks survive while the trace drops to ~2*n_bins points.
+def minmax_decimate(data, fs, n_bins=4000):
+    data = np.asarray(data)
+    time_axis = np.arange(len(data)) / fs
+    bin_size = len(data) // n_bins
+    if bin_size < 2:
+        return time_axis, data
+
+    n = bin_size * n_bins
+    binned = data[:n].reshape(n_bins, bin_size)
+    decimated = np.column_stack((binned.min(axis=1), binned.max(axis=1))).ravel()
+    decimated_time = np.repeat(time_axis[:n:bin_size] + (bin_size / 2) / fs, 2)
+    return np.append(decimated_time, time_axis[n:]), np.append(decimated, data[n:])
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% CLASS: EXECUTE DETECTION FUNCTIONS %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 class exeDetectionFunctions():
 
     # INITIALISE:
     def __init__(self, files, filenames, df_voiced, figPath, sizeEpoch=0.25, overlap=0.75, thresh_multiplier=1,
-                 n_devices=3):
+                 n_devices=3, plotMode='full', dpi=300):
         self.files = files
         self.filenames = filenames
         self.df_voiced = df_voiced
@@ -728,10 +1302,12 @@ def __init__(self, files, filenames, df_voiced, figPath, sizeEpoch=0.25, overlap
         self.sizeEpoch = sizeEpoch
         self.overlap = overlap
         self.n_devices = n_devices
+        self.plotMode = plotMode                # Diagnostic plots: 'full' or 'fast' (figPath=None disables them)
+        self.dpi = dpi
 
-        # Pre-process audio files outside the loop to avoid redundant computations:
+        # Pre-process audio files outside the loop to avoid redundant computations (shared with feature extraction):
         self.processed_data = [
-            (preProcess_Audio(file).preProcess_resample(), filename)
+            (preprocess_cache.preProcess_resample(file), filename)
             for file, filename in zip(self.files, self.filenames)
         ]
 
@@ -762,6 +1338,15 @@ def voiceDetector(self, detection_type):
 
         detect_func = detection_map[base_type]
 
+        # Onset/offset arrays per file (assigned as whole columns after the loop - pandas unboxes 1-element arrays set
+        # cell by cell):
+        onsets, offsets = [None] * len(self.processed_data), [None] * len(self.processed_data)
+
+        # SR RMS values: per-file values (one device) or per-recording rows (several devices), turned into df_rms once
+        # after the loop - growing a DataFrame row by row copies it on every file:
+        meanRMS_list, rms_slope_list = [None] * len(self.processed_data), [None] * len(self.processed_data)
+        rms_rows = []
+
         # Process each file:
         for j, (data_list, filename) in enumerate(self.processed_data):
             print(j, ':', filename)
@@ -770,37 +1355,34 @@ def voiceDetector(self, detection_type):
             data, fs = data_list
 
             # Create detection object:
-            detect = detectionFunctions(data, fs, filename, self.sizeEpoch, self.overlap, self.thresh_multiplier)
+            detect = detectionFunctions(data, fs, filename, self.sizeEpoch, self.overlap, self.thresh_multiplier,
+                                        self.plotMode, self.dpi)
 
             # Call corresponding detection function:
             if detect_func == 'voicedUnvoiced_SyllableRepetition':
                 # Handle the additional return values for SyllableRepetition
                 onset, offset, meanRMS, rms_slope = getattr(detect, detect_func)(self.figPath)
                 
-                # Store RMS values in the separate dataframe
+                # Store RMS values for the separate dataframe
                 if self.n_devices == 1:
-                    df_rms.at[j, 'meanRMS'] = meanRMS
-                    df_rms.at[j, 'rms_slope'] = rms_slope
+                    meanRMS_list[j], rms_slope_list[j] = meanRMS, rms_slope
                 elif self.n_devices > 1:
                     prefix_1, _, prefix_2 = filename.split('_')
                     matching_rows = self.df_voiced[
                         self.df_voiced['pID'].str.contains(prefix_1) & self.df_voiced['pID'].str.contains(prefix_2)]
                     
                     for idx in matching_rows.index:
-                        # Add a new row to df_rms
-                        new_row = pd.DataFrame({'pID': [self.df_voiced.at[idx, 'pID']], 
-                                            'meanRMS': [meanRMS], 
-                                            'rms_slope': [rms_slope]})
-                        df_rms = pd.concat([df_rms, new_row], ignore_index=True)
+                        # Add a new row for df_rms
+                        rms_rows.append({'pID': self.df_voiced.at[idx, 'pID'], 'meanRMS': meanRMS,
+                                         'rms_slope': rms_slope})
             else:
                 # Original behavior for other detection types:
                 onset, offset = getattr(detect, detect_func)(self.figPath)
 
             # Efficiently update the df_voiced based on the number of devices:
             if self.n_devices == 1:
-                # Store onset and offset as lists in the DataFrame:
-                self.df_voiced.at[j, 'onset'] = onset           # Store as list of onsets
-                self.df_voiced.at[j, 'offset'] = offset         # Store as list of offsets
+                # Keep onset and offset as integer arrays:
+                onsets[j], offsets[j] = onset, offset
             elif self.n_devices > 1:
                 # Extract identifiers:
                 prefix_1, _, prefix_2 = filename.split('_')
@@ -813,6 +1395,17 @@ def voiceDetector(self, detection_type):
             else:
                 print('Error! Input the right number of devices.')
 
+        if self.n_devices == 1:
+            self.df_voiced['onset'] = pd.Series(onsets, index=self.df_voiced.index, dtype=object)
+            self.df_voiced['offset'] = pd.Series(offsets, index=self.df_voiced.index, dtype=object)
+
+        if base_type == 'SR':
+            if self.n_devices == 1:
+                df_rms['meanRMS'] = pd.Series(meanRMS_list, index=df_rms.index, dtype=object)
+                df_rms['rms_slope'] = pd.Series(rms_slope_list, index=df_rms.index, dtype=object)
+            elif self.n_devices > 1:
+                df_rms = pd.DataFrame(rms_rows, columns=['pID', 'meanRMS', 'rms_slope'])
+
         # Return the correct result:
         if base_type == 'SR':
             return self.df_voiced, df_rms
@@ -821,6 +1414,177 @@ def voiceDetector(self, detection_type):
         
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% ONSET/OFFSET HAND-OFF FILES %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Voiced detection results (one row per file: pID plus integer onset/offset arrays) are passed to feature extraction in
+# memory. When they have to cross a process boundary they are stored as one compact .npz file: the per-file arrays are
+# concatenated and split again using the stored segment counts.
+def save_onset_offset(file_path, df_voiced):
+    onsets = [np.atleast_1d(np.asarray(x, dtype=np.int64)) for x in df_voiced['onset']]
+    offsets = [np.atleast_1d(np.asarray(x, dtype=np.int64)) for x in df_voiced['offset']]
+    np.savez(
+        file_path,
+        pID=np.array(df_voiced['pID'], dtype=str),
+        n_segments=np.array([len(x) for x in onsets], dtype=np.int64),
+        onset=np.concatenate(onsets) if onsets else np.zeros(0, dtype=np.int64),
+        offset=np.concatenate(offsets) if offsets else np.zeros(0, dtype=np.int64)
+    )
+
+def load_onset_offset(file_path):
+    with np.load(file_path) as npz:
+        # No files - np.split would still return one (empty) piece:
+        if len(npz['n_segments']) == 0:
+            return pd.DataFrame({'pID': pd.Series([], dtype=object), 'onset': pd.Series([], dtype=object),
+                                 'offset': pd.Series([], dtype=object)})
+        split_at = np.cumsum(npz['n_segments'])[:-1]
+        return pd.DataFrame({
+            'pID': npz['pID'].tolist(),
+            'onset': pd.Series(np.split(npz['onset'], split_at), dtype=object),
+            'offset': pd.Series(np.split(npz['offset'], split_at), dtype=object)
+        })
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% TABLE OUTPUT %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# Feature, RMS and onset/offset tables are written in one format per run (NEURALLY_TABLE_FORMAT):
+#   'csv'     - default; the files read by existing analysis scripts and spreadsheets.
+#   'parquet' - typed Arrow columns (ints stay ints, lists become list<int64>/list<double> columns for onset, offset
+#               and meanRMS) and fast columnar reads of whole cohorts. Needs pyarrow.
+TABLE_FORMAT = os.environ.get("NEURALLY_TABLE_FORMAT", "csv").lower()
+TABLE_FORMATS = {'csv': '.csv', 'parquet': '.parquet'}
+
+def table_format(tableFormat=None):
+    tableFormat = (tableFormat or TABLE_FORMAT).lower()
+    if tableFormat not in TABLE_FORMATS:
+        raise ValueError(f"Unknown table format: {tableFormat}. Must be one of {', '.join(TABLE_FORMATS)}.")
+    if tableFormat == 'parquet':
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("Writing Parquet tables needs pyarrow (pip install pyarrow) - or use NEURALLY_TABLE_FORMAT=csv.")
+    return tableFormat
+
+# Path of table <name> in outputPath for the run's format:
+def table_file(outputPath, name, tableFormat=None):
+    return os.path.join(outputPath, name + TABLE_FORMATS[table_format(tableFormat)])
+
+# Write a DataFrame as table <name>; returns its path. index=True keeps the CSV row index column of the older outputs
+# (Parquet files never store the positional index).
+def write_table(df, outputPath, name, tableFormat=None, index=True):
+    file_path = table_file(outputPath, name, tableFormat)
+    if file_path.endswith('.parquet'):
+        df.to_parquet(file_path, engine='pyarrow', index=False)
+    else:
+        df.to_csv(file_path, index=index)
+    return file_path
+
+# Read one or more tables (CSV or Parquet, by extension) as a single DataFrame. Parquet files are read column-wise and
+# converted to pandas once. With keys, column <name> (appended last) records which file (key) each row came from.
+def read_tables(filePaths, keys=None, name=None):
+    if all(str(f).endswith('.parquet') for f in filePaths):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        tables = [pq.read_table(f) for f in filePaths]
+        if keys is not None:
+            tables = [t.append_column(name, pa.array([key] * t.num_rows, pa.string())) for t, key in zip(tables, keys)]
+        return pa.concat_tables(tables, promote_options='default').to_pandas()
+
+    frames = [pd.read_parquet(f) if str(f).endswith('.parquet') else pd.read_csv(f) for f in filePaths]
+    if keys is not None:
+        frames = [df.assign(**{name: key}) for df, key in zip(frames, keys)]
+    return pd.concat(frames, ignore_index=True)
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% WORKER POOL %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+# One process pool per process, created on first use and reused by every job, group, test type and stage - each worker
+# imports the scientific stack once. The pool is sized once (CPU cores or NEURALLY_WORKERS, bounded by the available
+# memory for idle workers) and never replaced; the memory needed for the files of a batch is respected by limiting how
+# many of its tasks are in flight at a time (see worker_count / batch callers).
+# Start method (NEURALLY_START_METHOD): 'forkserver' (default where available - workers are forked from a server that has
+# already imported the stack below) or 'spawn'. Both are safe with the logging and plot threads of the parent.
+START_METHOD = os.environ.get("NEURALLY_START_METHOD", "forkserver")
+PRELOAD_MODULES = ['numpy', 'scipy.signal', 'scipy.fft', 'pandas', 'librosa', 'parselmouth', 'matplotlib']
+WORKER_BASE_MB = 450                    # Imported stack plus fixed working memory of one worker (measured)
+WORKER_BYTES_PER_SAMPLE = 48            # Peak working memory per input sample (measured on a 20-minute 44.1 kHz file)
+
+worker_pool = None
+worker_pool_size = 0
+worker_pool_lock = threading.Lock()
+
+# AVAILABLE MEMORY (bytes): MemAvailable on Linux, free physical pages elsewhere on POSIX, None if unknown.
+def available_memory():
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+# FILE MEMORY ESTIMATE (bytes): peak memory of one worker processing a .wav file, from its duration and sample rate
+# (read from the header; the samples are memory-mapped, not loaded).
+def estimate_file_memory(file_path):
+    try:
+        fs, raw = wavfile.read(file_path, mmap=True)
+        n_samples = raw.shape[0]
+        del raw
+    except Exception:
+        n_samples = os.path.getsize(file_path) // 2                                 # 16-bit mono upper bound
+    return WORKER_BASE_MB * 1024 * 1024 + WORKER_BYTES_PER_SAMPLE * n_samples
+
+# WORKER COUNT: CPU cores (or NEURALLY_WORKERS), reduced so that the largest of filePaths fits into available memory.
+def worker_count(filePaths=None):
+    n_workers = max(1, int(os.environ.get("NEURALLY_WORKERS", os.cpu_count() or 1)))
+    memory = available_memory()
+    if filePaths and memory is not None:
+        per_file = max(estimate_file_memory(file) for file in filePaths)
+        n_workers = max(1, min(n_workers, memory // per_file))
+    return n_workers
+
+# GET WORKER POOL: the shared pool. The first call sizes it - n_workers (e.g. a run's global --workers budget), otherwise
+# the cores (or NEURALLY_WORKERS) limited by the memory for that many idle workers; later calls return the same pool
+# whatever they ask for, so jobs never tear down workers another thread may still be submitting to. Workers start on
+# demand, so unused capacity costs nothing.
+def get_worker_pool(n_workers=None):
+    global worker_pool, worker_pool_size
+    with worker_pool_lock:
+        if worker_pool is None:
+            n_workers = n_workers or idle_worker_count()
+            if START_METHOD == 'forkserver' and 'forkserver' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('forkserver')
+                context.set_forkserver_preload(PRELOAD_MODULES)
+            else:
+                context = multiprocessing.get_context('spawn')
+            worker_pool = ProcessPoolExecutor(max_workers=n_workers, mp_context=context)
+            worker_pool_size = n_workers
+            logger.info(f"Started worker pool: {n_workers} workers ({context.get_start_method()}).")
+        return worker_pool
+
+# IDLE WORKER COUNT: CPU cores (or NEURALLY_WORKERS), limited to the workers whose imported stack fits into memory.
+def idle_worker_count():
+    n_workers = max(1, int(os.environ.get("NEURALLY_WORKERS", os.cpu_count() or 1)))
+    memory = available_memory()
+    if memory is not None:
+        n_workers = max(1, min(n_workers, memory // (WORKER_BASE_MB * 1024 * 1024)))
+    return n_workers
+
+# IN-FLIGHT LIMIT: how many tasks of a batch may run at once - n_workers (default: worker_count(filePaths), the memory
+# bound for the batch's largest file), never more than the shared pool has workers.
+def in_flight_limit(n_workers=None, filePaths=None):
+    get_worker_pool()
+    return max(1, min(n_workers or worker_count(filePaths), worker_pool_size))
+
+def shutdown_worker_pool():
+    global worker_pool, worker_pool_size
+    if worker_pool is not None:
+        worker_pool.shutdown()
+        worker_pool, worker_pool_size = None, 0
+
+atexit.register(shutdown_worker_pool)
+# %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% IF MAIN SCRIPT EXECUTION %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 # If this script is run directly
 if __name__ == "__main__":
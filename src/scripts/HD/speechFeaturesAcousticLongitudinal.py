@@ -8,18 +8,27 @@
 import pandas as pd
 from parselmouth.praat import call
 from scipy import signal
+from scipy import fft as sfft
 from scipy.signal import fftconvolve, find_peaks
 import re
 
 # Import Local Libraries:
 import preProcessingAudioLongitudinal
 
+# Acoustic Analysis Region (NEURALLY_SEGMENTS): the audio that Praat, GNE and MFCC features are computed over.
+# 'full' - the whole pre-processed recording, including padding and silent gaps (reference results).
+# 'concat' - only the detected voiced segments, joined end to end.
+# 'segments' - every voiced segment separately, features averaged over the segments weighted by their duration.
+SEGMENT_MODE = os.environ.get("NEURALLY_SEGMENTS", "full")
+MIN_SEGMENT_SEC = 0.1                                       # Shorter segments are skipped in 'segments' mode
+
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% PRAAT FEATURES %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 # Praat Features:
 # The Praat Class performs various acoustic analyses on the participant voice recordings using the Praat software
 # library.
 #
 # Praat() includes:
+# - getPitch: returns the Praat pitch object for a pitch range (computed once per range and shared).
 # - calculatePitch: returns the median, mean, and standard deviation of the pitch values.
 # - calculateHNR: returns the mean HNR value.
 # - calculateJitter: calculates various types of jitter using Praat's point process.
@@ -32,13 +41,23 @@ class Praat():
     def __init__ (self, data, fs, fmin, fmax):
         self.sound, self.fs = parselmouth.Sound(data), fs
         self.fmin, self.fmax = fmin, fmax
-        self.pointProcess = call(self.sound, "To PointProcess (periodic, cc)", fmin, fmax)
+        self.pitchObjects = {}                  # Pitch objects by (floor, ceiling)
+
+        # Glottal pulses from the pitch contour - the same as "To PointProcess (periodic, cc)", which runs this pitch
+        # analysis internally; an explicit pitch object can be shared with the other measures of the same range:
+        self.pointProcess = call([self.sound, self.getPitch(fmin, fmax)], "To PointProcess (cc)")
+
+    # Pitch Object: Praat's to_pitch (autocorrelation) for the pitch range, computed once per range.
+    def getPitch(self, floor=75, ceiling=600):
+        if (floor, ceiling) not in self.pitchObjects:
+            self.pitchObjects[floor, ceiling] = self.sound.to_pitch(pitch_floor=floor, pitch_ceiling=ceiling)
+        return self.pitchObjects[floor, ceiling]
 
     # Pitch: returns the median, mean, and standard deviation of the pitch values.
     def calculatePitch(self):
         
-        # Extract the pitch object from the sound using Praat's to_pitch function:
-        pitch = self.sound.to_pitch()
+        # Extract the pitch object from the sound using Praat's to_pitch function (default range, 75-600 Hz):
+        pitch = self.getPitch()
         
         # Get the pitch values (frequencies) from the pitch object:
         pitch_values = pitch.selected_array['frequency']
@@ -86,26 +105,30 @@ def calculateJitter(self):
         
     # Shimmer: computes various types of shimmer using Praat’s functions.
     def calculateShimmer(self):
+
+        # Peak amplitude of every period, read from the sound once (each [sound, pointProcess] shimmer query would
+        # rescan the whole sound to build this sequence):
+        amplitudeTier = call([self.sound, self.pointProcess], "To AmplitudeTier (period)", 0, 0, 0.0001, 0.02, 1.3)
         
         # Local Shimmer
-        shimmerLocal =  call([self.sound, self.pointProcess], "Get shimmer (local)", 0, 0, 0.0001, 0.02, 1.3, 1.6)
+        shimmerLocal =  call(amplitudeTier, "Get shimmer (local)", 0.0001, 0.02, 1.6)
         
         # Local Shimmer in dB
-        shimmerLocaldB = call([self.sound, self.pointProcess], "Get shimmer (local_dB)", 0, 0, 0.0001, 0.02, 1.3, 1.6)
+        shimmerLocaldB = call(amplitudeTier, "Get shimmer (local_dB)", 0.0001, 0.02, 1.6)
         
         # APQ3, APQ5, and APQ11 (Average Perturbation Quotients)
-        shimmerAPQ3 = call([self.sound, self.pointProcess], "Get shimmer (apq3)", 0, 0, 0.0001, 0.02, 1.3, 1.6)
-        shimemrAPQ5 = call([self.sound, self.pointProcess], "Get shimmer (apq5)", 0, 0, 0.0001, 0.02, 1.3, 1.6)
-        shimmerAPQ11 =  call([self.sound, self.pointProcess], "Get shimmer (apq11)", 0, 0, 0.0001, 0.02, 1.3, 1.6)
+        shimmerAPQ3 = call(amplitudeTier, "Get shimmer (apq3)", 0.0001, 0.02, 1.6)
+        shimemrAPQ5 = call(amplitudeTier, "Get shimmer (apq5)", 0.0001, 0.02, 1.6)
+        shimmerAPQ11 =  call(amplitudeTier, "Get shimmer (apq11)", 0.0001, 0.02, 1.6)
         
         # DDA (Difference of Differences Amplitude)
-        shimmerDDA = call([self.sound, self.pointProcess], "Get shimmer (dda)", 0, 0, 0.0001, 0.02, 1.3, 1.6)
+        shimmerDDA = call(amplitudeTier, "Get shimmer (dda)", 0.0001, 0.02, 1.6)
         
         # Returns: all shimmer measures.
         return shimmerLocal, shimmerLocaldB, shimmerAPQ3, shimemrAPQ5, shimmerAPQ11, shimmerDDA
     
-    # Features: calls all functions in the Praat() class and returns a DataFrame
-    def getFeaturesPraat(self):
+    # Feature Record: calls all functions in the Praat() class and returns the features as a dictionary
+    def featuresPraat(self):
         
         # Pitch:
         medianPitch, meanPitch, stdPitch = self.calculatePitch()
@@ -135,11 +158,12 @@ def getFeaturesPraat(self):
             "Shimmer_DDA": shimmerDDA
         }
         
-        # Convert to a DataFrame:
-        dfPraatFeat = pd.DataFrame([PraatFeat])
-        
-        # Returns: A DataFrame containing computed features
-        return dfPraatFeat
+        # Returns: A dictionary containing computed features
+        return PraatFeat
+
+    # Features: returns the Praat features as a one-row DataFrame
+    def getFeaturesPraat(self):
+        return pd.DataFrame([self.featuresPraat()])
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END PRAAT FEATURES %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% NOVEL DYSPHONIA MEASURES %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
@@ -156,6 +180,8 @@ def __init__(self, data, fs):
         self.data = data
         self.fs = fs
         self.new_fs = 10000         # Downsampled frequency
+        self.n_fft, self.hop_length = 2048, 512     # STFT frame length and hop (librosa MFCC defaults)
+        self.block = 4096                           # STFT frames transformed per block (bounds the frame copies)
     
     # Glottal-to-Noise Excitation (GNE):
     def GNE(self):
@@ -171,46 +197,76 @@ def GNE(self):
 
         # Fast Fourier Transformation (FFT) Transformation:
         # Convert signal from the time-domain to frequency domain using FFT.
-        dftSignal = np.fft.fft(y_preEmph)
-        freq = np.abs(np.fft.fftfreq(n=len(y_preEmph), d=1/self.new_fs))
+        # Note: not zero-padded to a fast FFT length - padding moves the band edges on the frequency grid and changes
+        # GNE by up to ~0.3% on short segments.
+        dftSignal = sfft.fft(y_preEmph)
 
-        # Frequency Band Separation:
-        # Divide the signal into three frequency bands (0-750 Hz, 750-1500 Hz, and 1500-2250 Hz):
+        # Frequency Band Separation, Hilbert Transform & Envelope Calculation:
+        # Divide the signal into three frequency bands (0-750 Hz, 750-1500 Hz, and 1500-2250 Hz) and take the Hilbert
+        # envelope of each band:
         lowLim = [0, 750, 1500]
         highLim = [750, 1500, 2250]
-        bandSig = [dftSignal[np.where((freq>=i) & (freq <=j))] for i,j in zip(lowLim, highLim)]
-        signalFinal = np.zeros((3, len(dftSignal)))
-
-        # Band Isolation, Hilbert Transform & Envelope Calculation:
-        for i in range(len(bandSig)):
-            
-            # Isolate Bands i.e. zero all other frequencies:
-            zeroSig = np.zeros(len(dftSignal))
-            mask = (freq >= lowLim[i]) & (freq <= highLim[i])
-            zeroSig[mask] = np.hanning(len(bandSig[i]))
-            zeroSig[-np.sum(mask):] = np.hanning(len(bandSig[i]))
-
-            bandSig_temp = np.multiply(dftSignal, zeroSig)
-            timeSignal = np.abs(np.fft.ifft(bandSig_temp))
-
-            # Hilbert Transform & Envelope Calculation:
-            envHilb = np.abs(signal.hilbert(np.real(timeSignal)))
-            signalFinal[i, :] = envHilb
+        signalFinal = self.bandEnvelopes(dftSignal, lowLim, highLim)
     
         # Correlation Coefficient: 
         # Calculate the maximum correlation coefficient between the separated bands:
-        corrCoef = np.max([np.corrcoef(signalFinal[i], signalFinal[j])[0, 1] 
-                           for i in range(3) for j in range(i + 1, 3)])
+        corrMatrix = np.corrcoef(signalFinal)
+        corrCoef = np.max([corrMatrix[i, j] for i in range(3) for j in range(i + 1, 3)])
 
         # GNE Calculation: 
         # Computes GNE using the formula:
         GNE_final = 10 * np.log10(corrCoef / (1 - corrCoef))
         
         return GNE_final
+
+    # Band Envelopes: Hilbert envelopes of the frequency bands of a spectrum, one row per band.
+    def bandEnvelopes(self, dftSignal, lowLim, highLim):
+        n = len(dftSignal)
+        freq = np.abs(sfft.fftfreq(n=n, d=1/self.new_fs))
+
+        # Band Isolation i.e. zero all other frequencies:
+        # A Hanning window over all bins in the band, which is also written over the last bins of the spectrum.
+        bandSpectrum = np.zeros((len(lowLim), n), dtype=dftSignal.dtype)
+        for i, (low, high) in enumerate(zip(lowLim, highLim)):
+            mask = (freq >= low) & (freq <= high)
+            window = np.hanning(np.count_nonzero(mask))
+            bandSpectrum[i, mask] = window * dftSignal[mask]
+            bandSpectrum[i, n - len(window):] = window * dftSignal[n - len(window):]
+
+        # All bands back to the time domain in one batched inverse FFT:
+        timeSignal = np.abs(sfft.ifft(bandSpectrum, axis=-1, overwrite_x=True))
+        del bandSpectrum
+
+        # Hilbert Transform & Envelope Calculation (as signal.hilbert, batched over the bands):
+        # One-sided spectrum of each band with the positive frequencies doubled, then one batched inverse FFT.
+        halfSpectrum = sfft.rfft(timeSignal, axis=-1)
+        del timeSignal
+        analytic = np.zeros((len(lowLim), n), dtype=halfSpectrum.dtype)
+        analytic[:, :halfSpectrum.shape[1]] = halfSpectrum
+        analytic[:, 1:(n + 1) // 2] *= 2
+        del halfSpectrum
+
+        return np.abs(sfft.ifft(analytic, axis=-1, overwrite_x=True))
+
+    # Power Spectrogram: power STFT of the signal (frequency bins x frames) with centred, zero-padded Hann frames as in
+    # librosa.stft, transformed a block of frames at a time.
+    def powerSpectrogram(self):
+        padded = np.pad(self.data, self.n_fft // 2)
+        frames = np.lib.stride_tricks.sliding_window_view(padded, self.n_fft)[::self.hop_length]
+        window = signal.get_window('hann', self.n_fft).astype(padded.dtype, copy=False)
+
+        powerSpec = np.empty((len(frames), self.n_fft // 2 + 1), dtype=padded.dtype)
+        for start in range(0, len(frames), self.block):
+            stft = sfft.rfft(frames[start:start + self.block] * window, axis=-1)
+            np.square(stft.real, out=powerSpec[start:start + self.block])
+            powerSpec[start:start + self.block] += np.square(stft.imag)
+
+        return powerSpec.T
     
     def MFCCs(self):
-        # Compute MFCCs
-        mfccs = librosa.feature.mfcc(y=self.data, sr=self.fs, n_mfcc=13)
+        # Compute MFCCs (from the power spectrogram, as librosa.feature.mfcc(y=data, sr=fs, n_mfcc=13)):
+        melSpec = librosa.feature.melspectrogram(S=self.powerSpectrogram(), sr=self.fs)
+        mfccs = librosa.feature.mfcc(S=librosa.power_to_db(melSpec), n_mfcc=13)
 
         # Compute the 1st (Delta) and 2nd (Delta-Delta) Derivatives of the MFCCs:
         delta = librosa.feature.delta(mfccs, mode='nearest')
@@ -232,21 +288,24 @@ def MFCCs(self):
         # Returns: SDMFCC, SDDelta, SDDelta2.
         return SDMFCC, SDDelta, SDDelta2
     
-    def getNovelDysphoniaFeatures(self):
+    def novelDysphoniaFeatures(self):
 
         # Compute features:
         gne = self.GNE()
         sd_mfcc, sd_delta, sd_delta2 = self.MFCCs()
 
-        # Create DataFrame:
+        # Create Feature Record:
         NovelDysphoniaFeat = {
-            "GNE": [gne],
-            "SD_MFCC": [sd_mfcc],
-            "SD_Delta": [sd_delta],
-            "SD_Delta2": [sd_delta2]
+            "GNE": gne,
+            "SD_MFCC": sd_mfcc,
+            "SD_Delta": sd_delta,
+            "SD_Delta2": sd_delta2
         }
 
-        return pd.DataFrame(NovelDysphoniaFeat)
+        return NovelDysphoniaFeat
+
+    def getNovelDysphoniaFeatures(self):
+        return pd.DataFrame([self.novelDysphoniaFeatures()])
 
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END NOVEL DYSPHONIA FEATURES %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 
@@ -258,16 +317,19 @@ def getNovelDysphoniaFeatures(self):
 # timeFeatures() includes:
 # - timeFeaturesSR: calculates temporal features for the Syllable Repetition task.
 # - timeFeaturesPR: calculates temporal features for the Passage Reading task.
+# - timeFeaturesSV: calculates the maximum phonation time for the Sustained Vowel task.
+# Each returns a feature record (dictionary: column -> value) for one recording.
 
 class timeFeatures():
 
     # Parameters:
     # fs: The sampling frequency of the audio signal.
-    # onset_temp: The onset times of voiced segments.
-    # offset_temp: The offset times of voiced segments.
+    # onset_temp: The onset times (samples) of voiced segments, in time order.
+    # offset_temp: The offset times (samples) of voiced segments.
     # diffSignal: The signal difference, used to calculate the maximum phonation time (MPT).
     def __init__ (self, fs, onset_temp, offset_temp, diffSignal):
-        self.fs, self.onset, self.offset, self.diffSignal = fs, onset_temp, offset_temp, diffSignal
+        self.fs, self.diffSignal = fs, diffSignal
+        self.onset, self.offset = np.asarray(onset_temp), np.asarray(offset_temp)
 
     # Temporal Syllable Repetition Features (timeFeaturesSR):
     # TST (s): Total Speech Time, the amount of time the speaker was actively producing speech within the 5-second window.
@@ -291,13 +353,13 @@ def timeFeaturesSR(self):
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ TST ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         # Total Speech Time (TST) - (s)
-        # Identify the last onset within 5 seconds:
-        valid_onsets = [onset for onset in self.onset if onset - self.onset[0] <= 5 * self.fs]
+        # Identify the last onset within 5 seconds (onsets are in time order, so the window is a prefix of them):
+        nWindow = np.searchsorted(self.onset, self.onset[0] + 5 * self.fs, side='right')
 
         # Select the corresponding offset, accounting for onset within 5s but offset ocurs after, include the onset/offset pair:
-        if valid_onsets:
-            last_valid_onset = valid_onsets[-1]                             # Last onset within 5s.
-            final_offset = self.offset[self.onset.index(last_valid_onset)]
+        if nWindow > 0:
+            last_valid_onset = self.onset[nWindow - 1]                      # Last onset within 5s.
+            final_offset = self.offset[np.searchsorted(self.onset, last_valid_onset, side='left')]
         else:
             final_offset = self.offset[-1]                                  # Default to last offset.
 
@@ -306,15 +368,12 @@ def timeFeaturesSR(self):
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Pause Durations & Total Pause Time (TPT) ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         # Total Pause Time (TPT) - (s)
-        # Identify the indices of onsets and offsets that are included in TST 5s Window:
-        valid_indices = [i for i, onset in enumerate(self.onset) if onset <= final_offset] 
-
-        # Extract valid onsets and offsets:
-        valid_onsets = [self.onset[i] for i in valid_indices]
-        valid_offsets = [self.offset[i] for i in valid_indices]
+        # Valid onsets and offsets i.e. those that are included in TST 5s Window:
+        nValid = np.searchsorted(self.onset, final_offset, side='right')
+        valid_onsets, valid_offsets = self.onset[:nValid], self.offset[:nValid]
 
         # Compute Pause Durations i.e. offset-to-onset gap:
-        pause_durations = [(valid_onsets[n + 1] - valid_offsets[n]) / self.fs for n in range(len(valid_onsets) - 1)]
+        pause_durations = (valid_onsets[1:] - valid_offsets[:-1]) / self.fs
 
         # Total Pause Time (TPT)
         tpt = np.sum(pause_durations)
@@ -329,7 +388,8 @@ def timeFeaturesSR(self):
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Interval Duration (intDur) ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         # Compute Interval Durations - i.e. onset-to-onset for the 5s window of interest:
-        intDur = np.mean([(valid_onsets[n + 1] - valid_onsets[n]) / self.fs for n in range(len(valid_onsets) - 1)]) if len(valid_onsets) > 1 else np.nan
+        interval_durations = np.diff(valid_onsets) / self.fs
+        intDur = np.mean(interval_durations) if nValid > 1 else np.nan
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Mean Pause Time (MPT) ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         # Mean Pause Time (MPT)
@@ -337,7 +397,7 @@ def timeFeaturesSR(self):
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Number of Repetitions ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         # Number of Repetitions within the 5s window
-        NRep = len(valid_onsets)  # Count valid onsets within the 5s window.
+        NRep = int(nValid)  # Count valid onsets within the 5s window.
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ SylRepRate based on NST and TST ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         # SylRepRateNST: Syllable Repetition Rate based on Net Speech Time (NST)
@@ -346,63 +406,26 @@ def timeFeaturesSR(self):
         # SylRepRateTST: Syllable Repetition Rate based on Total Speech Time (TST)
         sylRepRateTST = NRep / tst if tst > 0 else np.nan
 
-        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Generate Repetition Indices and Pause Slope ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        # Generate Repetition Indices:
-        pauseReps = np.arange(1, len(pause_durations) + 1)
-
+        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Pause Slope over Repetitions ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         # Calculate Slope of Pause Durations over Repetitions:
-        pause_slope = np.nan
-        pauseslope_description = "Not Applicable"                                    # Default if slope can't be calculated
-        if len(set(pause_durations)) > 1:                                            # Ensure at least 2 unique values for slope calculation
-            pause_slope, _ = np.polyfit(pauseReps, pause_durations, 1)               # Calculate Slope
-            
-            # Check the direction of the slope
-            if pause_slope > 0:
-                pauseslope_description = "Increasing"                                # Increasing Pause Slope                           
-            elif pause_slope < 0:
-                pauseslope_description = "Decreasing"                                # Decreasing Pause Slope
-            else:
-                pauseslope_description = "Flat"                                      # No change, slope is zero
+        pause_slope, pauseslope_description = self.slope(pause_durations)
+
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Utterance Durations ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         # Calculate Utterance Durations (offset - onset) for valid onsets and offsets within the 5s window:
-        utterance_durations = [(valid_offsets[n] - valid_onsets[n]) / self.fs for n in range(len(valid_onsets))]
+        utterance_durations = (valid_offsets - valid_onsets) / self.fs
 
         # Calculate the mean utterance time (mut):
         mut = np.mean(utterance_durations) if len(utterance_durations) > 0 else np.nan
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Utterance Slope and Description ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        # Generate Utterance Repetition Indices:
-        uttReps = np.arange(1, len(utterance_durations) + 1)
-
         # Calculate Slope of Utterance Durations over Repetitions:
-        utterance_slope = np.nan
-        utteranceslope_description = "Not Applicable"                           # Default if slope can't be calculated
-        if len(set(utterance_durations)) > 1:                                   # Ensure at least 2 unique values for slope calculation
-            utterance_slope, _ = np.polyfit(uttReps, utterance_durations, 1)    # Calculate Slope
-            
-            # Check the direction of the slope
-            if utterance_slope > 0:
-                utteranceslope_description = "Increasing"                       # Increasing Utterance Slope
-            elif utterance_slope < 0:
-                utteranceslope_description = "Decreasing"                       # Decreasing Utterance Slope
-            else:
-                utteranceslope_description = "Flat"                             # No change, slope is zero
+        utterance_slope, utteranceslope_description = self.slope(utterance_durations)
         
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Calculate the Ratio for Each Utterance ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        utterance_ratios = []
-
-        # Loop through each utterance except the last one:
-        for i in range(len(valid_onsets) - 1):  
-            # Calculate the utterance duration (offset - onset) for the current utterance:
-            utterance_duration = (valid_offsets[i] - valid_onsets[i]) / self.fs
-
-            # Calculate the interval duration (onset to onset) for the current interval:
-            interval_duration = (valid_onsets[i + 1] - valid_onsets[i]) / self.fs
-
-            # Calculate the ratio of utterance duration to interval duration - avoid division by zero:
-            if interval_duration > 0: 
-                ratio = utterance_duration / interval_duration
-                utterance_ratios.append(ratio)
+        # Utterance duration over the following onset-to-onset interval, for every utterance except the last one (intervals
+        # of zero length are skipped to avoid division by zero):
+        positive = interval_durations > 0
+        utterance_ratios = utterance_durations[:-1][positive] / interval_durations[positive]
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Calculate the Average of These Ratios ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         if len(utterance_ratios) > 0:
@@ -415,18 +438,18 @@ def timeFeaturesSR(self):
         # Check if TST is less than 5 seconds - as defined in the task failure criteria:
         if tst < 5:  
             # Define the last valid offset:
-            last_valid_offset = valid_offsets[-1] if valid_offsets else np.nan
+            last_valid_offset = valid_offsets[-1] if nValid > 0 else np.nan
             
             # Check for false task failure definitions due to pauses at 5s, i.e. the speaker continued after 5s after a reasonble mean pause time:
             # Check whether there is an onset occuring AFTER the last valid offset, meaning the speaker continued after 5 second window:
-            next_onset = next((onset for onset in self.onset if onset > last_valid_offset), None)
+            nextIndex = np.searchsorted(self.onset, last_valid_offset, side='right') if nValid > 0 else len(self.onset)
             
-            if next_onset is None:
+            if nextIndex == len(self.onset):
                 # If no further onset, it's a true task failure i.e no false detection occured:
                 task_failure = 1  
             else:
                 # If there is a new onset after 5s, check the gap between the last valid offset and the next onset:
-                gap = (next_onset - last_valid_offset) / self.fs                       # Convert gap to seconds (s)
+                gap = (self.onset[nextIndex] - last_valid_offset) / self.fs            # Convert gap to seconds (s)
                 
                 if gap > mpt:
                     # If the gap is longer than the mean pause time, it was a valid break in task, so task is a failure:
@@ -437,58 +460,45 @@ def timeFeaturesSR(self):
         else:
             task_failure = 0  # Task didn't fail if TST is greater than 5s
 
-        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Create DataFrame with Extracted Features ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        # Create DataFrame with Extracted Features
-        dfTimeFeat = pd.DataFrame(
-            columns=[
-                'TST(s)', 'NST(s)',
-                'TPT(s)', 'MeanPauseTime(s)', 'PR(%)', 'PauseSlope', 'PauseSlope Desc',
-                'MeanUtteranceTime(s)', 'Utterance Ratio', 'UtteranceSlope', 'UtteranceSlope Desc',
-                'intDur(s)',
-                'NRep', 'Syl Rep Rate (NST)', 'Syl Rep Rate (TST)',
-                'Task Failure'
-            ],
-            data=[[
-                tst,                        # TST(s)
-                nst,                        # NST(s)
-                tpt,                        # TPT(s)
-                mpt,                        # MeanPauseTime(s)
-                pr,                         # Pause Ratio (%)
-                pause_slope,                # Pause Slope
-                pauseslope_description,     # Pause Slope Desc
-                mut,                        # Mean Utterance Time(s)
-                avg_utterance_dur_ratio,    # Utterance Ratio
-                utterance_slope,            # Utterance Slope
-                utteranceslope_description, # Utterance Slope Desc
-                intDur,                     # intDur(s)
-                NRep,                       # NRep
-                sylRepRateNST,              # Syl Rep Rate (NST)
-                sylRepRateTST,              # Syl Rep Rate (TST)
-                task_failure                # Task Failure
-            ]]
-        )
-
-        return dfTimeFeat
+        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Feature Record ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        # Extracted Features (one feature table row):
+        timeFeatSR = {
+            'TST(s)': tst,
+            'NST(s)': nst,
+            'TPT(s)': tpt,
+            'MeanPauseTime(s)': mpt,
+            'PR(%)': pr,                                        # Pause Ratio (%)
+            'PauseSlope': pause_slope,
+            'PauseSlope Desc': pauseslope_description,
+            'MeanUtteranceTime(s)': mut,
+            'Utterance Ratio': avg_utterance_dur_ratio,
+            'UtteranceSlope': utterance_slope,
+            'UtteranceSlope Desc': utteranceslope_description,
+            'intDur(s)': intDur,
+            'NRep': NRep,
+            'Syl Rep Rate (NST)': sylRepRateNST,
+            'Syl Rep Rate (TST)': sylRepRateTST,
+            'Task Failure': task_failure
+        }
+
+        return timeFeatSR
     
     # Temporal Features for the Passage Reading Task (timeFeaturesPR):
     def timeFeaturesPR(self):
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ TST (Total Speech Time) ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        valid_onsets = self.onset
-
-        if valid_onsets:
-            last_valid_onset = valid_onsets[-1]
-            final_offset = self.offset[self.onset.index(last_valid_onset)]
+        if len(self.onset) > 0:
+            last_valid_onset = self.onset[-1]
+            final_offset = self.offset[np.searchsorted(self.onset, last_valid_onset, side='left')]
         else:
             final_offset = self.offset[-1]
 
         tst = (final_offset - self.onset[0]) / self.fs
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Pause Durations & Total Pause Time (TPT) ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        valid_indices = [i for i, onset in enumerate(self.onset) if onset <= final_offset]
-        valid_onsets = [self.onset[i] for i in valid_indices]
-        valid_offsets = [self.offset[i] for i in valid_indices]
+        nValid = np.searchsorted(self.onset, final_offset, side='right')
+        valid_onsets, valid_offsets = self.onset[:nValid], self.offset[:nValid]
 
-        pause_durations = [(valid_onsets[n + 1] - valid_offsets[n]) / self.fs for n in range(len(valid_onsets) - 1)]
+        pause_durations = (valid_onsets[1:] - valid_offsets[:-1]) / self.fs
         tpt = np.sum(pause_durations)
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Pause Ratio (%) ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -498,61 +508,43 @@ def timeFeaturesPR(self):
         nst = tst - tpt
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Interval Duration (intDur) ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        intDur = np.mean([(valid_onsets[n + 1] - valid_onsets[n]) / self.fs for n in range(len(valid_onsets) - 1)]) if len(valid_onsets) > 1 else np.nan
+        intDur = np.mean(np.diff(valid_onsets) / self.fs) if nValid > 1 else np.nan
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Mean Pause Time (MPT) ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         mpt = np.nanmean(pause_durations) if len(pause_durations) > 0 else np.nan
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Utterance Durations ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        utterance_durations = [(valid_offsets[n] - valid_onsets[n]) / self.fs for n in range(len(valid_onsets))]
+        utterance_durations = (valid_offsets - valid_onsets) / self.fs
         mut = np.mean(utterance_durations) if len(utterance_durations) > 0 else np.nan
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Utterance Slope ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        uttReps = np.arange(1, len(utterance_durations) + 1)
-        utterance_slope = np.nan
-        utteranceslope_description = "Not Applicable"
-        if len(set(utterance_durations)) > 1:
-            utterance_slope, _ = np.polyfit(uttReps, utterance_durations, 1)
-
-            if utterance_slope > 0:
-                utteranceslope_description = "Increasing"
-            elif utterance_slope < 0:
-                utteranceslope_description = "Decreasing"
-            else:
-                utteranceslope_description = "Flat"
+        utterance_slope, utteranceslope_description = self.slope(utterance_durations)
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Task Failure Definition ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
         task_failure = 0
 
-        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Create DataFrame ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        dfTimeFeatPR = pd.DataFrame(
-            columns=[
-                'TST(s)', 'NST(s)', 'TPT(s)', 'MeanPauseTime(s)', 'PR(%)', 'PauseSlope', 'PauseSlope Desc',
-                'MeanUtteranceTime(s)', 'Utterance Ratio', 'UtteranceSlope', 'UtteranceSlope Desc',
-                'intDur(s)', 'NRep', 'Syl Rep Rate (NST)', 'Syl Rep Rate (TST)', 'Task Failure'
-            ],
-            data=[[
-                tst,                        # TST(s)
-                nst,                        # NST(s)
-                tpt,                        # TPT(s)
-                mpt,                        # MeanPauseTime(s)
-                pr,                         # Pause Ratio (%)
-                np.nan,                     # PauseSlope
-                np.nan,                     # PauseSlope Desc
-                mut,                        # Mean Utterance Time(s)
-                np.nan,                     # Utterance Ratio
-                utterance_slope,            # Utterance Slope
-                utteranceslope_description, # Utterance Slope Desc
-                intDur,                     # intDur(s)
-                np.nan,                     # NRep
-                np.nan,                     # Syl Rep Rate (NST)
-                np.nan,                     # Syl Rep Rate (TST)
-                task_failure                # Task Failure
-            ]]
-        )
-
-        # Return the DataFrame:
-        return dfTimeFeatPR
+        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Feature Record ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        timeFeatPR = {
+            'TST(s)': tst,
+            'NST(s)': nst,
+            'TPT(s)': tpt,
+            'MeanPauseTime(s)': mpt,
+            'PR(%)': pr,                                        # Pause Ratio (%)
+            'PauseSlope': np.nan,
+            'PauseSlope Desc': np.nan,
+            'MeanUtteranceTime(s)': mut,
+            'Utterance Ratio': np.nan,
+            'UtteranceSlope': utterance_slope,
+            'UtteranceSlope Desc': utteranceslope_description,
+            'intDur(s)': intDur,
+            'NRep': np.nan,
+            'Syl Rep Rate (NST)': np.nan,
+            'Syl Rep Rate (TST)': np.nan,
+            'Task Failure': task_failure
+        }
+
+        # Return the Feature Record:
+        return timeFeatPR
     
     # Temporal Features for the Sustained Vowel Task (timeFeaturesSV):
     def timeFeaturesSV(self):
@@ -560,18 +552,28 @@ def timeFeaturesSV(self):
         # MPT is the duration of the longest continuous phonation (i.e., offset - onset)
         
         # Compute durations for each voiced segment:
-        durations = [(off - on) / self.fs for on, off in zip(self.onset, self.offset)]
+        durations = (self.offset - self.onset) / self.fs
 
         # Maximum Phonation Time
-        mpt = max(durations) if durations else np.nan
+        mpt = np.max(durations) if len(durations) > 0 else np.nan
+
+        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Feature Record ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+        return {'MaxPhonationTime(s)': mpt}
+
+    # Slope: least-squares slope of durations over their repetition number (1, 2, ...) and its direction.
+    # Not Applicable (NaN) unless there are at least 2 distinct durations.
+    def slope(self, durations):
+        if len(np.unique(durations)) < 2:
+            return np.nan, "Not Applicable"
 
-        # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Create DataFrame ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-        dfTimeFeatSV = pd.DataFrame(
-            columns=['MaxPhonationTime(s)'],
-            data=[[mpt]]
-        )
+        slope, _ = np.polyfit(np.arange(1, len(durations) + 1), durations, 1)
 
-        return dfTimeFeatSV
+        # Check the direction of the slope
+        if slope > 0:
+            return slope, "Increasing"
+        elif slope < 0:
+            return slope, "Decreasing"
+        return slope, "Flat"
     
 # %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%% END - TEMPORAL FEATURES %%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 
@@ -579,18 +581,34 @@ def timeFeaturesSV(self):
 # Class: featuresTable() includes:
 # - participantInfo
 # - initDataFrame
+# - acousticFeatures
 # - getFeaturesSV
 # - getFeaturesSR
 # - getFeaturesPR
 
 class featuresTable():
     # INITIALISE:
-    def __init__ (self, dataPath, outputPath, group, speechTest, fmin = [75, 75], fmax = [600, 5000], nPeriods = [3,6]):
+    def __init__ (self, dataPath, outputPath, group, speechTest, fmin = [75, 75], fmax = [600, 5000], nPeriods = [3,6],
+                  filenames = None, files = None, filePaths = None, dfVoiced = None, segmentMode = None):
         self.dataPath, self.outputPath = dataPath, outputPath
         self.group, self.speechTest = group, speechTest
         self.fmin_list, self.fmax_list, self.nPeriods_list = fmin, fmax, nPeriods
-        self.filenames, self.files = preProcessingAudioLongitudinal.open_wav(dataPath, speechTest).openFiles()
-        self.dfVoiced = pd.read_csv(os.path.join(outputPath, 'onsetOffset_' + group + '_' + speechTest + '.csv'))
+        self.segmentMode = segmentMode or SEGMENT_MODE              # Acoustic analysis region: full, concat or segments
+        if self.segmentMode not in ('full', 'concat', 'segments'):
+            raise ValueError(f"Unknown segment mode: {self.segmentMode}. Must be full, concat or segments.")
+
+        # Reuse audio already loaded for voiced detection, otherwise read it from disk (explicit paths or dataPath scan):
+        if files is None:
+            self.filenames, self.files = preProcessingAudioLongitudinal.open_wav(
+                dataPath, speechTest, filePaths, filenames).openFiles()
+        else:
+            self.filenames, self.files = filenames, files
+
+        # Voiced detection results - passed in memory, or read from the .npz hand-off written by voiced detection:
+        if dfVoiced is None:
+            dfVoiced = preProcessingAudioLongitudinal.load_onset_offset(
+                os.path.join(outputPath, 'onsetOffset_' + group + '_' + speechTest + '.npz'))
+        self.dfVoiced = dfVoiced
         self.df = self.participantInfo()
         self.dfFeatures = pd.DataFrame()
 
@@ -601,12 +619,59 @@ def participantInfo(self):
         df['filename'] = self.filenames
         df['test'] = self.speechTest
         return df
+
+    # SAVE FEATURES: write the feature table in the run's table format (skipped without an outputPath, e.g. single-file
+    # pool workers or callers that save the table themselves).
+    def saveFeatures(self):
+        if self.outputPath is not None:
+            preProcessingAudioLongitudinal.write_table(self.dfFeatures, self.outputPath,
+                                                       'features_' + self.group + '_' + self.speechTest)
+
+    # VOICED SEGMENTS: onset and offset sample indices of file j as integer arrays.
+    def voicedSegments(self, j):
+        onset = np.atleast_1d(np.asarray(self.dfVoiced.at[j, 'onset'], dtype=np.int64))
+        offset = np.atleast_1d(np.asarray(self.dfVoiced.at[j, 'offset'], dtype=np.int64))
+        return onset, offset
     
+    # ACOUSTIC FEATURES: Novel Dysphonia and Praat feature records of file j over the region selected by segmentMode.
+    # Falls back to the whole recording when no voiced segment is long enough to analyse.
+    def acousticFeatures(self, j, data, fs):
+        onset, offset = self.voicedSegments(j)
+        keep = (offset - onset) >= MIN_SEGMENT_SEC * fs
+        onset, offset = onset[keep], offset[keep]
+
+        if self.segmentMode == 'full' or len(onset) == 0:
+            regions = [data]
+        elif self.segmentMode == 'concat':
+            regions = [np.concatenate([data[start:stop] for start, stop in zip(onset, offset)])]
+        else:
+            regions = [data[start:stop] for start, stop in zip(onset, offset)]
+
+        novelDysphoniaFeat, praatFeat = [], []
+        for region in regions:
+            novelDysphoniaFeat.append(NovelDysphoniaMeasures(region, fs).novelDysphoniaFeatures())
+            praatFeat.append(Praat(region, fs, fmin=self.fmin_list[0], fmax=self.fmax_list[1]).featuresPraat())
+
+        if len(regions) == 1:
+            return novelDysphoniaFeat[0], praatFeat[0]
+
+        # Per-segment aggregation: duration-weighted mean of each feature over the segments where it is defined:
+        weights = np.array([len(region) for region in regions], dtype=float)
+        return self.weightedMean(novelDysphoniaFeat, weights), self.weightedMean(praatFeat, weights)
+
+    # WEIGHTED MEAN: record with the weighted mean of every feature over the records, ignoring undefined (NaN) values.
+    def weightedMean(self, records, weights):
+        columns = list(records[0])
+        values = np.array([[record[column] for column in columns] for record in records], dtype=float)
+        defined = np.isfinite(values)
+        weightSum = np.sum(np.where(defined, weights[:, None], 0), axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.sum(np.where(defined, values * weights[:, None], 0), axis=0) / weightSum
+        return dict(zip(columns, mean))
+
     # GET FEATURES SV:
     def getFeaturesSV(self):
-        dfNovelDysphonia = pd.DataFrame()  # Novel Dysphonia Feature DataFrame
-        dfPraat = pd.DataFrame()           # Praat Feature DataFrame
-        dfTime = pd.DataFrame()            # Temporal Feature DataFrame 
+        records = []                       # Per-file feature records (MPT, Novel Dysphonia & Praat features)
 
         for j in range(len(self.files)):
             filename = self.filenames[j]
@@ -614,80 +679,54 @@ def getFeaturesSV(self):
 
             # Process the audio file:
             data_list = self.files[j]
-            audioProcess = preProcessingAudioLongitudinal.preProcess_Audio(data_list)
-            data, fs = audioProcess.preProcess_resample()
-
-            # Clean and process the onset and offset fields:
-            onset = self.dfVoiced.loc[j, 'onset'].replace("[", "").replace("]", "").replace("\n", "").replace("  ", " ")
-            offset = self.dfVoiced.loc[j, 'offset'].replace("[", "").replace("]", "").replace("\n", "").replace("  ", " ")
+            data, fs = preProcessingAudioLongitudinal.preprocess_cache.preProcess_resample(data_list)
 
-            # Convert the onset/offset strings to integer lists:
-            onset = [int(s.replace(",", "").strip()) for s in onset.split(' ')]
-            offset = [int(s.replace(",", "").strip()) for s in offset.split(' ')]
+            # Voiced onsets and offsets (integer sample arrays):
+            onset, offset = self.voicedSegments(j)
 
             # Compute Maximum Phonation Time (MPT) only:
-            dfTimeFeat = timeFeatures(fs, onset, offset, diffSignal=None).timeFeaturesSV()
-            dfTime = pd.concat([dfTime, dfTimeFeat])
-
-            # Compute Novel Dysphonia Features:
-            ndm = NovelDysphoniaMeasures(data, fs)
-            dfNovelDysphoniaFeat = ndm.getNovelDysphoniaFeatures()
-            dfNovelDysphonia = pd.concat([dfNovelDysphonia, dfNovelDysphoniaFeat], axis=0)
-
-            # Compute Praat Features:
-            pf = Praat(data, fs, fmin=self.fmin_list[0], fmax=self.fmax_list[1])
-            dfPraatFeat = pf.getFeaturesPraat()
-            dfPraat = pd.concat([dfPraat, dfPraatFeat], axis=0)
-
-        # Combine everything, including dfTime (MPT):
-        self.dfFeatures = pd.concat([
-            self.df.reset_index(drop=True),
-            dfTime.reset_index(drop=True),
-            dfNovelDysphonia.reset_index(drop=True),
-            dfPraat.reset_index(drop=True)
-        ], axis=1)
+            timeFeat = timeFeatures(fs, onset, offset, diffSignal=None).timeFeaturesSV()
+
+            # Compute Novel Dysphonia & Praat Features (whole recording or voiced segments, see segmentMode):
+            novelDysphoniaFeat, praatFeat = self.acousticFeatures(j, data, fs)
+            records.append({**timeFeat, **novelDysphoniaFeat, **praatFeat})
+
+        # Combine everything, including MPT (one DataFrame from all records - growing one per file copies it each time):
+        self.dfFeatures = pd.concat([self.df.reset_index(drop=True), pd.DataFrame(records)], axis=1)
 
         # Save to CSV:
-        self.dfFeatures.to_csv(os.path.join(self.outputPath, 'features_' + self.group + '_' + self.speechTest + '.csv'))
+        self.saveFeatures()
 
         return self.dfFeatures
 
     # GET FEATURES SR:
     def getFeaturesSR(self):
-        dfTime = pd.DataFrame()  # Temporal feature DataFrame
+        records = []             # Per-file temporal feature records
 
         for j in range(len(self.files)):
             filename = self.filenames[j]
             print(j, ':', filename)
 
             data_list = self.files[j]
-            audioProcess = preProcessingAudioLongitudinal.preProcess_Audio(data_list)
-            data, fs = audioProcess.preProcess_resample()
-
-            # Process the onset and offset:
-            onset = self.dfVoiced.loc[j, 'onset'].replace("[", "").replace("]", "").replace("\n", "").replace("  ", " ")
-            offset = self.dfVoiced.loc[j, 'offset'].replace("[", "").replace("]", "").replace("\n", "").replace("  ", " ")
+            data, fs = preProcessingAudioLongitudinal.preprocess_cache.preProcess_resample(data_list)
 
-            # Strip any leading/trailing spaces and convert the strings into lists of integers:
-            onset = [int(s.replace(",", "").strip()) for s in onset.split(' ')]
-            offset = [int(s.replace(",", "").strip()) for s in offset.split(' ')]
+            # Voiced onsets and offsets (integer sample arrays):
+            onset, offset = self.voicedSegments(j)
 
             # Temporal features:
-            dfTimeFeat = timeFeatures(fs, onset, offset, diffSignal=np.subtract(offset, onset) / fs).timeFeaturesSR()
-            dfTime = pd.concat([dfTime, dfTimeFeat])
+            timeFeat = timeFeatures(fs, onset, offset, diffSignal=np.subtract(offset, onset) / fs).timeFeaturesSR()
+            records.append(timeFeat)
 
         # Final DataFrame with temporal features:
-        self.dfFeatures = pd.concat([self.df, dfTime.reset_index(drop=True)], axis=1)
+        self.dfFeatures = pd.concat([self.df, pd.DataFrame(records)], axis=1)
         self.dfFeatures = self.dfFeatures.loc[:, ~self.dfFeatures.columns.str.contains('^Unnamed')]
-        self.dfFeatures.to_csv(os.path.join(self.outputPath, 'features_' + self.group + '_' + self.speechTest + '.csv'))
+        self.saveFeatures()
 
         return self.dfFeatures
     
     # GET FEATURES PR:
     def getFeaturesPR(self):
-        dfTime = pd.DataFrame()                 # Temporal Feature DataFrame
-        dfNovelDysphonia = pd.DataFrame()       # Novel Dysphonia Feature DataFrame
-        dfPraat = pd.DataFrame()                # Praat Feature DataFrame
+        records = []                            # Per-file feature records (Temporal, Novel Dysphonia & Praat features)
 
         for j in range(len(self.files)):
             filename = self.filenames[j]
@@ -695,43 +734,26 @@ def getFeaturesPR(self):
 
             # Process the audio file:
             data_list = self.files[j]
-            audioProcess = preProcessingAudioLongitudinal.preProcess_Audio(data_list)
-            data, fs = audioProcess.preProcess_resample()
+            data, fs = preProcessingAudioLongitudinal.preprocess_cache.preProcess_resample(data_list)
 
-            # Process the onset and offset:
-            onset = self.dfVoiced.loc[j, 'onset'].replace("[", "").replace("]", "").replace("\n", "").replace("  ", " ")
-            offset = self.dfVoiced.loc[j, 'offset'].replace("[", "").replace("]", "").replace("\n", "").replace("  ", " ")
-
-            # Strip any leading/trailing spaces and convert the strings into lists of integers:
-            onset = [int(s.replace(",", "").strip()) for s in onset.split(' ')]
-            offset = [int(s.replace(",", "").strip()) for s in offset.split(' ')]
+            # Voiced onsets and offsets (integer sample arrays):
+            onset, offset = self.voicedSegments(j)
 
             # Temporal features for Passage Reading:
-            dfTimeFeat = timeFeatures(fs, onset, offset, diffSignal=np.subtract(offset, onset) / fs).timeFeaturesPR()
-            dfTime = pd.concat([dfTime, dfTimeFeat])
+            timeFeat = timeFeatures(fs, onset, offset, diffSignal=np.subtract(offset, onset) / fs).timeFeaturesPR()
 
-            # Compute Novel Dysphonia Features:
-            ndm = NovelDysphoniaMeasures(data, fs)
-            dfNovelDysphoniaFeat = ndm.getNovelDysphoniaFeatures()  # GNE, SD_MFCC, SD_Delta, SD_Delta2
+            # Compute Novel Dysphonia (GNE, SD_MFCC, SD_Delta, SD_Delta2) & Praat Features (whole recording or voiced
+            # segments, see segmentMode):
+            novelDysphoniaFeat, praatFeat = self.acousticFeatures(j, data, fs)
             
-            # Concatenate the Novel Dysphonia features to the DataFrame:
-            dfNovelDysphonia = pd.concat([dfNovelDysphonia, dfNovelDysphoniaFeat], axis=0)
-
-            # Compute Praat Features:
-            pf = Praat(data, fs, fmin=self.fmin_list[0], fmax=self.fmax_list[1])
-            dfPraatFeat = pf.getFeaturesPraat()  
-            dfPraat = pd.concat([dfPraat, dfPraatFeat], axis=0)
-
-        # DataFrame Concatenation:
-        self.dfFeatures = pd.concat([
-            self.df, 
-            dfTime.reset_index(drop=True), 
-            dfNovelDysphonia.reset_index(drop=True), 
-            dfPraat.reset_index(drop=True) 
-        ], axis=1)
+            # Collect the file's features as one record:
+            records.append({**timeFeat, **novelDysphoniaFeat, **praatFeat})
+
+        # DataFrame Assembly (once, from all records):
+        self.dfFeatures = pd.concat([self.df, pd.DataFrame(records)], axis=1)
     
         # Save the features to a CSV file
-        self.dfFeatures.to_csv(os.path.join(self.outputPath, 'features_' + self.group + '_' + self.speechTest + '.csv'))
+        self.saveFeatures()
 
         return self.dfFeatures
 
@@ -0,0 +1,114 @@
+# Benchmark of feature table assembly for N files: growing the tables with pd.concat per file (the original getFeatures*
+# and n_devices > 1 df_rms code) against collecting plain records and building each DataFrame once. The per-file rows
+# are real feature values computed once, so only the table assembly is timed; the cost per file should stay flat with
+# records and grow with N with per-file concat.
+# Usage: python benchmarks/bench_feature_records.py [--files 1000 2000 4000 8000] [--repeats 1]
+import argparse
+import os
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault("NEURALLY_NO_LOG", "1")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "HD"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tests"))
+import speechFeaturesAcousticLongitudinal as sf
+from test_novel_dysphonia import voiced
+
+
+def best_time(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+# One file's feature parts per speech test: (time features, Novel Dysphonia features, Praat features).
+def feature_parts(fs=44100):
+    data = voiced(0, 2)
+    acoustic = (sf.NovelDysphoniaMeasures(data, fs).novelDysphoniaFeatures(),
+                sf.Praat(data, fs, fmin=75, fmax=5000).featuresPraat())
+    onset = np.arange(0, 8 * fs, fs // 2)
+    offset = onset + fs // 4
+    diff = (offset - onset) / fs
+    return {
+        'SV': (sf.timeFeatures(fs, onset[:1], offset[:1], None).timeFeaturesSV(), *acoustic),
+        'SR': (sf.timeFeatures(fs, onset, offset, diff).timeFeaturesSR(), {}, {}),
+        'PR': (sf.timeFeatures(fs, onset, offset, diff).timeFeaturesPR(), *acoustic),
+    }
+
+
+# Original assembly: each table grows by one row per file, then the tables are joined column-wise.
+def features_concat(info, parts):
+    tables = [pd.DataFrame() for _ in parts]
+    for _ in range(len(info)):
+        for i, part in enumerate(parts):
+            if part:
+                tables[i] = pd.concat([tables[i], pd.DataFrame([part])], axis=0)
+    return pd.concat([info] + [table.reset_index(drop=True) for table in tables], axis=1)
+
+
+# Records: one dictionary per file, one DataFrame at the end.
+def features_records(info, parts):
+    records = []
+    for _ in range(len(info)):
+        records.append({key: value for part in parts for key, value in part.items()})
+    return pd.concat([info, pd.DataFrame(records)], axis=1)
+
+
+# Original df_rms with several devices: one row appended per matching recording.
+def rms_concat(pIDs):
+    df_rms = pd.DataFrame(columns=['pID', 'meanRMS', 'rms_slope'])
+    for pID in pIDs:
+        new_row = pd.DataFrame({'pID': [pID], 'meanRMS': [0.05], 'rms_slope': [-1e-3]})
+        df_rms = pd.concat([df_rms, new_row], ignore_index=True)
+    return df_rms
+
+
+def rms_records(pIDs):
+    rms_rows = []
+    for pID in pIDs:
+        rms_rows.append({'pID': pID, 'meanRMS': 0.05, 'rms_slope': -1e-3})
+    return pd.DataFrame(rms_rows, columns=['pID', 'meanRMS', 'rms_slope'])
+
+
+def same(a, b):
+    try:
+        pd.testing.assert_frame_equal(a.reset_index(drop=True), b, check_dtype=False)
+        return True
+    except AssertionError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-file pd.concat against records for feature tables.")
+    parser.add_argument('--files', type=int, nargs='+', default=[1000, 2000, 4000, 8000])
+    parser.add_argument('--repeats', type=int, default=1)
+    args = parser.parse_args()
+    warnings.simplefilter('ignore', FutureWarning)                  # Concatenating onto the empty starting frames
+
+    parts = feature_parts()
+    print("Table assembly for N files: seconds (microseconds per file), and whether both paths give the same table")
+    print(f"{'':14s} {'N':>6s}  {'per-file concat':>22s}  {'records':>20s}  same")
+    for n in args.files:
+        names = [f"p{i:05d}_SR1" for i in range(n)]
+        info = pd.DataFrame({'filename': names})
+        cases = [(f"getFeatures{test}", lambda p=parts[test]: features_concat(info, p),
+                  lambda p=parts[test]: features_records(info, p)) for test in ('SV', 'SR', 'PR')]
+        cases.append(("df_rms", lambda: rms_concat(names), lambda: rms_records(names)))
+
+        for name, old, new in cases:
+            t_old, df_old = best_time(old, args.repeats)
+            t_new, df_new = best_time(new, args.repeats)
+            print(f"{name:14s} {n:6d}  {t_old:8.2f} s ({t_old / n * 1e6:6.0f} us)  "
+                  f"{t_new:6.2f} s ({t_new / n * 1e6:6.0f} us)  {same(df_old, df_new)}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Peak-memory benchmark for loading and pre-processing one long recording: whole-signal against block-wise
+# pre-processing (NEURALLY_BLOCK_SECONDS), with the output in memory or written to the on-disk pre-processing cache.
+# Each configuration runs in a fresh process, so ru_maxrss is its own peak (Linux/macOS only) - the parent keeps its own
+# memory small (ru_maxrss carries over into the child). With the disk cache the peak should stay flat as the recording
+# grows; the other configurations keep the whole output in memory.
+# Usage: python benchmarks/bench_preprocess_memory.py [--minutes 10 20 40 60] [--fs 44100] [--new-fs 44100]
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+HD = Path(__file__).resolve().parents[1] / "HD"
+
+
+# Write minutes of int16 noise one block at a time.
+def write_wav(path, fs, minutes, block=2 ** 22):
+    rng = np.random.default_rng(0)
+    n = int(minutes * 60 * fs)
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(fs)
+        for start in range(0, n, block):
+            f.writeframes((rng.standard_normal(min(block, n - start)) * 3000).astype('<i2').tobytes())
+
+
+# Largest absolute difference between two outputs, compared a block at a time.
+def max_abs_diff(a, b, block=2 ** 22):
+    if a.shape != b.shape:
+        return np.inf
+    return max((float(np.max(np.abs(a[i:i + block] - b[i:i + block]))) for i in range(0, len(a), block)), default=0.0)
+
+
+def run_one(wav, new_fs, save, reference):
+    os.environ.setdefault("NEURALLY_NO_LOG", "1")
+    sys.path.insert(0, str(HD))
+    import preProcessingAudioLongitudinal as pp
+
+    start = time.perf_counter()
+    _, files = pp.open_wav(None, 'SV', [wav], ['benchmark']).openFiles()
+    data, fs = pp.preprocess_cache.preProcess_resample(files[0], new_fs=new_fs)
+    elapsed = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform != 'darwin' else 1024 ** 2)
+    if save:
+        np.save(save, data)
+    diff = max_abs_diff(data, np.load(reference, mmap_mode='r')) if reference else 0.0
+    print(f"{peak:.0f} {elapsed:.2f} {diff:.1e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak memory of whole-signal and block-wise pre-processing.")
+    parser.add_argument('--minutes', type=float, nargs='+', default=[10, 20, 40, 60])
+    parser.add_argument('--fs', type=int, default=44100)
+    parser.add_argument('--new-fs', type=int, default=44100)
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    parser.add_argument('--save', help=argparse.SUPPRESS)
+    parser.add_argument('--reference', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        return run_one(args.run, args.new_fs, args.save, args.reference)
+
+    names = ["whole signal", "block-wise", "block-wise, disk cache"]
+    print(f"{args.fs} Hz -> {args.new_fs} Hz, peak RSS in MB (seconds) / max abs difference from whole signal")
+    print(f"{'minutes':>8s}" + "".join(f"  {name:>30s}" for name in names))
+    for minutes in args.minutes:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            wav, reference = tmp / "benchmark_SV.wav", tmp / "whole.npy"
+            write_wav(wav, args.fs, minutes)
+
+            # The whole-signal output is the reference the other configurations are compared with:
+            configs = [({"NEURALLY_BLOCK_SECONDS": "0"}, ['--save', str(reference)]),
+                       ({}, ['--reference', str(reference)]),
+                       ({"NEURALLY_PREPROCESS_CACHE_DIR": str(tmp / "cache")}, ['--reference', str(reference)])]
+            row = f"{minutes:8g}"
+            for env, options in configs:
+                proc = subprocess.run(
+                    [sys.executable, __file__, '--new-fs', str(args.new_fs), '--run', str(wav), *options],
+                    env={**os.environ, **env}, capture_output=True, text=True, check=True)
+                peak, elapsed, diff = proc.stdout.split()
+                row += f"  {f'{peak} ({elapsed} s) / {diff}':>30s}"
+            print(row, flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Benchmark of the resampling tiers (res_type / NEURALLY_RESAMPLE) on 48 kHz input: the time each tier takes to resample
+# to 44.1 kHz, and how far the downstream features of each tier are from the kaiser_best reference.
+# Recordings that are not at --fs are converted to it first (polyphase, written as 16-bit WAV), so every tier resamples.
+# The speech test of each recording (SV, SR or PR) is taken from its file name, as in the app.
+# Usage: python benchmarks/bench_resample_tiers.py recording_SV.wav [recording_PR.wav ...] [--fs 48000] [--repeats 3]
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import signal
+from scipy.io import wavfile
+
+os.environ.setdefault("NEURALLY_NO_LOG", "1")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "HD"))
+import audioProcessingHDLongitudinal as ap
+import preProcessingAudioLongitudinal as pp
+
+TIERS = ['kaiser_best', 'soxr_hq', 'polyphase']                                 # Reference First
+
+
+def speech_test(path):
+    for test in ('SV', 'SR', 'PR'):
+        if test in Path(path).name:
+            return test
+    raise SystemExit(f"{path}: the file name must contain SV, SR or PR.")
+
+
+# Write a copy of the recording at fs (int16), or return it unchanged when it already is at fs.
+def at_rate(path, fs, tmp):
+    orig_fs, raw = wavfile.read(path)
+    if orig_fs == fs:
+        return Path(path)
+    ratio = math.gcd(fs, orig_fs)
+    data = signal.resample_poly(raw.astype(np.float64), fs // ratio, orig_fs // ratio, axis=0)
+    out = Path(tmp) / Path(path).name
+    wavfile.write(out, fs, np.clip(np.round(data), -32768, 32767).astype(np.int16))
+    return out
+
+
+def best_time(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# Relative deviation of every numeric feature from the reference (NaN when the reference is 0 or either is NaN).
+def relative_deviation(df, reference):
+    columns = [c for c in reference.columns if pd.api.types.is_numeric_dtype(reference[c]) and c in df.columns]
+    ref = reference[columns].astype(float).to_numpy()
+    value = df[columns].astype(float).to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deviation = np.where(ref != 0, np.abs(value - ref) / np.abs(ref), np.where(value == ref, 0.0, np.nan))
+    return pd.DataFrame(deviation, columns=columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark resampling tiers: resampling time and feature deviation.")
+    parser.add_argument('recordings', nargs='+')
+    parser.add_argument('--fs', type=int, default=48000)
+    parser.add_argument('--new-fs', type=int, default=44100)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        features = {tier: {} for tier in TIERS}
+        print(f"Resampling time, {args.fs} Hz -> {args.new_fs} Hz (best of {args.repeats}):")
+        for recording in args.recordings:
+            test, path = speech_test(recording), at_rate(recording, args.fs, tmp)
+            _, (file,) = pp.open_wav(None, test, [path], [path.stem]).openFiles()
+            row = f"  {path.name:24s} {len(file[0]) / file[1]:6.1f} s"
+
+            for tier in TIERS:
+                audio = pp.preProcess_Audio(file, new_fs=args.new_fs, res_type=tier)
+                data = audio.data
+                row += f"  {tier} {best_time(lambda: audio.resample(data), args.repeats):7.3f} s"
+
+                # Downstream features with this tier (the pre-processing cache keys on the tier):
+                pp.RESAMPLE_TYPE = tier
+                _, df, _, _, _ = ap.process_file(str(path), path.stem, test)
+                features[tier].setdefault(test, []).append(df)
+            print(row, flush=True)
+
+        print("\nRelative deviation of the features from kaiser_best (median / worst feature):")
+        for tier in TIERS[1:]:
+            for test, frames in features[tier].items():
+                deviation = relative_deviation(pd.concat(frames, ignore_index=True),
+                                               pd.concat(features[TIERS[0]][test], ignore_index=True))
+                worst = deviation.max()
+                print(f"  {tier:10s} {test}: median {np.nanmedian(deviation.to_numpy()):.1e}, "
+                      f"worst {worst.max():.1e} ({worst.idxmax() if worst.notna().any() else '-'})")
+                for feature, value in worst.sort_values(ascending=False).items():
+                    print(f"      {feature:28s} {value:.1e}")
+
+
+if __name__ == "__main__":
+    main()
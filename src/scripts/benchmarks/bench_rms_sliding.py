@@ -0,0 +1,48 @@
+# Micro-benchmark for signalDetection.RMS_sliding on a 30 s, 44.1 kHz recording, against the original per-sample loop.
+# Usage: python benchmarks/bench_rms_sliding.py [--seconds 30] [--fs 44100] [--repeats 3]
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault("NEURALLY_NO_LOG", "1")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "HD"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tests"))
+import preProcessingAudioLongitudinal as pp
+from test_rms_sliding import rms_sliding_loop
+
+
+def best_time(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RMS_sliding against the original per-sample loop.")
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--fs', type=int, default=44100)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal(int(args.seconds * args.fs)) * 0.1
+    detector = pp.signalDetection(data, args.fs, 'benchmark')
+
+    t_new, new = best_time(detector.RMS_sliding, args.repeats)
+    t_old, old = best_time(lambda: rms_sliding_loop(data, args.fs), 1)
+
+    print(f"{args.seconds:g} s at {args.fs} Hz ({len(data)} samples)")
+    print(f"  per-sample loop : {t_old:8.3f} s")
+    print(f"  RMS_sliding     : {t_new:8.3f} s  ({t_old / t_new:.0f}x)")
+    print(f"  identical       : {np.array_equal(new, old)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,46 @@ import sys
 import json
 from pathlib import Path
 import time
-import shutil
+import contextlib
+import math
+import numbers
 
 sys.path.append(str(Path(__file__).parent / "HD"))
 import HD.audioProcessingHDLongitudinal as audio_processing
 
 TEST_TYPES = ["SV", "SR", "PR"]
 VALID_EXTENSIONS = ['.wav']
+PLOT_DPI = 150                                  # Default resolution of the (fast-mode) detection plots
+
+def finite_json(value):
+    """Replace non-finite numbers (NaN, Infinity) with None and numpy scalars with plain numbers, recursively"""
+    if isinstance(value, dict):
+        return {key: finite_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [finite_json(item) for item in value]
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        value = float(value)
+        return value if math.isfinite(value) else None
+    return value
+
+def to_json(message):
+    """Strict JSON (no NaN/Infinity tokens), as JSON.parse in the Electron front end expects"""
+    return json.dumps(finite_json(message), allow_nan=False)
+
+def pop_int_option(argv, flag):
+    """Remove "flag N" from argv and return N as a positive int (None when the flag is absent)"""
+    if flag not in argv:
+        return None
+    i = argv.index(flag)
+    value = argv[i + 1] if i + 1 < len(argv) else ""
+    del argv[i:i + 2]
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError(f"{flag} needs a positive whole number, got {value!r}")
+    return int(value)
 
 def validate_audio_file(file_path):
     """Audio file validation"""
@@ -43,79 +76,74 @@ def validate_audio_file(file_path):
 
     return True, "File is valid"
 
-def setup_temp_directory(file_paths, test_type, output_dir):
-    """Setup temporary directory for processing"""
-    temp_dir = output_dir / "temp"
-    temp_dir.mkdir(parents=True, exist_ok=True)
-    
-    for i, file_path in enumerate(file_paths):
-        unique_name = f"{test_type}_{i+1}_{Path(file_path).name}"
-        temp_file = temp_dir / unique_name
-        shutil.copy2(file_path, temp_file)
-
-
-
-    return temp_dir
-
-def process_sv_files(file_paths, output_dir):
-    """Process Sustained Vowel files (single or multiple) using existing HD capabilities"""
-
-    speechTestType = "SV"
-
+def get_file_names(file_paths, test_type):
+    """Unique per-job names for the selected files (used for feature rows and plot files)"""
+    return [f"{test_type}_{i+1}_{Path(file_path).stem}" for i, file_path in enumerate(file_paths)]
+
+def get_file_result(file_path, name, df_file, plot_dir, error=None):
+    """Result entry for one file: its features (or error) and detection plot"""
+    file_result = {
+        "filename": Path(file_path).name,
+        "original_path": str(file_path),
+        "status": "success" if error is None else "error"
+    }
+
+    if error is not None:
+        file_result["error"] = error
+    elif df_file is not None and len(df_file) > 0:
+        file_result["features"] = df_file.iloc[0].to_dict()
+
+    # Plots are named after the unique per-job file name:
+    if plot_dir is not None and (plot_dir / f"{name}.png").exists():
+        file_result["plot_path"] = str((plot_dir / f"{name}.png").absolute())
+
+    return file_result
+
+def run_batch(file_paths, output_dir, speechTestType, plot=True, plot_dpi=PLOT_DPI, workers=None, on_event=None):
+    """Pre-process -> detect -> features per file, spread over the worker processes; returns the file results in input
+    order and the result store hit/miss counts (only with NEURALLY_RESULT_STORE set are unchanged files answered from
+    the store - by default every file is analysed). With on_event every file result is also sent as a "file" event as
+    soon as it is ready (with stage timings), and a failing file no longer stops the rest of the batch"""
+    group = "Multiple" if len(file_paths) > 1 else "Single"
+    figPath = str(output_dir) if plot else None
+    names = get_file_names(file_paths, speechTestType)
+    file_results = [None] * len(file_paths)
+    result_cache = {"hits": 0, "misses": 0}
+
+    def on_result(i, df_file, timings, error, cached):
+        file_results[i] = get_file_result(file_paths[i], names[i], df_file, output_dir if plot else None, error)
+        result_cache["hits" if cached else "misses"] += 1
+        if on_event is not None:
+            on_event({"event": "file", "test_type": speechTestType, "index": i, "total_files": len(file_paths),
+                      "file": file_results[i], "timings": timings, "cached": cached})
+
+    audio_processing.process_files(
+        file_paths, names, speechTestType, str(output_dir), group, figPath, n_workers=workers, plotMode='fast',
+        dpi=plot_dpi, on_result=on_result, keep_going=on_event is not None,
+        store=audio_processing.result_store_path())
+
+    return file_results, result_cache
+
+def process_test_files(file_paths, output_dir, test_type, plot=True, plot_dpi=PLOT_DPI, workers=None, on_event=None):
+    """Process the files (single or multiple) of one test type (SV, SR, PR) using existing HD capabilities"""
     try:
-        temp_dir = setup_temp_directory(file_paths, speechTestType, output_dir)
-
-        dataPath = str(temp_dir)
-        group = "Multiple" if len(file_paths) > 1 else "Single"
-        figPath = str(output_dir)
-
-        filenames, files = audio_processing.load_audio_files(dataPath, speechTestType)
-        audio_processing.process_voiced_detection(files, filenames, speechTestType, str(output_dir), group, figPath)
-        df = audio_processing.process_feature_estimation(dataPath, str(output_dir), group, speechTestType)
-
-        shutil.rmtree(temp_dir)
-
-        # Get all plot files and match them to original files
-        plot_files = list(output_dir.glob("*.png"))
-        
-        results = {
+        files, result_cache = run_batch(file_paths, output_dir, test_type, plot, plot_dpi, workers, on_event)
+        return {
             "status": "success",
-            "test_type": "SV",
+            "test_type": test_type,
             "total_files": len(file_paths),
-            "files": []
+            "files": files,
+            "failed_files": sum(1 for file in files if file["status"] == "error"),
+            "result_cache": result_cache
         }
 
-        for i, file_path in enumerate(file_paths):
-            original_filename = Path(file_path).stem  # filename without extension
-            file_result = {
-                "filename": Path(file_path).name,
-                "original_path": str(file_path),
-                "status": "success"
-            }
-            
-            if i < len(df):
-                file_result["features"] = df.iloc[i].to_dict()
-            
-            # Find the plot file that matches this original filename
-            matching_plot = None
-            for plot_file in plot_files:
-                if original_filename in plot_file.stem:
-                    matching_plot = plot_file
-                    break
-            
-            if matching_plot:
-                file_result["plot_path"] = str(matching_plot.absolute())
-            
-            results["files"].append(file_result)
-
-        return results
-
     except Exception as e:
-        return {"error": f"SV processing failed: {str(e)}"}
-
+        return {"error": f"{test_type} processing failed: {str(e)}"}
 
-def process_audio_files(file_paths, test_type):
-    """Process audio files (single or multiple) for specific test type (SV, SR, PR)"""
+def process_audio_files(file_paths, test_type, plot=True, plot_dpi=PLOT_DPI, workers=None, on_event=None):
+    """Process audio files (single or multiple) for specific test type (SV, SR, PR); plot=False skips the detection plots,
+    workers sets the number of files processed in parallel (default: NEURALLY_WORKERS or one per CPU core) and on_event
+    receives a "file" event per file as soon as it is processed"""
     try:
         if isinstance(file_paths, str):
             file_paths = [file_paths]
@@ -134,12 +162,7 @@ def process_audio_files(file_paths, test_type):
 
         start_time = time.time()
 
-        if test_type == 'SV':
-            result = process_sv_files(file_paths, output_dir)
-        elif test_type == 'SR':
-            result = process_sr_files(file_paths, output_dir)
-        elif test_type == 'PR':
-            result = process_pr_files(file_paths, output_dir)
+        result = process_test_files(file_paths, output_dir, test_type, plot, plot_dpi, workers, on_event)
 
         end_time = time.time()
         elapsed = end_time - start_time
@@ -150,137 +173,101 @@ def process_audio_files(file_paths, test_type):
     except Exception as e:
         return {"error": f"Error processing files: {str(e)}"}
 
-def process_sr_files(file_paths, output_dir):
-    """Process Syllable Repetition files (single or multiple) using existing HD capabilities"""
+def run_worker():
+    """Long-lived worker: read JSON-line jobs from stdin and answer each with one JSON line on stdout"""
+    protocol_out = sys.stdout
 
-    speechTestType = "SR"
+    def send(message):
+        protocol_out.write(to_json(message) + "\n")
+        protocol_out.flush()
 
-    try:
-        temp_dir = setup_temp_directory(file_paths, speechTestType, output_dir)
+    # Signal that the scientific stack is imported and jobs can be accepted:
+    send({"event": "ready"})
 
-        dataPath = str(temp_dir)
-        group = "Multiple" if len(file_paths) > 1 else "Single"
-        figPath = str(output_dir)
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
 
-        filenames, files = audio_processing.load_audio_files(dataPath, speechTestType)
-        audio_processing.process_voiced_detection(files, filenames, speechTestType, str(output_dir), group, figPath)
-        df = audio_processing.process_feature_estimation(dataPath, str(output_dir), group, speechTestType)
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as e:
+            send({"id": None, "result": {"error": f"Invalid job: {str(e)}"}})
+            continue
 
-        shutil.rmtree(temp_dir)
+        if not isinstance(job, dict):
+            send({"id": None, "result": {"error": f"Invalid job: expected a JSON object, got {type(job).__name__}"}})
+            continue
 
-        # Get all plot files and match them to original files
-        plot_files = list(output_dir.glob("*.png"))
-        
-        results = {
-            "status": "success",
-            "test_type": "SR",
-            "total_files": len(file_paths),
-            "files": []
-        }
+        # Streaming jobs also get one {"id", "event": "file", ...} line per file before the final result:
+        on_event = None
+        if job.get("stream"):
+            on_event = lambda event, job_id=job.get("id"): send({"id": job_id, **event})
 
-        for i, file_path in enumerate(file_paths):
-            original_filename = Path(file_path).stem  # filename without extension
-            file_result = {
-                "filename": Path(file_path).name,
-                "original_path": str(file_path),
-                "status": "success"
-            }
-            
-            if i < len(df):
-                file_result["features"] = df.iloc[i].to_dict()
-            
-            # Find the plot file that matches this original filename
-            matching_plot = None
-            for plot_file in plot_files:
-                if original_filename in plot_file.stem:
-                    matching_plot = plot_file
-                    break
-            
-            if matching_plot:
-                file_result["plot_path"] = str(matching_plot.absolute())
-            
-            results["files"].append(file_result)
-
-        return results
+        # Keep progress prints from the HD modules off the protocol channel:
+        with contextlib.redirect_stdout(sys.stderr):
+            result = process_audio_files(job.get("file_paths"), job.get("test_type"),
+                                         plot=job.get("plot", True), plot_dpi=job.get("plot_dpi", PLOT_DPI),
+                                         workers=job.get("workers"), on_event=on_event)
 
-    except Exception as e:
-        return {"error": f"SR processing failed: {str(e)}"}
+        send({"id": job.get("id"), "result": result})
 
-def process_pr_files(file_paths, output_dir):
-    """Process Paragraph Reading files (single or multiple) using existing HD capabilities"""
-    speechTestType = "PR"
-    
+def main():
+    if len(sys.argv) == 2 and sys.argv[1] == '--worker':
+        run_worker()
+        return
+
+    # Optional flags: skip the detection plots / stream newline-delimited JSON events / worker count / plot resolution
+    plot = '--no-plot' not in sys.argv
+    stream = '--stream' in sys.argv
+    argv = [arg for arg in sys.argv if arg not in ('--no-plot', '--stream')]
     try:
-        temp_dir = setup_temp_directory(file_paths, speechTestType, output_dir)
-        
-        dataPath = str(temp_dir)
-        group = "Multiple" if len(file_paths) > 1 else "Single"
-        figPath = str(output_dir)
-        
-        filenames, files = audio_processing.load_audio_files(dataPath, speechTestType)
-        audio_processing.process_voiced_detection(files, filenames, speechTestType, str(output_dir), group, figPath)
-        df = audio_processing.process_feature_estimation(dataPath, str(output_dir), group, speechTestType)
-        
-        shutil.rmtree(temp_dir)
-        
-        # Get all plot files and match them to original files
-        plot_files = list(output_dir.glob("*.png"))
-        
-        results = {
-            "status": "success",
-            "test_type": "PR",
-            "total_files": len(file_paths),
-            "files": []
-        }
-        
-        for i, file_path in enumerate(file_paths):
-            original_filename = Path(file_path).stem  # filename without extension
-            file_result = {
-                "filename": Path(file_path).name,
-                "original_path": str(file_path),
-                "status": "success"
-            }
-            
-            if i < len(df):
-                file_result["features"] = df.iloc[i].to_dict()
-            
-            # Find the plot file that matches this original filename
-            matching_plot = None
-            for plot_file in plot_files:
-                if original_filename in plot_file.stem:
-                    matching_plot = plot_file
-                    break
-            
-            if matching_plot:
-                file_result["plot_path"] = str(matching_plot.absolute())
-            
-            results["files"].append(file_result)
-        
-        return results
-        
-    except Exception as e:
-        return {"error": f"PR processing failed: {str(e)}"}
+        workers = pop_int_option(argv, '--workers')
+        plot_dpi = pop_int_option(argv, '--plot-dpi') or PLOT_DPI
+    except ValueError as e:
+        print(to_json({"error": str(e)}))
+        sys.exit(1)
 
-def main():
-    if len(sys.argv) < 3:
+    if len(argv) < 3:
         print("Usage: python main.py <test_type> <file_path>")
         print("Usage: python main.py <test_type> --multiple <file_path1|file_path2|...>")
+        print("       (add --no-plot to skip the detection plots, --stream for one JSON line per file")
+        print("        followed by a summary line, --workers N for the files processed in parallel,")
+        print(f"        --plot-dpi N for the plot resolution - default {PLOT_DPI})")
+        print("       (set NEURALLY_RESULT_STORE=/path/to/result_store.sqlite to reuse the results of unchanged files)")
+        print("Usage: python main.py --worker")
         print(f"Test types: {', '.join(TEST_TYPES)}")
         print("File format: WAV only")
         print("Examples:")
         print("  python main.py SV /path/to/audio.wav")
         print("  python main.py SV --multiple /path1.wav|/path2.wav|/path3.wav")
+        print("  python main.py SV --stream --workers 4 --multiple /path1.wav|/path2.wav")
+        print('  python main.py --worker   (then send jobs as JSON lines, e.g. {"id": 1, "test_type": "SV", "file_paths": ["/path1.wav"], "plot": true, "plot_dpi": 150, "workers": 4, "stream": true})')
         sys.exit(1)
     
-    test_type = sys.argv[1]
+    test_type = argv[1]
     
-    if len(sys.argv) > 3 and sys.argv[2] == '--multiple':
-        file_paths = sys.argv[3].split('|')
+    if len(argv) > 3 and argv[2] == '--multiple':
+        file_paths = argv[3].split('|')
     else:
-        file_paths = sys.argv[2]
+        file_paths = argv[2]
     
-    result = process_audio_files(file_paths, test_type)
-    print(json.dumps(result))
+    if stream:
+        protocol_out = sys.stdout
+
+        def send(message):
+            protocol_out.write(to_json(message) + "\n")
+            protocol_out.flush()
+
+        # Only events go to stdout; progress prints from the HD modules go to stderr:
+        with contextlib.redirect_stdout(sys.stderr):
+            result = process_audio_files(file_paths, test_type, plot=plot, plot_dpi=plot_dpi, workers=workers,
+                                         on_event=send)
+        send({"event": "summary", "result": result})
+        return
+
+    result = process_audio_files(file_paths, test_type, plot=plot, plot_dpi=plot_dpi, workers=workers)
+    print(to_json(result))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,8 @@
+# Test set-up: make the HD modules importable the way main.py and the HD scripts import them, with logging disabled.
+import os
+import sys
+from pathlib import Path
+
+os.environ.setdefault("NEURALLY_NO_LOG", "1")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "HD"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
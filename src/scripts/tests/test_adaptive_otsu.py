@@ -0,0 +1,72 @@
+# Regression test for signalDetection.adaptive_thresholding_with_overlap: the batched Otsu thresholds must match
+# skimage.filters.threshold_otsu applied to each window (the original loop) to floating-point rounding. The batched
+# thresholds are computed in float64: for float32 windows skimage evaluates the Otsu criterion in float32, so near-ties
+# can go to the neighbouring histogram bin - there they match threshold_otsu of the window in float64, and skimage's
+# float32 result to within one bin. Detection passes float64 envelopes (TKEO).
+import numpy as np
+import pytest
+from skimage.filters import threshold_otsu
+
+import preProcessingAudioLongitudinal as pp
+
+
+# Reference: the original per-window loop.
+def otsu_loop(envelope, window_length, overlap_ratio):
+    step_size = int(window_length * (1 - overlap_ratio))
+    return np.array([threshold_otsu(envelope[start:start + window_length])
+                     for start in range(0, len(envelope) - window_length + 1, step_size)])
+
+
+# A smoothed, positive speech-like envelope: bursts of energy over a noise floor.
+def envelope(seed, n=20000):
+    rng = np.random.default_rng(seed)
+    bursts = np.repeat(rng.uniform(0, 1, n // 500) > 0.5, 500)[:n] * rng.uniform(0.2, 1)
+    data = np.abs(bursts + 0.02 * rng.standard_normal(n))
+    return np.convolve(data, np.ones(25) / 25, mode='same')
+
+
+def thresholds(data, window_length, overlap_ratio):
+    return pp.signalDetection(np.zeros(2), 1000, 'test').adaptive_thresholding_with_overlap(
+        data, window_length, overlap_ratio)
+
+
+# Histogram bin width of every window (256 bins over the window's own range).
+def bin_widths(data, window_length, overlap_ratio):
+    windows = np.lib.stride_tricks.sliding_window_view(data, window_length)[::int(window_length * (1 - overlap_ratio))]
+    return (windows.max(axis=1).astype(np.float64) - windows.min(axis=1)) / 256
+
+
+def check_thresholds(data, window_length, overlap_ratio):
+    actual = thresholds(data, window_length, overlap_ratio)
+    expected = otsu_loop(data, window_length, overlap_ratio)
+    assert actual.shape == expected.shape
+
+    if data.dtype == np.float64:
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=0)
+    else:
+        np.testing.assert_allclose(actual, otsu_loop(data.astype(np.float64), window_length, overlap_ratio),
+                                   rtol=1e-12, atol=0)
+        np.testing.assert_array_less(np.abs(actual - expected), 1.01 * bin_widths(data, window_length, overlap_ratio)
+                                     + np.finfo(np.float32).eps)
+    return actual
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("window_length, overlap_ratio", [(400, 0.5), (1000, 0.75), (333, 0)])
+def test_envelope_matches_otsu(seed, dtype, window_length, overlap_ratio):
+    check_thresholds(envelope(seed).astype(dtype), window_length, overlap_ratio)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_constant_and_step_windows(dtype):
+    # Constant stretches (one-value windows), steps between two levels and a stretch of zeros:
+    data = np.concatenate([np.full(1500, 0.3), np.repeat([0.1, 0.8, 0.1, 0.5], 400), np.zeros(900),
+                           np.linspace(0, 1, 1200)]).astype(dtype)
+    actual = check_thresholds(data, 300, 0.5)
+
+    assert actual[0] == dtype(0.3)                              # A constant window is its own threshold
+
+
+def test_shorter_than_one_window():
+    assert len(thresholds(np.ones(10), 20, 0.5)) == 0
@@ -0,0 +1,77 @@
+# Regression test for block-wise pre-processing: long recordings processed block by block (and read from disk a block at
+# a time) must match the whole-signal path to float32 rounding - the DC offset and peak are accumulated per block.
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+import preProcessingAudioLongitudinal as pp
+
+
+def recording(fs, seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * fs)) / fs
+    data = 0.3 * np.sin(2 * np.pi * 220 * t) * np.linspace(0.2, 1, len(t)) + 0.05 * rng.standard_normal(len(t)) + 0.01
+    return data.astype(np.float32)
+
+
+def preprocess(monkeypatch, data, fs, block_seconds, **params):
+    monkeypatch.setattr(pp, 'BLOCK_SECONDS', block_seconds)
+    audio = pp.preProcess_Audio((data, fs), **params)
+    assert (audio.blockLength() is not None) == (block_seconds > 0)
+    return audio.preProcess_resample()
+
+
+@pytest.mark.parametrize("fs, res_type", [
+    (44100, 'kaiser_best'),                         # No resampling
+    (48000, 'polyphase'),
+    (22050, 'kaiser_fast'),
+    (48000, 'kaiser_best'),
+    (16000, 'soxr_hq'),
+])
+def test_blocks_match_whole_signal(monkeypatch, fs, res_type):
+    data = recording(fs, 7.3)
+    whole, whole_fs = preprocess(monkeypatch, data, fs, 0, new_fs=44100, res_type=res_type)
+    blocks, blocks_fs = preprocess(monkeypatch, data, fs, 1.3, new_fs=44100, res_type=res_type)
+
+    assert blocks_fs == whole_fs == 44100
+    assert blocks.dtype == whole.dtype and blocks.shape == whole.shape
+    np.testing.assert_allclose(blocks, whole, rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize("channels", [1, 2])
+def test_long_wav_read_in_blocks(monkeypatch, tmp_path, channels):
+    data = (np.random.default_rng(1).standard_normal((int(6.2 * 48000), channels)) * 3000 + 40).astype(np.int16)
+    wavfile.write(tmp_path / "long_SV.wav", 48000, data.squeeze())
+
+    eager = pp.open_wav(None, 'SV', [tmp_path / "long_SV.wav"], ['x'])
+    monkeypatch.setattr(pp, 'BLOCK_SECONDS', 0)
+    _, (whole_in,) = eager.openFiles()
+    assert isinstance(whole_in[0], np.ndarray)
+    whole, _ = pp.preProcess_Audio(whole_in, res_type='polyphase').preProcess_resample()
+
+    monkeypatch.setattr(pp, 'BLOCK_SECONDS', 1.1)
+    _, (lazy_in,) = eager.openFiles()
+    assert isinstance(lazy_in[0], pp.wavSamples)
+    np.testing.assert_array_equal(np.asarray(lazy_in[0]), whole_in[0])
+    blocks, _ = pp.preProcess_Audio(lazy_in, res_type='polyphase').preProcess_resample()
+
+    np.testing.assert_allclose(blocks, whole, rtol=0, atol=1e-6)
+
+
+def test_blocks_not_used_for_global_resamplers(monkeypatch):
+    monkeypatch.setattr(pp, 'BLOCK_SECONDS', 1.0)
+    assert pp.preProcess_Audio((recording(16000, 3), 16000), res_type='fft').blockLength() is None
+
+
+def test_cache_writes_blocks_to_disk(monkeypatch, tmp_path):
+    data = recording(44100, 5)
+    whole, _ = preprocess(monkeypatch, data, 44100, 0)
+
+    monkeypatch.setattr(pp, 'BLOCK_SECONDS', 1.0)
+    cache = pp.preProcessCache(cache_dir=tmp_path)
+    cached, fs = cache.preProcess_resample((data, 44100))
+
+    assert isinstance(cached, np.memmap) and not cached.flags.writeable
+    key = cache.cacheKey((data, 44100), {'res_type': pp.RESAMPLE_TYPE})
+    assert [f.name for f in tmp_path.iterdir()] == [f"{key}.npy"]
+    np.testing.assert_allclose(cached, whole, rtol=0, atol=1e-6)
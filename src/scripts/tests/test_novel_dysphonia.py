@@ -0,0 +1,64 @@
+# Regression test for NovelDysphoniaMeasures: the scipy.fft GNE (batched band envelopes) and the MFCCs from the blockwise
+# power spectrogram must match the original implementations to floating-point rounding.
+import librosa
+import numpy as np
+import pytest
+from scipy import signal
+
+import speechFeaturesAcousticLongitudinal as sf
+
+
+# Reference: the original GNE - unpadded numpy FFT, one band at a time, signal.hilbert per band.
+def gne_original(data, fs, new_fs=10000):
+    data10k = librosa.resample(y=data, orig_sr=fs, target_sr=new_fs)
+    y_preEmph = librosa.effects.preemphasis(data10k, return_zf=False)
+    dftSignal = np.fft.fft(y_preEmph)
+    freq = np.abs(np.fft.fftfreq(n=len(y_preEmph), d=1/new_fs))
+
+    lowLim = [0, 750, 1500]
+    highLim = [750, 1500, 2250]
+    bandSig = [dftSignal[np.where((freq >= i) & (freq <= j))] for i, j in zip(lowLim, highLim)]
+    signalFinal = np.zeros((3, len(dftSignal)))
+    for i in range(len(bandSig)):
+        zeroSig = np.zeros(len(dftSignal))
+        mask = (freq >= lowLim[i]) & (freq <= highLim[i])
+        zeroSig[mask] = np.hanning(len(bandSig[i]))
+        zeroSig[-np.sum(mask):] = np.hanning(len(bandSig[i]))
+        timeSignal = np.abs(np.fft.ifft(np.multiply(dftSignal, zeroSig)))
+        signalFinal[i, :] = np.abs(signal.hilbert(np.real(timeSignal)))
+
+    corrCoef = np.max([np.corrcoef(signalFinal[i], signalFinal[j])[0, 1] for i in range(3) for j in range(i + 1, 3)])
+    return 10 * np.log10(corrCoef / (1 - corrCoef))
+
+
+# Reference: the original MFCC statistics, from librosa's own STFT.
+def mfcc_original(data, fs):
+    mfccs = librosa.feature.mfcc(y=data, sr=fs, n_mfcc=13)
+    delta = librosa.feature.delta(mfccs, mode='nearest')
+    delta2 = librosa.feature.delta(mfccs, order=2, mode='nearest')
+    return np.mean(np.std(mfccs, axis=1)), np.mean(np.std(delta, axis=1)), np.mean(np.std(delta2, axis=1))
+
+
+# A voiced segment: a jittered harmonic source with noise, normalised like the pre-processed recordings.
+def voiced(seed, seconds, fs=44100):
+    rng = np.random.default_rng(seed)
+    n = int(seconds * fs) + int(rng.integers(0, 1000))          # Arbitrary lengths, including awkward FFT sizes
+    f0 = rng.uniform(90, 250) * (1 + 0.01 * np.cumsum(rng.standard_normal(n)) / np.sqrt(n))
+    phase = 2 * np.pi * np.cumsum(f0) / fs
+    data = sum(np.sin(k * phase) / k for k in range(1, 15)) + rng.uniform(0.05, 0.5) * rng.standard_normal(n)
+    return (data / np.max(np.abs(data))).astype(np.float32)
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_gne_close_to_original(seed):
+    data = voiced(seed, 0.5 + seed)
+    new = sf.NovelDysphoniaMeasures(data, 44100).GNE()
+    old = gne_original(data, 44100)
+    assert new == pytest.approx(old, rel=1e-6)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_mfccs_match_original(seed):
+    data = voiced(seed, 1 + seed)
+    new = sf.NovelDysphoniaMeasures(data, 44100).MFCCs()
+    np.testing.assert_allclose(new, mfcc_original(data, 44100), rtol=1e-5)
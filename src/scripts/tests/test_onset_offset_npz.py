@@ -0,0 +1,36 @@
+# Round trip of the voiced detection .npz (save_onset_offset / load_onset_offset): per-file onset/offset arrays must come
+# back unchanged, including files without voiced segments and a table without files.
+import numpy as np
+import pandas as pd
+
+import preProcessingAudioLongitudinal as pp
+
+
+def round_trip(tmp_path, df_voiced):
+    pp.save_onset_offset(tmp_path / "voiced.npz", df_voiced)
+    return pp.load_onset_offset(tmp_path / "voiced.npz")
+
+
+def test_round_trip(tmp_path):
+    df_voiced = pd.DataFrame({
+        'pID': ['p01_SV', 'p02_SV', 'p03_SV'],
+        'onset': pd.Series([np.array([10, 500, 9000]), np.zeros(0, dtype=np.int64), np.array([42])], dtype=object),
+        'offset': pd.Series([np.array([400, 8000, 9100]), np.zeros(0, dtype=np.int64), np.array([99])], dtype=object),
+    })
+    loaded = round_trip(tmp_path, df_voiced)
+
+    assert loaded['pID'].tolist() == df_voiced['pID'].tolist()
+    for column in ('onset', 'offset'):
+        assert loaded[column].dtype == object
+        for actual, expected in zip(loaded[column], df_voiced[column]):
+            assert actual.dtype == np.int64
+            np.testing.assert_array_equal(actual, expected)
+
+
+def test_round_trip_without_files(tmp_path):
+    df_voiced = pd.DataFrame({'pID': [], 'onset': pd.Series([], dtype=object), 'offset': pd.Series([], dtype=object)})
+    loaded = round_trip(tmp_path, df_voiced)
+
+    assert len(loaded) == 0
+    assert list(loaded.columns) == ['pID', 'onset', 'offset']
+    assert loaded['onset'].dtype == object and loaded['offset'].dtype == object
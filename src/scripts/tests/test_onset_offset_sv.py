@@ -0,0 +1,76 @@
+# Randomised equivalence tests for signalDetection.getOnsetOffsetSV against the original hysteresis state machine.
+import numpy as np
+import pytest
+
+import preProcessingAudioLongitudinal as pp
+
+
+# Reference: the original per-sample state machine.
+def onset_offset_sv_loop(data, threshold):
+    if data is None or len(data) < 2:
+        return [], []
+    onsets = []
+    offsets = []
+    BelowThresh = True
+    for i in range(len(data) - 1):
+        if BelowThresh and data[i] > threshold and data[i + 1] > threshold:
+            onsets.append(i)
+            BelowThresh = False
+        elif not BelowThresh and data[i] < threshold and data[i + 1] < threshold:
+            offsets.append(i)
+            BelowThresh = True
+    if offsets and onsets and offsets[0] < onsets[0]:
+        del offsets[0]
+    if onsets and offsets and onsets[-1] > offsets[-1]:
+        del onsets[-1]
+    return onsets, offsets
+
+
+@pytest.fixture(scope="module")
+def detector():
+    return pp.signalDetection(np.zeros(2), 1000, 'test')
+
+
+def check(detector, data, threshold):
+    assert detector.getOnsetOffsetSV(data, threshold) == onset_offset_sv_loop(data, threshold)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_sequences(detector, seed):
+    # Small integer levels make samples equal to the threshold (neither above nor below) common, and short runs give
+    # many single-sample blips and crossings at the first and last index:
+    rng = np.random.default_rng(seed)
+    for _ in range(500):
+        data = rng.integers(0, 4, size=rng.integers(0, 40)).astype(float)
+        check(detector, data, float(rng.integers(0, 4)))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_envelopes(detector, seed):
+    # Smooth envelope-like signals with noise around the threshold, as produced by the SV detection:
+    rng = np.random.default_rng(seed)
+    for _ in range(50):
+        n = int(rng.integers(2, 5000))
+        data = np.abs(np.convolve(rng.standard_normal(n), np.ones(25) / 25, mode='same'))
+        data += rng.standard_normal(n) * 0.02
+        check(detector, data, float(np.median(data)))
+
+
+@pytest.mark.parametrize("data", [
+    [],                                 # empty
+    [1.0],                              # single sample
+    [2.0, 2.0],                         # above from index 0, never ends
+    [2.0, 2.0, 0.0, 0.0],               # onset at index 0, offset at the end
+    [0.0, 2.0, 0.0, 2.0, 0.0],          # single-sample blips never confirm
+    [0.0, 0.0, 2.0, 2.0],               # onset on the last pair - unfinished
+    [2.0, 2.0, 0.0, 0.0, 2.0, 2.0],     # unfinished onset after a complete segment
+    [0.0, 0.0, 2.0, 2.0, 0.0, 0.0],     # offset on the last pair
+    [1.0, 1.0, 1.0, 1.0],               # exactly on the threshold
+    [2.0, 1.0, 2.0, 1.0, 0.0, 1.0, 0.0],  # touching the threshold between crossings
+])
+def test_edge_cases(detector, data):
+    check(detector, np.array(data), 1.0)
+
+
+def test_none(detector):
+    assert detector.getOnsetOffsetSV(None, 1.0) == ([], [])
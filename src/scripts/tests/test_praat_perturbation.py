@@ -0,0 +1,53 @@
+# Regression test for Praat jitter and shimmer: the point process from the shared pitch object ("To PointProcess (cc)")
+# and the shimmer queries on one amplitude tier must give the results of the original Praat calls.
+import numpy as np
+import parselmouth
+import pytest
+from parselmouth.praat import call
+
+import speechFeaturesAcousticLongitudinal as sf
+from test_novel_dysphonia import voiced
+
+
+# Reference: the original glottal pulses, straight from the sound.
+def point_process_original(data, fmin, fmax):
+    sound = parselmouth.Sound(data)
+    return sound, call(sound, "To PointProcess (periodic, cc)", fmin, fmax)
+
+
+# Reference: the original jitter queries on that point process.
+def jitter_original(data, fmin, fmax):
+    _, pointProcess = point_process_original(data, fmin, fmax)
+    return tuple(call(pointProcess, f"Get jitter ({kind})", 0, 0, 0.0001, 0.02, 1.3)
+                 for kind in ("local", "local, absolute", "rap", "ppq5", "ddp"))
+
+
+# Reference: the original shimmer queries, each one on [sound, pointProcess].
+def shimmer_original(data, fmin, fmax):
+    sound, pointProcess = point_process_original(data, fmin, fmax)
+    return tuple(call([sound, pointProcess], f"Get shimmer ({kind})", 0, 0, 0.0001, 0.02, 1.3, 1.6)
+                 for kind in ("local", "local_dB", "apq3", "apq5", "apq11", "dda"))
+
+
+# Voiced segments, plus a recording that is mostly noise (few pulses, some measures undefined):
+def recordings():
+    for seed in range(4):
+        yield voiced(seed, 0.5 + seed)
+    rng = np.random.default_rng(10)
+    yield np.concatenate([voiced(10, 0.3), 0.1 * rng.standard_normal(44100)]).astype(np.float32)
+
+
+@pytest.mark.parametrize("fmin, fmax", [(75, 600), (75, 5000)])        # Pitch statistics range, feature table range
+@pytest.mark.parametrize("index", range(5))
+def test_jitter_matches_original(index, fmin, fmax):
+    data = list(recordings())[index]
+    new = sf.Praat(data, 44100, fmin=fmin, fmax=fmax).calculateJitter()
+    np.testing.assert_allclose(new, jitter_original(data, fmin, fmax), rtol=1e-12, equal_nan=True)
+
+
+@pytest.mark.parametrize("fmin, fmax", [(75, 600), (75, 5000)])
+@pytest.mark.parametrize("index", range(5))
+def test_shimmer_matches_original(index, fmin, fmax):
+    data = list(recordings())[index]
+    new = sf.Praat(data, 44100, fmin=fmin, fmax=fmax).calculateShimmer()
+    np.testing.assert_allclose(new, shimmer_original(data, fmin, fmax), rtol=1e-12, equal_nan=True)
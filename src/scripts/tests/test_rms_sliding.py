@@ -0,0 +1,38 @@
+# Regression test for signalDetection.RMS_sliding: the vectorised envelope must match the original per-sample loop.
+import numpy as np
+import pytest
+from scipy import signal
+
+import preProcessingAudioLongitudinal as pp
+
+
+# Reference: the original per-sample RMS loop, followed by the same smoothing and low-pass stages as RMS_sliding.
+def rms_sliding_loop(data, fs):
+    window_size = 5
+    padded_signal = np.pad(data, (window_size//2, window_size//2), mode='edge')
+    rms_values = np.zeros(len(data))
+    for i in range(len(data)):
+        window = padded_signal[i:i+window_size]
+        rms_values[i] = np.sqrt(np.mean(window**2))
+    rms_smoothed = np.convolve(rms_values, np.ones(3)/3, mode='same')
+    rms_smoothed = np.convolve(rms_smoothed, np.ones(5)/5, mode='same')
+    return signal.sosfiltfilt(pp.butterSOS(2, 10, 'low', fs), rms_smoothed)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+@pytest.mark.parametrize("seed", range(5))
+def test_rms_sliding_matches_loop(seed, dtype):
+    rng = np.random.default_rng(seed)
+    fs = 8000
+    data = (rng.standard_normal(fs) * np.linspace(0, 1, fs)).astype(dtype)
+    # Large values at both edges so the edge padding is exercised:
+    data[:3] = [0.9, -0.8, 0.7]
+    data[-3:] = [-0.9, 0.8, -0.7]
+
+    expected = rms_sliding_loop(data, fs)
+    actual = pp.signalDetection(data, fs, 'test').RMS_sliding()
+
+    np.testing.assert_array_equal(actual, expected)
+    np.testing.assert_array_equal(actual[:5], expected[:5])
+    np.testing.assert_array_equal(actual[-5:], expected[-5:])
+
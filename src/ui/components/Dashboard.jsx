@@ -16,6 +16,8 @@ function Dashboard() {
   const navigate = useNavigate();
   const [filePaths, setFilePaths] = useState([]);
   const [isProcessing, setIsProcessing] = useState(false);
+  const [processedCount, setProcessedCount] = useState(0);
+  const [failedFiles, setFailedFiles] = useState([]);
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [selectedFeature, setSelectedFeature] = useState(null);
 
@@ -117,6 +119,16 @@ function Dashboard() {
   const handleFileProcessing = async () => {
     if (filePaths.length > 0 && testType) {
       setIsProcessing(true);
+      setProcessedCount(0);
+      setFailedFiles([]);
+      // Count files as the backend reports them (results stream in per file)
+      // and show failed files straight away:
+      const stopProgress = window.electron.onHDProgress?.((progress) => {
+        setProcessedCount((count) => count + 1);
+        if (progress.file?.status === 'error') {
+          setFailedFiles((failed) => [...failed, progress.file]);
+        }
+      });
       try {
         const result = await window.electron.processHD(testType, filePaths);
 
@@ -171,6 +183,7 @@ function Dashboard() {
           },
         });
       } finally {
+        stopProgress?.();
         setIsProcessing(false);
       }
     }
@@ -303,12 +316,24 @@ function Dashboard() {
                     d="M4 12a8 8 0 018-8v4a4 4 0 00-4 4H4z"
                   ></path>
                 </svg>
-                Processing...
+                {filePaths.length > 1
+                  ? `Processing ${processedCount}/${filePaths.length}...`
+                  : 'Processing...'}
               </>
             ) : (
               'Proceed'
             )}
           </button>
+          {isProcessing && failedFiles.length > 0 && (
+            <div className="w-full bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded text-sm">
+              <strong>Failed files: {failedFiles.length}</strong>
+              {failedFiles.map((file, index) => (
+                <p key={index}>
+                  {file.filename}: {file.error}
+                </p>
+              ))}
+            </div>
+          )}
         </div>
       </div>
 
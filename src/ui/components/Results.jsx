@@ -97,12 +97,16 @@ function Results() {
     )
       return '';
 
-    const files = processingResult.files.filter((file) => file.features);
+    // Failed files are listed too, with their error in the last column:
+    const files = processingResult.files.filter(
+      (file) => file.features || file.status === 'error'
+    );
     if (files.length === 0) return '';
+    const hasErrors = files.some((file) => file.status === 'error');
 
     const allFeatureNames = new Set();
     files.forEach((file) => {
-      Object.keys(file.features).forEach((key) => {
+      Object.keys(file.features || {}).forEach((key) => {
         if (!METADATA_FIELDS.includes(key)) {
           allFeatureNames.add(key);
         }
@@ -114,13 +118,24 @@ function Results() {
       getFeatureNameWithUnits(key, testType)
     );
 
-    const header = ['Filename', ...displayNames].join(',');
+    const header = [
+      'Filename',
+      ...displayNames,
+      ...(hasErrors ? ['Error'] : []),
+    ].join(',');
 
     const rows = files.map((file) => {
       const values = featureNames.map((key) =>
-        roundValue(file.features[key] || '')
+        file.features ? roundValue(file.features[key] || '') : ''
       );
-      return [file.filename, ...values].join(',');
+      const error = String(file.error || 'Processing failed');
+      const errorCell =
+        file.status === 'error'
+          ? [`"${error.replace(/"/g, '""')}"`]
+          : hasErrors
+          ? ['']
+          : [];
+      return [file.filename, ...values, ...errorCell].join(',');
     });
 
     return [header, ...rows].join('\n');
@@ -153,6 +168,44 @@ function Results() {
     }
   };
 
+  const getFailedFiles = (processingResult) =>
+    processingResult?.files?.filter((file) => file.status === 'error') || [];
+
+  const renderFailedFiles = (processingResult) => {
+    const failedFiles = getFailedFiles(processingResult);
+    if (failedFiles.length === 0) return null;
+
+    return (
+      <div className="mt-6">
+        <h4 className="font-semibold text-red-700 mb-2">
+          Failed Files ({failedFiles.length})
+        </h4>
+        <table className="table-auto w-full border-collapse border border-gray-300 text-sm">
+          <thead>
+            <tr className="bg-gray-50">
+              <th className="border px-3 py-2 font-semibold text-left">
+                File
+              </th>
+              <th className="border px-3 py-2 font-semibold text-left">
+                Error
+              </th>
+            </tr>
+          </thead>
+          <tbody>
+            {failedFiles.map((file, index) => (
+              <tr key={index}>
+                <td className="border px-3 py-2 text-left">{file.filename}</td>
+                <td className="border px-3 py-2 text-left text-red-700">
+                  {file.error || 'Processing failed'}
+                </td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      </div>
+    );
+  };
+
   const renderFeaturesTable = (processingResult) => {
     if (!processingResult) return null;
 
@@ -450,8 +503,19 @@ function Results() {
       )}
 
       {processingResult && processingResult.status === 'success' && (
-        <div className="bg-green-100 border border-green-400 text-green-700 px-4 py-3 rounded">
-          <strong>Success!</strong> {processingResult.message}
+        <div
+          className={`px-4 py-3 rounded border ${
+            getFailedFiles(processingResult).length > 0
+              ? 'bg-yellow-100 border-yellow-400 text-yellow-800'
+              : 'bg-green-100 border-green-400 text-green-700'
+          }`}
+        >
+          <strong>
+            {getFailedFiles(processingResult).length > 0
+              ? 'Completed with errors.'
+              : 'Success!'}
+          </strong>{' '}
+          {processingResult.message}
           <div className="text-sm mt-1">
             Processing time: {processingResult.elapsed_seconds?.toFixed(2)}{' '}
             seconds
@@ -461,6 +525,11 @@ function Results() {
               Files processed: {filePaths.length}
             </div>
           )}
+          {getFailedFiles(processingResult).length > 0 && (
+            <div className="text-sm mt-1 font-semibold">
+              Files failed: {getFailedFiles(processingResult).length}
+            </div>
+          )}
           {filePaths && filePaths.length > 0 && (
             <div className="text-sm mt-1">
               Files:{' '}
@@ -499,7 +568,10 @@ function Results() {
           Extracted Features
         </h3>
         {processingResult ? (
-          renderFeaturesTable(processingResult)
+          <>
+            {renderFeaturesTable(processingResult)}
+            {renderFailedFiles(processingResult)}
+          </>
         ) : (
           <p className="text-gray-500">No features available</p>
         )}